@@ -0,0 +1,121 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+from config.config import load_config
+from core.compiled_forest import CompiledModel
+from core.feature_schema import RISK_SCHEMA, EXEC_SCHEMA
+from core.logic import models
+from backtest.run_backtest import load_symbol_data, simulate
+
+cfg = load_config()
+
+OUTPUT_DIR = "backtest"
+# Florestas explicadas e o grupo de entradas de cada uma
+ATTRIBUTED_MODELS = (("risk_action", RISK_SCHEMA), ("risk_level", RISK_SCHEMA), ("strategy_exec", EXEC_SCHEMA))
+TOP_FEATURES = 3
+
+
+def collect_decision_features(data, symbol, start_index=50, progress=True):
+    """
+    Roda o backtest em lote registrando as entradas dos modelos de cada decisão.
+    Retorna (simulador, passos, entradas de risco, entradas de execução, decisões).
+    """
+    feature_log = []
+    sim, _ = simulate(data, symbol, start_index, batched=True, progress=progress, feature_log=feature_log)
+    if not feature_log:
+        empty = np.zeros(0)
+        return sim, empty.astype(np.int64), np.zeros((0, len(RISK_SCHEMA))), np.zeros((0, len(EXEC_SCHEMA))), empty
+    steps, risk_input, exec_input, decisions = (np.concatenate(parts) for parts in zip(*feature_log))
+    return sim, steps, risk_input, exec_input, decisions
+
+
+def attribute_model(name, model, X, columns):
+    """
+    Contribuição de cada feature para a classe prevista (probabilidade), calculada em lote
+    sobre os arrays da floresta compilada. bias + soma das contribuições = probabilidade da classe.
+    """
+    compiled = CompiledModel.from_model(model)
+    bias, contrib = compiled.contributions(X)
+    proba = bias + contrib.sum(axis=1)
+    predicted = np.argmax(proba, axis=1)
+    rows = np.arange(len(X))
+    frame = {
+        f"{name}_pred": compiled.classes_.take(predicted),
+        f"{name}_prob": proba[rows, predicted],
+        f"{name}_bias": bias[rows, predicted],
+    }
+    for j, column in enumerate(columns):
+        frame[f"{name}__{column}"] = contrib[rows, j, predicted]
+    return pd.DataFrame(frame)
+
+
+def top_features(attribution, name, k=TOP_FEATURES):
+    """Texto com as k features de maior contribuição absoluta de cada linha (ex.: 'signal:+0.210, atr:-0.052')"""
+    columns = [c for c in attribution.columns if c.startswith(f"{name}__")]
+    values = attribution[columns].to_numpy()
+    order = np.argsort(-np.abs(values), axis=1)[:, :k]
+    labels = [c[len(name) + 2:] for c in columns]
+    return [", ".join(f"{labels[j]}:{row[j]:+.3f}" for j in idx) for row, idx in zip(values, order)]
+
+
+def run_attribution(symbol=None, start_index=50, date=None, output_dir=OUTPUT_DIR, progress=True):
+    """
+    Atribuição offline de todas as decisões de um backtest (ou de um dia, com date='AAAA-MM-DD').
+    Grava decision_attribution.parquet (uma linha por decisão) e trade_attribution.parquet
+    (trades com as principais features da decisão de entrada e de saída) ao lado do trade_log.
+    """
+    symbol = symbol or cfg["general"].get("symbols", ["EURUSD"])[0]
+    started = time.perf_counter()
+    data = load_symbol_data(symbol)
+    print(f"🔎 Coletando as entradas das decisões ({symbol})...")
+    sim, steps, risk_input, exec_input, decisions = collect_decision_features(data, symbol, start_index, progress)
+
+    if date is not None and "time" in data.columns:
+        day = pd.to_datetime(data["time"].to_numpy()[steps]).normalize() == pd.Timestamp(date)
+        steps, risk_input, exec_input, decisions = steps[day], risk_input[day], exec_input[day], decisions[day]
+        print(f"📅 {len(steps)} decisões em {date}")
+
+    attribution = pd.DataFrame({"time_step": steps, "final_decision": decisions})
+    if "time" in data.columns:
+        attribution.insert(1, "time", data["time"].to_numpy()[steps])
+    inputs = {RISK_SCHEMA.name: risk_input, EXEC_SCHEMA.name: exec_input}
+    for name, schema in ATTRIBUTED_MODELS:
+        model_started = time.perf_counter()
+        frame = attribute_model(name, models.get(name), inputs[schema.name], schema.columns)
+        attribution = pd.concat([attribution, frame], axis=1)
+        print(f"  {name}: {len(steps)} decisões em {time.perf_counter() - model_started:.2f}s")
+
+    os.makedirs(output_dir, exist_ok=True)
+    attribution.to_parquet(os.path.join(output_dir, "decision_attribution.parquet"))
+
+    trades = sim.trade_log.to_frame()
+    if date is not None:
+        trades = trades[trades["entry_time"].isin(steps) | trades["exit_time"].isin(steps)].reset_index(drop=True)
+    by_step = attribution.set_index("time_step")
+    for when in ("entry", "exit"):
+        explained = by_step.reindex(trades[f"{when}_time"].to_numpy())
+        known = explained["final_decision"].notna().to_numpy()
+        for name in ("strategy_exec", "risk_action"):
+            text = np.full(len(trades), "", dtype=object)
+            if known.any():
+                text[known] = top_features(explained[known], name)
+            trades[f"{when}_{name}_top"] = text
+    trades.to_parquet(os.path.join(output_dir, "trade_attribution.parquet"))
+
+    print(f"✅ Atribuição de {len(attribution)} decisões e {len(trades)} trades em {time.perf_counter() - started:.1f}s")
+    print(f"💾 {output_dir}/decision_attribution.parquet e {output_dir}/trade_attribution.parquet")
+    return attribution, trades
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Atribuição por feature das decisões (florestas de risco e execução)")
+    parser.add_argument("--symbol", default=None, help="Padrão: primeiro de general.symbols")
+    parser.add_argument("--start-index", type=int, default=50)
+    parser.add_argument("--date", default=None, help="Só as decisões de um dia (AAAA-MM-DD)")
+    args = parser.parse_args()
+    run_attribution(args.symbol, args.start_index, args.date)
@@ -0,0 +1,152 @@
+import numpy as np
+from collections import defaultdict
+from tqdm import tqdm
+from core.logic import prepare_market_batch, run_decision_batch
+from backtest.params import TradingRules
+from backtest.exit_engine import find_first_exit
+from core.risk_state import RiskStateTracker
+
+# Tamanho dos blocos de decisão especulativa
+MIN_CHUNK = 32
+MAX_CHUNK = 4096
+
+
+def _next_position_event(sim, final_decision, k, n, market, offset):
+    """
+    Primeiro passo > k do bloco em que algo pode acontecer com a posição aberta:
+    decisão contrária, move_stop ou toque do stop/take profit. Retorna n se nada acontece.
+    """
+    order_type = sim.position["order_type"]
+    opposite = "sell" if order_type == "buy" else "buy"
+    pending = final_decision[k + 1:]
+    changes = (pending == opposite) | (pending == "move_stop")
+    target = k + 1 + int(np.argmax(changes)) if changes.any() else n
+
+    if sim.exit_mode == "ohlc":
+        bar_open, high, low = market["open"], market["high"], market["low"]
+    else:
+        bar_open = high = low = market["close"]
+    hit = find_first_exit(order_type, sim.position["stop_price"], sim.position["take_profit_price"],
+                          bar_open, high, low, start=offset + k + 1, end=offset + target)
+    if hit is not None:
+        target = hit[0] - offset
+    return target
+
+
+def simulate_batched(data, sim, start_index=50, chunk_size=256, progress=True, params=None, market=None,
+                     checkpoint=None, resume=False, feature_log=None):
+    """
+    Executa o backtest com decisões pré-computadas em lote.
+
+    O sinal do modelo de mercado é calculado uma única vez para todo o período. Os modelos
+    de risco e execução são avaliados em blocos: o estado é projetado para os próximos
+    passos assumindo que nenhum trade acontece, todas as decisões do bloco saem de uma
+    chamada de predict por modelo e o loop só avança até o primeiro passo que altera o
+    estado (entrada, saída ou stop/take profit). Com posição aberta, os passos em que a
+    decisão não mexe na posição e o preço não toca stop/take profit são pulados de uma vez.
+    Os resultados são idênticos ao loop passo a passo.
+
+    'market' permite reaproveitar a saída de prepare_market_batch para data.iloc[start_index:-1]
+    (ex.: varredura de parâmetros com o sinal de mercado já calculado); nesse caso 'data' não é lido.
+
+    Com 'checkpoint' (backtest.checkpoint.Checkpointer) o progresso é salvo periodicamente ao fim
+    de um bloco; com resume=True a simulação continua do último checkpoint e retorna a contagem
+    de decisões completa. O simulador é restaurado em 'sim' (mesmo objeto).
+
+    Com 'feature_log' (lista) cada bloco acrescenta (passos, entradas de risco, entradas de execução,
+    decisões) dos passos efetivamente consumidos, para a atribuição offline.
+    """
+    end = start_index + len(market["close"]) if market is not None else len(data) - 1
+    if start_index >= end:
+        return defaultdict(int)
+
+    rules = TradingRules(params, sim.initial_capital)
+    saved = checkpoint.load() if checkpoint is not None and resume else None
+    if market is None:
+        if saved is not None:
+            # Sinais de mercado do checkpoint: o modelo não precisa reprocessar o histórico
+            market = prepare_market_batch(data.iloc[start_index:end], saved["signals"], saved["confidences"])
+        else:
+            market = prepare_market_batch(data.iloc[start_index:end])
+    close = market["close"]
+    bar_open, high, low = market["open"], market["high"], market["low"]
+    confidence = market["confidence"]
+
+    sim.risk_state = RiskStateTracker(sim.capital, start_step=start_index)
+    decision_counter = defaultdict(int)
+    lot_limits = {}
+
+    i = start_index
+    if saved is not None:
+        sim.__dict__.update(saved["sim"].__dict__)
+        rules = saved["rules"]
+        decision_counter.update(saved["decision_counter"])
+        i = saved["next_index"]
+        print(f"♻️ Retomando do checkpoint no índice {i}")
+
+    pbar = tqdm(total=end - start_index, initial=i - start_index, desc="🔄 Processando (lote)", disable=not progress)
+    chunk = chunk_size
+    while i < end:
+        n = min(chunk, end - i)
+        # Sem trades dentro do bloco só os tempos (time_in_trade, time_since_last_trade) variam
+        state = sim.risk_state.state(np.arange(i, i + n))
+        offset = i - start_index
+        segment = {key: values[offset:offset + n] for key, values in market.items()}
+        decisions = run_decision_batch(segment, state, lot_limits, rules.reinvestment_rate,
+                                       record_inputs=feature_log is not None)
+
+        final_decision = decisions["final_decision"]
+        position_size = decisions["position_size"]
+        stop_loss_pct = decisions["stop_loss_pct"] * rules.stop_loss_mult
+        take_profit_pct = decisions["take_profit_pct"] * rules.take_profit_mult
+
+        consumed = n
+        k = 0
+        while k < n:
+            step = i + k
+            price = close[offset + k]
+            trades_before = len(sim.trade_log)
+            had_position = sim.position is not None
+            capital_before = sim.capital
+
+            sim.check_exit(step, price, bar_open[offset + k], high[offset + k], low[offset + k])
+            decision_counter[final_decision[k]] += 1
+            sim.apply_decision(final_decision[k], price, step, position_size[k],
+                               stop_loss_pct[k], take_profit_pct[k],
+                               allow_entry=rules.allow_entry(confidence[offset + k]))
+            if len(sim.trade_log) != trades_before:
+                rules.on_trade_closed(sim.trade_log[-1]["pnl"], capital_before)
+            sim.log_equity(price, step)
+
+            if len(sim.trade_log) != trades_before or (sim.position is not None) != had_position:
+                # Estado mudou: as decisões seguintes do bloco não valem mais
+                consumed = k + 1
+                break
+
+            k += 1
+            if sim.position is not None and k < n:
+                # Salta o período em que nada pode alterar a posição
+                target = _next_position_event(sim, final_decision, k - 1, n, market, offset)
+                if target > k:
+                    labels, counts = np.unique(final_decision[k:target], return_counts=True)
+                    for label, count in zip(labels, counts):
+                        decision_counter[label] += int(count)
+                    rules.skip_steps(target - k)
+                    sim.log_equity_block(np.arange(i + k, i + target), close[offset + k:offset + target])
+                    k = target
+
+        if feature_log is not None:
+            feature_log.append((np.arange(i, i + consumed), decisions["risk_input"][:consumed],
+                                decisions["exec_input"][:consumed], final_decision[:consumed]))
+        pbar.update(consumed)
+        if progress:
+            pbar.set_postfix(sim.metrics.progress_summary(), refresh=False)
+        i += consumed
+        chunk = int(np.clip(2 * consumed, MIN_CHUNK, MAX_CHUNK))
+
+        if checkpoint is not None and i < end and checkpoint.due():
+            checkpoint.save(i, sim=sim, rules=rules, decision_counter=dict(decision_counter),
+                            signals=market["signal"], confidences=market["confidence"])
+
+    pbar.close()
+    return decision_counter
@@ -0,0 +1,199 @@
+import os
+import json
+import hashlib
+import pickle
+from config.config import load_config
+from core.compiled_forest import compiled_path
+from models.market_analysis.lstm_model_wrapper import weights_path
+
+cfg = load_config()
+
+CACHE_DIR = "backtest/cache"
+# Tamanho máximo padrão do cache (MB); os resultados usados há mais tempo são removidos primeiro
+MAX_CACHE_MB = 512
+# Incrementar quando o formato dos resultados salvos mudar. Os dtypes dos registros (TRADE_DTYPE,
+# EQUITY_DTYPE) vêm de backtest/records.py: esse arquivo e qualquer outro que defina o formato dos
+# resultados também precisam estar em SOURCE_FILES
+CACHE_VERSION = 1
+# Código da simulação: uma alteração nestes arquivos invalida os resultados em cache.
+# Todo módulo novo que participe do backtest (decisão, entradas dos modelos, regras de risco) entra nesta lista.
+SOURCE_FILES = (
+    "core/logic.py",
+    "core/risk_state.py",
+    "core/metrics.py",
+    "core/compiled_forest.py",
+    "core/feature_schema.py",
+    "models/risk_management/risk_dataset.py",
+    "models/strategy_execution/exec_dataset.py",
+    "live_trading/risk_guard.py",
+    "models/market_analysis/lstm_model_wrapper.py",
+    "backtest/trader_simulator.py",
+    "backtest/exit_engine.py",
+    "backtest/batch_engine.py",
+    "backtest/records.py",
+    "backtest/checkpoint.py",
+    "backtest/params.py",
+    "backtest/run_backtest.py",
+)
+# Chaves do settings.yaml que não mudam o resultado do backtest
+IGNORED_BACKTEST_KEYS = ("checkpoint_interval", "cache_max_mb")
+DIGEST_INDEX = "digests.json"
+CHUNK_SIZE = 1 << 20
+
+
+def _load_index(directory):
+    try:
+        with open(os.path.join(directory, DIGEST_INDEX), "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def file_digest(path, directory=CACHE_DIR):
+    """
+    SHA-256 do conteúdo do arquivo, lido em blocos. O digest fica guardado no índice do cache
+    junto com tamanho e mtime: o arquivo só é relido quando um dos dois muda.
+    Retorna None se o arquivo não existe.
+    """
+    if not path or not os.path.exists(path):
+        return None
+    stat = os.stat(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    index = _load_index(directory)
+    entry = index.get(os.path.abspath(path))
+    if entry and entry[:2] == signature:
+        return entry[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    index[os.path.abspath(path)] = [*signature, digest.hexdigest()]
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = os.path.join(directory, DIGEST_INDEX + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(directory, DIGEST_INDEX))
+    return digest.hexdigest()
+
+
+def backtest_key(symbol, start_index, batched, params=None, data_path=None, directory=CACHE_DIR):
+    """
+    Chave do resultado: hash do parquet, de cada arquivo em cfg["model_paths"] (e do .npz compilado), dos pesos
+    NumPy do LSTM, das seções do settings.yaml usadas na simulação, do código da simulação e dos argumentos da execução.
+    """
+    data_path = data_path or cfg["general"]["data_path"]
+    model_paths = cfg.get("model_paths", {})
+    backtest_cfg = {k: v for k, v in cfg.get("backtest", {}).items() if k not in IGNORED_BACKTEST_KEYS}
+    compiled_models = {name: file_digest(compiled_path(path), directory) for name, path in sorted(model_paths.items())} \
+        if cfg["general"].get("use_compiled_models", True) else {}
+    if "lstm_market_model" in model_paths:
+        # O LSTM roda sempre dos pesos exportados (.npz), com ou sem use_compiled_models
+        compiled_models["lstm_weights"] = file_digest(weights_path(model_paths["lstm_market_model"]), directory)
+    content = {
+        "version": CACHE_VERSION,
+        "run": {"symbol": symbol, "start_index": start_index, "batched": batched, "params": params},
+        "data": file_digest(data_path, directory),
+        "models": {name: file_digest(path, directory) for name, path in sorted(model_paths.items())},
+        "compiled_models": compiled_models,
+        "config": {
+            "trading": cfg.get("trading"),
+            "backtest": backtest_cfg,
+            "lstm_wrapper_params": cfg.get("lstm_wrapper_params"),
+            "lot_size": cfg.get("mt5", {}).get("lot_size"),
+        },
+        "source": {path: file_digest(path, directory) for path in SOURCE_FILES},
+    }
+    return hashlib.sha256(json.dumps(content, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    Resultados de backtest em pickle, um arquivo por chave (gravação atômica como no Checkpointer).
+    Cada leitura atualiza o mtime do arquivo; ao passar de max_bytes os menos usados são removidos.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=None):
+        self.directory = directory
+        if max_bytes is None:
+            max_bytes = cfg.get("backtest", {}).get("cache_max_mb", MAX_CACHE_MB) * 2 ** 20
+        self.max_bytes = max_bytes
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pkl")
+
+    def get(self, key):
+        """Retorna o payload salvo ou None"""
+        path = self.path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Arquivo corrompido ou de uma versão incompatível do código: descarta
+            os.remove(path)
+            return None
+        os.utime(path)
+        return payload
+
+    def put(self, key, **payload):
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = self.path(key) + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path(key))
+        self.evict()
+
+    def entries(self):
+        """(caminho, tamanho, mtime) de cada resultado salvo, do menos para o mais recente"""
+        if not os.path.isdir(self.directory):
+            return []
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((os.path.join(self.directory, name), stat.st_size, stat.st_mtime))
+        return sorted(entries, key=lambda e: e[2])
+
+    def size(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Remove os resultados usados há mais tempo até o cache caber em max_bytes"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            os.remove(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        for path, _, _ in self.entries():
+            os.remove(path)
+
+
+def cached_simulate(symbol, start_index=50, batched=False, params=None, data_path=None, use_cache=True,
+                    cache=None, **simulate_kwargs):
+    """
+    Mesmo resultado de simulate(), buscando antes no cache. Num acerto o parquet nem é carregado.
+    Retorna (simulador, contagem de decisões, acerto no cache).
+    """
+    from backtest.run_backtest import load_symbol_data, simulate
+
+    cache = cache or ResultCache()
+    key = backtest_key(symbol, start_index, batched, params, data_path, cache.directory) if use_cache else None
+    if key is not None:
+        saved = cache.get(key)
+        if saved is not None:
+            return saved["sim"], saved["decision_counter"], True
+
+    data = load_symbol_data(symbol, data_path)
+    sim, decision_counter = simulate(data, symbol, start_index, batched, params=params, **simulate_kwargs)
+    if key is not None:
+        cache.put(key, sim=sim, decision_counter=dict(decision_counter))
+    return sim, decision_counter, False
@@ -0,0 +1,67 @@
+import os
+import pickle
+import time
+
+CHECKPOINT_DIR = "backtest/checkpoints"
+# Intervalo padrão entre checkpoints (segundos): limita o custo de serializar históricos longos
+CHECKPOINT_INTERVAL = 60
+
+
+def checkpoint_path(symbol, batched, directory=CHECKPOINT_DIR):
+    return os.path.join(directory, f"{symbol}_{'batch' if batched else 'scalar'}.pkl")
+
+
+def market_model_state():
+    """Estado interno do modelo de mercado (histórico por símbolo), se o wrapper expõe get_state"""
+    from core.logic import models
+    market_model = models.get("market")
+    return market_model.get_state() if hasattr(market_model, "get_state") else None
+
+
+def restore_market_model(state):
+    """Restaura o estado salvo. Retorna False se o wrapper não suporta set_state"""
+    from core.logic import models
+    market_model = models.get("market")
+    if state is None or not hasattr(market_model, "set_state"):
+        return False
+    market_model.set_state(state)
+    return True
+
+
+class Checkpointer:
+    """
+    Salva periodicamente o progresso de uma simulação em um pickle, de forma atômica
+    (arquivo temporário + os.replace): uma interrupção no meio da escrita mantém o checkpoint anterior.
+    'meta' identifica a execução (símbolo, start_index, parâmetros...) e é conferido no resume.
+    """
+
+    def __init__(self, path, meta=None, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.meta = meta or {}
+        self.interval = interval
+        self._last_save = time.monotonic()
+
+    def due(self):
+        return self.interval is not None and time.monotonic() - self._last_save >= self.interval
+
+    def save(self, next_index, **payload):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"meta": self.meta, "next_index": next_index, **payload}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+        self._last_save = time.monotonic()
+
+    def load(self):
+        """Retorna o checkpoint salvo ou None se não existe"""
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, "rb") as f:
+            checkpoint = pickle.load(f)
+        if checkpoint["meta"] != self.meta:
+            raise ValueError(f"Checkpoint {self.path} é de outra configuração: {checkpoint['meta']} != {self.meta}")
+        return checkpoint
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,48 @@
+import numpy as np
+
+# Primeiro bloco da busca vetorizada; dobra a cada bloco sem toque
+FIRST_BLOCK = 64
+
+
+def exit_fill(order_type, stop_price, take_profit_price, bar_open, high, low, gap_fills=True):
+    """
+    Verifica um único candle. Retorna (preço, motivo) ou None.
+    Se stop e take profit são tocados no mesmo candle, assume o stop (conservador).
+    Com gap_fills, um candle que abre além do nível é executado na abertura.
+    """
+    if order_type == "buy":
+        if low <= stop_price:
+            return (bar_open if gap_fills and bar_open <= stop_price else stop_price), "stop_loss"
+        if high >= take_profit_price:
+            return (bar_open if gap_fills and bar_open >= take_profit_price else take_profit_price), "take_profit"
+    elif order_type == "sell":
+        if high >= stop_price:
+            return (bar_open if gap_fills and bar_open >= stop_price else stop_price), "stop_loss"
+        if low <= take_profit_price:
+            return (bar_open if gap_fills and bar_open <= take_profit_price else take_profit_price), "take_profit"
+    return None
+
+
+def find_first_exit(order_type, stop_price, take_profit_price, bar_open, high, low, start=0, end=None, gap_fills=True):
+    """
+    Busca vetorizada do primeiro candle em [start, end) que toca o stop ou o take profit.
+    Retorna (índice, preço, motivo) ou None. Varre em blocos crescentes para que
+    trades curtos não paguem pela varredura do histórico inteiro.
+    """
+    end = len(high) if end is None else min(end, len(high))
+    block = FIRST_BLOCK
+    lo = start
+    while lo < end:
+        hi = min(end, lo + block)
+        if order_type == "buy":
+            touched = (low[lo:hi] <= stop_price) | (high[lo:hi] >= take_profit_price)
+        else:
+            touched = (high[lo:hi] >= stop_price) | (low[lo:hi] <= take_profit_price)
+        if touched.any():
+            idx = lo + int(np.argmax(touched))
+            price, reason = exit_fill(order_type, stop_price, take_profit_price,
+                                      bar_open[idx], high[idx], low[idx], gap_fills)
+            return idx, price, reason
+        lo = hi
+        block *= 2
+    return None
@@ -0,0 +1,153 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+from config.config import load_config
+
+cfg = load_config()
+
+METHODS = ("permutation", "bootstrap", "perturbation")
+# Caminhos simulados por bloco de matriz: limita a memória (n_trades x BATCH_PATHS floats por vez)
+BATCH_PATHS = 2000
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+def load_trade_pnl(path="backtest/trade_log.parquet"):
+    """PnL dos trades (em USD, na ordem em que fecharam) de um trade_log parquet ou csv"""
+    trades = pd.read_csv(path) if path.endswith(".csv") else pd.read_parquet(path)
+    if "exit_time" in trades.columns:
+        trades = trades.sort_values("exit_time", kind="stable")
+    return trades["pnl"].to_numpy(dtype=np.float64)
+
+
+def permutation_paths(pnl, n_paths, rng):
+    """Mesmos trades em ordem aleatória: cada linha é uma permutação"""
+    order = np.argsort(rng.random((n_paths, len(pnl))), axis=1)
+    return pnl[order]
+
+
+def block_bootstrap_paths(pnl, n_paths, rng, block_size=5):
+    """Reamostragem com reposição de blocos contíguos (circulares), preserva sequências de ganhos/perdas"""
+    n = len(pnl)
+    block_size = max(1, min(block_size, n))
+    n_blocks = -(-n // block_size)
+    starts = rng.integers(0, n, (n_paths, n_blocks, 1))
+    idx = ((starts + np.arange(block_size)) % n).reshape(n_paths, -1)[:, :n]
+    return pnl[idx]
+
+
+def perturbation_paths(pnl, n_paths, rng, noise=0.1):
+    """Ordem original com ruído multiplicativo em cada PnL (slippage / execução diferente)"""
+    return pnl * (1 + noise * rng.standard_normal((n_paths, len(pnl))))
+
+
+def path_statistics(paths, initial_capital, ruin_threshold=0.5):
+    """
+    Estatísticas por caminho a partir da matriz (caminhos x trades) de PnL.
+    Ruína = equity chegar a initial_capital * (1 - ruin_threshold) em algum momento.
+    """
+    equity = initial_capital + np.cumsum(paths, axis=1)
+    equity = np.concatenate([np.full((len(paths), 1), float(initial_capital)), equity], axis=1)
+    peak = np.maximum.accumulate(equity, axis=1)
+    drawdown = ((equity - peak) / peak).min(axis=1)
+    ruined = (equity <= initial_capital * (1 - ruin_threshold)).any(axis=1)
+    return drawdown, equity[:, -1], ruined
+
+
+def simulate_paths(pnl, method="permutation", n_paths=10000, initial_capital=10000, ruin_threshold=0.5,
+                   block_size=5, noise=0.1, seed=None, batch_paths=BATCH_PATHS):
+    """Gera n_paths caminhos pelo método escolhido, em blocos de matriz. Retorna (drawdown, equity final, ruína)"""
+    if method not in METHODS:
+        raise ValueError(f"Método desconhecido: {method}. Opções: {METHODS}")
+    pnl = np.asarray(pnl, dtype=np.float64)
+    if len(pnl) == 0:
+        raise ValueError("Trade log vazio: nada para simular")
+
+    rng = np.random.default_rng(seed)
+    drawdowns, finals, ruins = [], [], []
+    for start in range(0, n_paths, batch_paths):
+        n = min(batch_paths, n_paths - start)
+        if method == "permutation":
+            paths = permutation_paths(pnl, n, rng)
+        elif method == "bootstrap":
+            paths = block_bootstrap_paths(pnl, n, rng, block_size)
+        else:
+            paths = perturbation_paths(pnl, n, rng, noise)
+        dd, final, ruined = path_statistics(paths, initial_capital, ruin_threshold)
+        drawdowns.append(dd)
+        finals.append(final)
+        ruins.append(ruined)
+    return np.concatenate(drawdowns), np.concatenate(finals), np.concatenate(ruins)
+
+
+def summarize(method, drawdown, final_equity, ruined, initial_capital):
+    summary = {"method": method, "paths": len(drawdown)}
+    for p in PERCENTILES:
+        # Percentil p do drawdown: p% dos caminhos têm drawdown pior ou igual
+        summary[f"max_drawdown_p{p}"] = float(np.percentile(drawdown, p))
+    for p in PERCENTILES:
+        summary[f"final_equity_p{p}"] = float(np.percentile(final_equity, p))
+    summary["prob_ruin"] = float(ruined.mean())
+    summary["prob_loss"] = float((final_equity < initial_capital).mean())
+    return summary
+
+
+def run_monte_carlo(pnl, methods=METHODS, n_paths=10000, initial_capital=None, ruin_threshold=0.5,
+                    block_size=5, noise=0.1, seed=42):
+    """Roda os métodos pedidos e retorna (tabela resumo, {método: distribuição de drawdown})"""
+    initial_capital = initial_capital or cfg["trading"]["initial_capital"]
+    rows, distributions = [], {}
+    for k, method in enumerate(methods):
+        started = time.perf_counter()
+        drawdown, final_equity, ruined = simulate_paths(
+            pnl, method, n_paths, initial_capital, ruin_threshold, block_size, noise,
+            seed=None if seed is None else seed + k
+        )
+        rows.append({**summarize(method, drawdown, final_equity, ruined, initial_capital),
+                     "elapsed_s": time.perf_counter() - started})
+        distributions[method] = drawdown
+    return pd.DataFrame(rows), distributions
+
+
+def plot_drawdown_distributions(distributions, filename="backtest/monte_carlo_drawdown.png"):
+    plt.figure(figsize=(12, 6))
+    for method, drawdown in distributions.items():
+        plt.hist(drawdown * 100, bins=60, alpha=0.5, label=method)
+    plt.title("Distribuição do Max Drawdown (Monte Carlo)")
+    plt.xlabel("Max Drawdown (%)")
+    plt.ylabel("Caminhos")
+    plt.legend()
+    plt.grid(True)
+    plt.tight_layout()
+    plt.savefig(filename)
+    plt.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo sobre o trade log do backtest")
+    parser.add_argument("--trades", default="backtest/trade_log.parquet", help="trade_log .parquet ou .csv")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=METHODS)
+    parser.add_argument("--paths", type=int, default=10000)
+    parser.add_argument("--ruin", type=float, default=0.5, help="Perda do capital inicial considerada ruína (0.5 = 50%%)")
+    parser.add_argument("--block-size", type=int, default=5, help="Trades por bloco no bootstrap")
+    parser.add_argument("--noise", type=float, default=0.1, help="Desvio relativo do ruído no PnL")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="backtest/monte_carlo.csv")
+    args = parser.parse_args()
+
+    pnl = load_trade_pnl(args.trades)
+    print(f"🎲 Monte Carlo: {len(pnl)} trades, {args.paths} caminhos por método...")
+    summary, distributions = run_monte_carlo(pnl, args.methods, args.paths, ruin_threshold=args.ruin,
+                                             block_size=args.block_size, noise=args.noise, seed=args.seed)
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    summary.to_csv(args.output, index=False)
+    plot_drawdown_distributions(distributions)
+
+    print("\n📊 Resumo:")
+    print(summary.to_string(index=False))
+    print(f"💾 Resumo salvo em {args.output}; histograma em backtest/monte_carlo_drawdown.png")
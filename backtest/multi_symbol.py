@@ -0,0 +1,138 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from config.config import load_config
+
+cfg = load_config()
+
+OUTPUT_DIR = "backtest/multi_symbol"
+
+
+def _init_worker():
+    """Carrega os modelos uma vez por processo: ficam em memória para todos os símbolos do worker"""
+    from core.logic import models
+    models.preload(background=False)
+
+
+def _run_symbol(symbol, start_index, batched, data_path, resume=False, checkpoint_interval=None):
+    """Roda o backtest de um símbolo dentro do worker e devolve só os resultados serializáveis"""
+    from backtest.run_backtest import load_symbol_data, simulate
+
+    started = time.perf_counter()
+    data = load_symbol_data(symbol, data_path)
+    sim, decision_counter = simulate(data, symbol, start_index, batched, progress=False,
+                                     checkpoint_interval=checkpoint_interval, resume=resume)
+
+    times = data["time"].iloc[start_index:start_index + len(sim.equity_curve)].to_numpy() \
+        if "time" in data.columns else range(start_index, start_index + len(sim.equity_curve))
+    equity = pd.DataFrame({"time": times, "equity": sim.equity_curve})
+    trades = sim.trade_log.to_frame()
+    trades.insert(0, "symbol", symbol)
+
+    return {
+        "symbol": symbol,
+        "equity": equity,
+        "trades": trades,
+        "metrics": sim.metrics.snapshot() if len(sim.equity_curve) else {},
+        "timeframe": sim.metrics.timeframe,
+        "decisions": dict(decision_counter),
+        "final_capital": sim.capital,
+        "elapsed": time.perf_counter() - started
+    }
+
+
+def merge_results(results, initial_capital):
+    """Une os resultados por símbolo em relatórios por ativo e agregados"""
+    from backtest.run_backtest import calculate_metrics
+
+    # Curvas de capital alinhadas por tempo; antes do primeiro candle de um ativo vale o capital inicial
+    curves = pd.concat(
+        [r["equity"].set_index("time")["equity"].rename(r["symbol"]) for r in results], axis=1
+    ).sort_index()
+    curves = curves.ffill().fillna(initial_capital)
+    curves["total"] = curves[[r["symbol"] for r in results]].sum(axis=1)
+
+    trades = pd.concat([r["trades"] for r in results], ignore_index=True)
+
+    rows = []
+    for r in results:
+        rows.append({"symbol": r["symbol"], **r["metrics"], "final_capital": r["final_capital"],
+                     "n_trades": len(r["trades"]), "elapsed_s": r["elapsed"]})
+    aggregate = calculate_metrics(curves["total"].to_numpy(), trades, timeframe=results[0]["timeframe"])
+    rows.append({"symbol": "TOTAL", **aggregate,
+                 "final_capital": sum(r["final_capital"] for r in results),
+                 "n_trades": len(trades), "elapsed_s": max(r["elapsed"] for r in results)})
+    metrics = pd.DataFrame(rows)
+
+    decisions = pd.DataFrame({r["symbol"]: r["decisions"] for r in results}).fillna(0).astype(int)
+    return curves, trades, metrics, decisions
+
+
+def run_multi_symbol_backtest(symbols=None, start_index=50, batched=True, max_workers=None, data_path=None,
+                              resume=False, checkpoint_interval=None):
+    """
+    Distribui os backtests por símbolo entre processos e consolida os relatórios.
+    Cada símbolo tem seu checkpoint; com resume=True os símbolos interrompidos continuam de onde pararam.
+    """
+    data_path = data_path or cfg["general"]["data_path"]
+    if checkpoint_interval is None:
+        checkpoint_interval = cfg.get("backtest", {}).get("checkpoint_interval")
+    available = pd.read_parquet(data_path, columns=["symbol"])["symbol"].unique().tolist()
+    if symbols is None:
+        symbols = available
+        missing = [s for s in cfg["general"].get("symbols", []) if s not in available]
+        if missing:
+            print(f"⚠️ Símbolos da configuração sem dados em {data_path}: {missing}")
+    else:
+        for s in [s for s in symbols if s not in available]:
+            print(f"⚠️ {s} não encontrado em {data_path}, ignorando.")
+        symbols = [s for s in symbols if s in available]
+    if not symbols:
+        raise ValueError("Nenhum símbolo com dados para o backtest")
+
+    max_workers = max_workers or min(len(symbols), os.cpu_count() or 1)
+    print(f"🚀 Backtest multi-símbolo: {symbols} em {max_workers} processo(s)...")
+    started = time.perf_counter()
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(_run_symbol, s, start_index, batched, data_path, resume, checkpoint_interval or None): s
+                   for s in symbols}
+        for future in as_completed(futures):
+            result = future.result()
+            print(f"✅ {result['symbol']}: capital final {result['final_capital']:.2f} "
+                  f"({len(result['trades'])} trades, {result['elapsed']:.1f}s)")
+            results.append(result)
+    results.sort(key=lambda r: symbols.index(r["symbol"]))
+
+    curves, trades, metrics, decisions = merge_results(results, cfg["trading"]["initial_capital"])
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    curves.to_parquet(os.path.join(OUTPUT_DIR, "equity_curves.parquet"))
+    trades.to_parquet(os.path.join(OUTPUT_DIR, "trade_log.parquet"), index=False)
+    metrics.to_csv(os.path.join(OUTPUT_DIR, "metrics.csv"), index=False)
+    decisions.to_csv(os.path.join(OUTPUT_DIR, "decisions.csv"))
+
+    print("\n📊 Métricas por símbolo:")
+    print(metrics.to_string(index=False))
+    print(f"\n⏱️ Tempo total: {time.perf_counter() - started:.1f}s")
+    print(f"💾 Relatórios salvos em {OUTPUT_DIR}/")
+    return curves, trades, metrics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest paralelo de múltiplos símbolos")
+    parser.add_argument("--symbols", nargs="+", default=None, help="Padrão: todos os símbolos do parquet")
+    parser.add_argument("--start-index", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--scalar", action="store_true", help="Usa o loop passo a passo em vez do modo em lote")
+    parser.add_argument("--resume", action="store_true", help="Continua os símbolos a partir dos checkpoints")
+    parser.add_argument("--checkpoint-interval", type=float, default=None, help="Segundos entre checkpoints (0 desativa)")
+    args = parser.parse_args()
+    run_multi_symbol_backtest(args.symbols, args.start_index, batched=not args.scalar, max_workers=args.workers,
+                              resume=args.resume, checkpoint_interval=args.checkpoint_interval)
@@ -0,0 +1,75 @@
+from core.logic import REINVESTMENT_RATE
+from live_trading.risk_guard import RiskGuard
+
+# Parâmetros ajustáveis do backtest. None = comportamento original (sem filtro / sem RiskGuard).
+DEFAULT_PARAMS = {
+    "min_confidence": None,
+    "stop_loss_mult": 1.0,
+    "take_profit_mult": 1.0,
+    "reinvestment_rate": REINVESTMENT_RATE,
+    "max_drawdown": None,
+    "max_consecutive_losses": None,
+    "cooldown_steps": None,
+}
+
+RISK_GUARD_KEYS = ("max_drawdown", "max_consecutive_losses", "cooldown_steps")
+
+
+def resolve_params(params=None):
+    """Completa os parâmetros informados com os defaults"""
+    params = dict(params or {})
+    unknown = set(params) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Parâmetros de backtest desconhecidos: {sorted(unknown)}")
+    return {**DEFAULT_PARAMS, **params}
+
+
+class TradingRules:
+    """Regras de execução aplicadas sobre as decisões do modelo durante o backtest"""
+
+    def __init__(self, params=None, initial_capital=10000):
+        self.params = resolve_params(params)
+        self.min_confidence = self.params["min_confidence"]
+        self.stop_loss_mult = self.params["stop_loss_mult"]
+        self.take_profit_mult = self.params["take_profit_mult"]
+        self.reinvestment_rate = self.params["reinvestment_rate"]
+
+        self.risk_guard = None
+        if any(self.params[k] is not None for k in RISK_GUARD_KEYS):
+            self.risk_guard = RiskGuard(
+                initial_capital=initial_capital,
+                max_drawdown=self.params["max_drawdown"] if self.params["max_drawdown"] is not None else 0.25,
+                max_consecutive_losses=self.params["max_consecutive_losses"] or 3,
+                cooldown_steps=self.params["cooldown_steps"] if self.params["cooldown_steps"] is not None else 3
+            )
+
+    def allow_entry(self, confidence):
+        """Chamado uma vez por passo: decide se novas entradas são permitidas"""
+        guard_allows = self.guard_allows_entry()
+        return guard_allows and self.confidence_ok(confidence)
+
+    def guard_allows_entry(self):
+        """Parte do RiskGuard de allow_entry (avança o cooldown): uma chamada por passo"""
+        if self.risk_guard is not None:
+            cooling = self.risk_guard.check_cooldown()
+            if cooling or self.risk_guard.is_blocked():
+                return False
+        return True
+
+    def confidence_ok(self, confidence):
+        return self.min_confidence is None or confidence >= self.min_confidence
+
+    def skip_steps(self, n):
+        """Equivale a n chamadas de allow_entry cujo resultado não é usado (saltos do modo em lote)"""
+        guard = self.risk_guard
+        if guard is not None and guard.cooldown_active and n > 0:
+            remaining = guard.cooldown_steps - guard.cooldown_counter
+            if n >= remaining:
+                guard.cooldown_active = False
+                guard.cooldown_counter = 0
+            else:
+                guard.cooldown_counter += n
+
+    def on_trade_closed(self, pnl, capital_before):
+        if self.risk_guard is not None and capital_before > 0:
+            self.risk_guard.update_after_trade(pnl / capital_before)
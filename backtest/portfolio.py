@@ -0,0 +1,238 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import heapq
+import time
+import numpy as np
+import pandas as pd
+from collections import defaultdict
+from tqdm import tqdm
+from config.config import load_config
+from core.logic import prepare_market_batch, run_decision_batch
+from core.metrics import StreamingMetrics, infer_timeframe
+from core.risk_state import RiskStateTracker
+from backtest.trader_simulator import TraderSimulator
+from backtest.params import TradingRules
+from backtest.records import RecordBuffer, PORTFOLIO_EQUITY_DTYPE
+
+cfg = load_config()
+
+OUTPUT_DIR = "backtest/portfolio"
+# Margem simplificada como o pip value do simulador: 1 lote = 100.000 unidades de USD
+CONTRACT_SIZE = 100000
+DEFAULT_LEVERAGE = 100
+
+
+def merge_bar_streams(times_by_symbol):
+    """
+    Merge k-way (heap) dos arrays de tempo já ordenados de cada símbolo.
+    Gera (tempo, [(símbolo k, posição), ...]) agrupando os candles com o mesmo timestamp.
+    """
+    heap = [(times[0], k, 0) for k, times in enumerate(times_by_symbol) if len(times)]
+    heapq.heapify(heap)
+    while heap:
+        current = heap[0][0]
+        group = []
+        while heap and heap[0][0] == current:
+            _, k, pos = heapq.heappop(heap)
+            group.append((k, pos))
+            if pos + 1 < len(times_by_symbol[k]):
+                heapq.heappush(heap, (times_by_symbol[k][pos + 1], k, pos + 1))
+        yield current, group
+
+
+class PortfolioSimulator:
+    """
+    Vários símbolos sobre uma única conta: capital e margem compartilhados e um RiskGuard
+    para a carteira. As posições e o PnL de cada símbolo usam um TraderSimulator próprio;
+    o capital que entra nas decisões e no drawdown é o da conta.
+    """
+
+    def __init__(self, symbols, initial_capital=10000, leverage=DEFAULT_LEVERAGE, params=None, timeframe=None):
+        self.symbols = list(symbols)
+        self.initial_capital = initial_capital
+        self.capital = initial_capital
+        self.leverage = leverage
+        self.lot_size = cfg.get("mt5", {}).get("lot_size", 0.01)
+        self.sims = {s: TraderSimulator(initial_capital, symbol=s, lot_size=self.lot_size, timeframe=timeframe)
+                     for s in self.symbols}
+        # RiskGuard da carteira com os limites do robô ao vivo, salvo se os parâmetros disserem outra coisa
+        guard_params = {"max_drawdown": cfg["trading"]["max_drawdown"], "max_consecutive_losses": 3, "cooldown_steps": 3}
+        self.rules = TradingRules({**guard_params, **(params or {})}, initial_capital)
+        self.account_state = RiskStateTracker(initial_capital)
+        self.metrics = StreamingMetrics(timeframe or cfg["general"].get("timeframe", "D1"))
+        self.equity = RecordBuffer(PORTFOLIO_EQUITY_DTYPE, capacity=4096)
+        self.last_price = {s: None for s in self.symbols}
+
+    def margin_required(self, lotes):
+        return lotes * CONTRACT_SIZE / self.leverage
+
+    @property
+    def used_margin(self):
+        return sum(self.margin_required(sim.position["lotes"]) for sim in self.sims.values() if sim.position)
+
+    def unrealized_pnl(self):
+        return sum(sim.unrealized_pnl(self.last_price[s]) for s, sim in self.sims.items() if sim.position)
+
+    def state_for(self, symbol, step):
+        """Features de risco do símbolo com capital e drawdown da conta"""
+        state = self.sims[symbol].risk_state.state(step)
+        state["capital"] = self.capital
+        state["drawdown"] = self.account_state.drawdown
+        return state
+
+    def on_trade_closed(self, symbol, capital_before):
+        pnl = float(self.sims[symbol].trade_log[-1]["pnl"])
+        self.capital += pnl
+        self.rules.on_trade_closed(pnl, capital_before)
+        self.account_state.update_capital(self.capital)
+        self.metrics.update_trade(pnl)
+
+    def log_equity(self, timestamp):
+        equity = self.capital + self.unrealized_pnl()
+        self.equity.append(time=timestamp, equity=equity, balance=self.capital, used_margin=self.used_margin,
+                           open_positions=sum(1 for sim in self.sims.values() if sim.position))
+        self.metrics.update_equity(equity)
+
+    def trade_frame(self, times_by_symbol):
+        """Trades de todos os símbolos com horários reais de entrada e saída, ordenados pela saída"""
+        frames = []
+        for k, (symbol, sim) in enumerate(self.sims.items()):
+            trades = sim.trade_log.to_frame()
+            trades.insert(0, "symbol", symbol)
+            trades["entry_time"] = pd.to_datetime(times_by_symbol[k][trades["entry_time"].to_numpy()])
+            trades["exit_time"] = pd.to_datetime(times_by_symbol[k][trades["exit_time"].to_numpy()])
+            frames.append(trades)
+        return pd.concat(frames, ignore_index=True).sort_values("exit_time", kind="stable").reset_index(drop=True)
+
+
+def load_portfolio_data(symbols=None, data_path=None):
+    """
+    Lê o parquet combinado uma vez e separa por símbolo, cada um ordenado por tempo.
+    Padrão: os símbolos do settings.yaml que têm dados (ou todos os do parquet).
+    """
+    data = pd.read_parquet(data_path or cfg["general"]["data_path"])
+    available = data["symbol"].unique().tolist()
+    if not symbols:
+        symbols = [s for s in cfg["general"].get("symbols", []) if s in available] or available
+    symbols = [s for s in symbols if s in available]
+    if not symbols:
+        raise ValueError("Nenhum símbolo com dados para o backtest de carteira")
+    return {s: frame.sort_values("time", kind="stable").reset_index(drop=True)
+            for s, frame in data.groupby("symbol", sort=False) if s in symbols}
+
+
+def simulate_portfolio(frames, start_index=50, leverage=DEFAULT_LEVERAGE, params=None, progress=True):
+    """
+    Backtest da carteira em uma passada sobre os candles de todos os símbolos, em ordem de tempo.
+    Os candles com o mesmo timestamp são decididos juntos: uma chamada de predict por modelo por timestamp.
+    """
+    symbols = list(frames)
+    times = next(iter(frames.values()))["time"]
+    portfolio = PortfolioSimulator(symbols, cfg["trading"]["initial_capital"], leverage, params,
+                                   timeframe=infer_timeframe(times))
+    rules = portfolio.rules
+
+    # Sinal do modelo de mercado e arrays de cada símbolo, calculados uma vez
+    markets, times_by_symbol, step_times = [], [], []
+    for symbol in symbols:
+        frame = frames[symbol]
+        end = len(frame) - 1
+        markets.append(prepare_market_batch(frame.iloc[start_index:end], default_symbol=symbol))
+        times_by_symbol.append(frame["time"].to_numpy(dtype="datetime64[ns]"))
+        step_times.append(times_by_symbol[-1][start_index:end].astype(np.int64))
+        portfolio.sims[symbol].risk_state = RiskStateTracker(portfolio.capital, start_step=start_index)
+
+    decision_counter = defaultdict(int)
+    lot_limits = {}
+    keys = list(markets[0])
+    total = sum(len(t) for t in step_times)
+    pbar = tqdm(total=total, desc="🔄 Processando (carteira)", disable=not progress)
+
+    for timestamp, group in merge_bar_streams(step_times):
+        # Estado no início do candle e decisões de todos os símbolos do timestamp em lote
+        states = [portfolio.state_for(symbols[k], start_index + pos) for k, pos in group]
+        segment = {key: np.array([markets[k][key][pos] for k, pos in group]) for key in keys}
+        state = {key: np.array([s[key] for s in states]) for key in states[0]}
+        decisions = run_decision_batch(segment, state, lot_limits, rules.reinvestment_rate)
+
+        guard_allows = rules.guard_allows_entry()
+        for j, (k, pos) in enumerate(group):
+            symbol, market = symbols[k], markets[k]
+            sim = portfolio.sims[symbol]
+            step = start_index + pos
+            price = market["close"][pos]
+            portfolio.last_price[symbol] = price
+
+            trades_before = len(sim.trade_log)
+            capital_before = portfolio.capital
+            sim.check_exit(step, price, market["open"][pos], market["high"][pos], market["low"][pos])
+            if len(sim.trade_log) != trades_before:
+                portfolio.on_trade_closed(symbol, capital_before)
+
+            final_decision = decisions["final_decision"][j]
+            decision_counter[final_decision] += 1
+            position_size = decisions["position_size"][j]
+            free_margin = portfolio.capital + portfolio.unrealized_pnl() - portfolio.used_margin
+            allow = guard_allows and rules.confidence_ok(market["confidence"][pos]) and \
+                free_margin >= portfolio.margin_required(position_size)
+
+            trades_before = len(sim.trade_log)
+            capital_before = portfolio.capital
+            sim.apply_decision(final_decision, price, step, position_size,
+                               decisions["stop_loss_pct"][j] * rules.stop_loss_mult,
+                               decisions["take_profit_pct"][j] * rules.take_profit_mult,
+                               allow_entry=allow)
+            if len(sim.trade_log) != trades_before:
+                portfolio.on_trade_closed(symbol, capital_before)
+
+        portfolio.log_equity(timestamp)
+        pbar.update(len(group))
+    pbar.close()
+
+    return portfolio, portfolio.trade_frame(times_by_symbol), decision_counter
+
+
+def run_portfolio_backtest(symbols=None, start_index=50, leverage=DEFAULT_LEVERAGE, data_path=None):
+    from backtest.run_backtest import plot_equity_curve
+
+    frames = load_portfolio_data(symbols, data_path)
+    print(f"🚀 Backtest de carteira: {list(frames)} (alavancagem 1:{leverage})...")
+    started = time.perf_counter()
+    portfolio, trades, decision_counter = simulate_portfolio(frames, start_index, leverage)
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    portfolio.equity.to_parquet(os.path.join(OUTPUT_DIR, "equity_curve.parquet"))
+    trades.to_parquet(os.path.join(OUTPUT_DIR, "trade_log.parquet"), index=False)
+    plot_equity_curve(portfolio.equity["equity"], filename=os.path.join(OUTPUT_DIR, "equity_curve.png"))
+
+    metrics = portfolio.metrics.snapshot()
+    print("\n📊 Métricas da carteira:")
+    print(f"Max Drawdown: {metrics['max_drawdown']:.2%}")
+    print(f"Sharpe Ratio: {metrics['sharpe']:.2f}")
+    print(f"Acurácia (Win Rate): {metrics['win_rate']:.2%}")
+    print(f"Profit Factor: {metrics['profit_factor']:.2f}")
+    print(f"💰 Capital final: {portfolio.capital:.2f}")
+    print(f"📈 Nº de trades: {len(trades)}")
+    print("📊 Trades por símbolo:")
+    for symbol, group in trades.groupby("symbol"):
+        print(f"  {symbol}: {len(group)} trades | PnL {group['pnl'].sum():.2f}")
+    print("📊 Distribuição de decisões do modelo:")
+    for k, v in decision_counter.items():
+        print(f"  {k}: {v}")
+    if portfolio.rules.risk_guard.is_blocked():
+        print(f"🚫 RiskGuard da carteira bloqueou novas entradas: {portfolio.rules.risk_guard.is_blocked()}")
+    print(f"⏱️ {time.perf_counter() - started:.1f}s")
+    print(f"💾 Resultados salvos em {OUTPUT_DIR}/")
+    return portfolio, trades
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest de carteira com capital compartilhado")
+    parser.add_argument("--symbols", nargs="+", default=None, help="Padrão: símbolos do settings.yaml presentes no parquet")
+    parser.add_argument("--start-index", type=int, default=50)
+    parser.add_argument("--leverage", type=float, default=DEFAULT_LEVERAGE)
+    args = parser.parse_args()
+    run_portfolio_backtest(args.symbols, args.start_index, args.leverage)
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+TRADE_DTYPE = np.dtype([
+    ("entry_price", "f8"),
+    ("exit_price", "f8"),
+    ("lotes", "f8"),
+    ("entry_time", "i8"),
+    ("exit_time", "i8"),
+    ("pnl", "f8"),
+    ("pnl_pips", "f8"),
+    ("order_type", "U4"),
+    ("reason", "U16"),
+])
+
+EQUITY_DTYPE = np.dtype([
+    ("time_step", "i8"),
+    ("equity", "f8"),   # capital realizado + PnL não realizado (mark-to-market)
+    ("balance", "f8"),  # apenas capital realizado
+])
+
+PORTFOLIO_EQUITY_DTYPE = np.dtype([
+    ("time", "datetime64[ns]"),
+    ("equity", "f8"),
+    ("balance", "f8"),
+    ("used_margin", "f8"),
+    ("open_positions", "i4"),
+])
+
+
+class RecordBuffer:
+    """
+    Array estruturado NumPy pré-alocado que cresce por duplicação.
+    Indexação e fatiamento devolvem registros/visões da parte preenchida,
+    então buffer[-1]["pnl"] e buffer["pnl"] funcionam sem conversão.
+    """
+
+    def __init__(self, dtype, capacity=1024):
+        self.dtype = np.dtype(dtype)
+        self._data = np.zeros(max(1, capacity), dtype=self.dtype)
+        self._size = 0
+
+    def _reserve(self, extra):
+        needed = self._size + extra
+        if needed > len(self._data):
+            capacity = len(self._data)
+            while capacity < needed:
+                capacity *= 2
+            grown = np.zeros(capacity, dtype=self.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+
+    def append(self, **fields):
+        self._reserve(1)
+        for name, value in fields.items():
+            self._data[name][self._size] = value
+        self._size += 1
+
+    def extend(self, **columns):
+        """Acrescenta vários registros de uma vez a partir de colunas (arrays ou escalares)"""
+        n = max(np.size(v) for v in columns.values())
+        self._reserve(n)
+        block = self._data[self._size:self._size + n]
+        for name, values in columns.items():
+            block[name] = values
+        self._size += n
+
+    @property
+    def array(self):
+        return self._data[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, key):
+        return self.array[key]
+
+    def __iter__(self):
+        return iter(self.array)
+
+    def to_frame(self):
+        return pd.DataFrame(self.array)
+
+    def to_parquet(self, path):
+        self.to_frame().to_parquet(path, index=False)
+
+    def __getstate__(self):
+        # Serializa só a parte preenchida
+        return {"dtype": self.dtype, "data": self.array.copy()}
+
+    def __setstate__(self, state):
+        self.dtype = state["dtype"]
+        self._data = state["data"] if len(state["data"]) else np.zeros(1, dtype=self.dtype)
+        self._size = len(state["data"])
@@ -3,113 +3,137 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import pandas as pd
-from core.logic import run_autonomous_decision
+from core.logic import run_autonomous_decision, predict_market_batch
 from backtest.trader_simulator import TraderSimulator
+from backtest.batch_engine import simulate_batched
+from backtest.params import TradingRules
+from core.risk_state import RiskStateTracker
+from backtest.checkpoint import Checkpointer, checkpoint_path, market_model_state, restore_market_model, \
+    CHECKPOINT_INTERVAL
+from backtest.cache import cached_simulate
+from core.metrics import periods_per_year, infer_timeframe
 from tqdm import tqdm
 from config.config import load_config
 from collections import defaultdict
 import matplotlib.pyplot as plt
 import numpy as np
+import argparse
+import time
 cfg = load_config()
 
-def run_backtest(start_index=50):
-    symbol = cfg["general"].get("symbols", ["EURUSD"])[0]
+PROGRESS_EVERY = 500  # barras entre atualizações das métricas na barra de progresso
+
+def load_symbol_data(symbol, data_path=None):
+    """Carrega o parquet de features e mantém apenas as barras do símbolo"""
+    data = pd.read_parquet(data_path or cfg["general"]["data_path"])
+    if "symbol" in data.columns:
+        data = data[data["symbol"] == symbol].reset_index(drop=True)
+    return data
+
+def run_backtest(start_index=50, batched=False, symbol=None, resume=False, checkpoint_interval=None, use_cache=True):
+    symbol = symbol or cfg["general"].get("symbols", ["EURUSD"])[0]
+    print(f"🚀 Iniciando backtest ({symbol})...")
+    started = time.perf_counter()
+    if checkpoint_interval is None:
+        checkpoint_interval = cfg.get("backtest", {}).get("checkpoint_interval", CHECKPOINT_INTERVAL)
+    # Mesmos dados, modelos, config e código de uma execução anterior: reaproveita o resultado salvo
+    sim, decision_counter, hit = cached_simulate(symbol, start_index, batched, use_cache=use_cache,
+                                                 checkpoint_interval=checkpoint_interval or None, resume=resume)
+    if hit:
+        print("♻️ Resultado encontrado no cache (backtest/cache); use --no-cache para recalcular")
+    report_backtest(sim, decision_counter, started)
+
+def simulate(data, symbol, start_index=50, batched=False, progress=True, params=None,
+             checkpoint_interval=None, resume=False, feature_log=None):
+    """
+    Simula um símbolo e retorna (simulador, contagem de decisões).
+    checkpoint_interval (segundos) ativa checkpoints em backtest/checkpoints; resume=True
+    continua do último checkpoint do símbolo com resultado idêntico a uma execução contínua.
+    feature_log (só no modo em lote) recebe as entradas dos modelos de cada decisão (ver simulate_batched).
+    """
     lot_size = cfg.get("mt5", {}).get("lot_size", 0.01)
-    sim = TraderSimulator(initial_capital=cfg["trading"]["initial_capital"], symbol=symbol, lot_size=lot_size)
-    data = pd.read_parquet(cfg["general"]["data_path"])
-    #print(data.head())
-    print("🚀 Iniciando backtest...")
-    
-    # Variáveis para tracking de performance
-    recent_trades = []  # Lista para calcular rolling_loss_ratio
-    max_capital = sim.capital
-    last_trade_time = start_index  # Para calcular time_since_last_trade
+    # Sharpe anualizado pelo timeframe real dos dados (não o do robô ao vivo)
+    timeframe = infer_timeframe(data["time"]) if "time" in data.columns else None
+    sim = TraderSimulator(initial_capital=cfg["trading"]["initial_capital"], symbol=symbol, lot_size=lot_size,
+                          timeframe=timeframe)
+
+    checkpoint = None
+    if checkpoint_interval is not None or resume:
+        meta = {"symbol": symbol, "start_index": start_index, "batched": batched, "n_rows": len(data),
+                "params": params, "exit_mode": sim.exit_mode}
+        checkpoint = Checkpointer(checkpoint_path(symbol, batched), meta, checkpoint_interval)
+
+    if batched:
+        decision_counter = simulate_batched(data, sim, start_index, progress=progress, params=params,
+                                            checkpoint=checkpoint, resume=resume, feature_log=feature_log)
+        if checkpoint is not None:
+            checkpoint.clear()
+        return sim, decision_counter
+
+    rules = TradingRules(params, sim.initial_capital)
+    # Estado de risco (drawdown, perdas recentes, tempos) atualizado pelo simulador a cada trade
+    sim.risk_state = RiskStateTracker(sim.capital, start_step=start_index)
     decision_counter = defaultdict(int)
+    first_index = start_index
+
+    saved = checkpoint.load() if checkpoint is not None and resume else None
+    if saved is not None:
+        sim, rules = saved["sim"], saved["rules"]
+        decision_counter.update(saved["decision_counter"])
+        first_index = saved["next_index"]
+        if not restore_market_model(saved["market_model"]):
+            # Wrapper sem get_state/set_state: reconstrói o histórico do modelo de mercado
+            print("⚠️ Modelo de mercado sem set_state: reprocessando o histórico até o checkpoint...")
+            predict_market_batch(data.iloc[start_index:first_index], default_symbol=symbol)
+        print(f"♻️ Retomando do checkpoint no índice {first_index}")
     
     # Envolve o loop com tqdm
-    for i in tqdm(range(start_index, len(data) - 1), desc="🔄 Processando"):
+    pbar = tqdm(range(first_index, len(data) - 1), total=len(data) - 1 - start_index, initial=first_index - start_index,
+                desc="🔄 Processando", disable=not progress)
+    for i in pbar:
         row = data.iloc[i]
-        next_row = data.iloc[i + 1]
-
         market = row.to_dict()
+        state = sim.risk_state.state(i)
 
-        # Calcula drawdown
-        current_drawdown = (max_capital - sim.capital) / max_capital if max_capital > 0 else 0
-        max_capital = max(max_capital, sim.capital)
-        
-        # Calcula rolling_loss_ratio (últimos 10 trades)
-        if len(recent_trades) >= 10:
-            recent_trades.pop(0)  # Remove o trade mais antigo
-        
-        # Adiciona resultado do último trade se existir
-        if sim.trade_log and len(sim.trade_log) > 0:
-            last_trade = sim.trade_log[-1]
-            if last_trade["pnl"] < 0:
-                recent_trades.append(0)  # Loss
-            else:
-                recent_trades.append(1)  # Win
-        
-        rolling_loss_ratio = (len([t for t in recent_trades if t == 0]) / len(recent_trades)) if recent_trades else 0
-        
-        # Calcula recent_losses (últimos 3 trades)
-        recent_losses = 0
-        if len(sim.trade_log) >= 3:
-            for trade in sim.trade_log[-3:]:
-                if trade["pnl"] < 0:
-                    recent_losses += 1
-
-        state = {
-            "capital": sim.capital,
-            "in_position": int(sim.position is not None),
-            "drawdown": current_drawdown,
-            "time_in_trade": (i - sim.position["entry_time"]) if sim.position else 0,
-            "recent_losses": recent_losses,
-            "profit_pct": 0.0,
-            "rolling_loss_ratio": rolling_loss_ratio,
-            "time_since_last_trade": i - last_trade_time
-        }
-
-        sim.check_stop_or_tp(row["close"], i)
+        trades_before = len(sim.trade_log)
+        capital_before = sim.capital
+        sim.check_exit(i, row["close"], row.get("open"), row.get("high"), row.get("low"))
 
         # Roda a decisão uma vez por passo
-        decision = run_autonomous_decision(market, state)
+        decision = run_autonomous_decision(market, state, reinvestment_rate=rules.reinvestment_rate)
         if decision["final_decision"] == "buy":
             print(f"🟢 BUY SIGNAL at index {i} | price: {row['close']} | confidence: {decision['confidence']:.2f}")
         elif decision["final_decision"] == "sell":
             print(f"🔴 SELL SIGNAL at index {i} | price: {row['close']} | confidence: {decision['confidence']:.2f}")
         decision_counter[decision["final_decision"]] += 1
         # Executa a ação com base na decisão e no estado atual
-        if sim.position:
-            if (decision["final_decision"] == "sell" and sim.position["order_type"] == "buy") or \
-               (decision["final_decision"] == "buy" and sim.position["order_type"] == "sell"):
-                sim.exit_position(row["close"], i, "model_exit")
-                last_trade_time = i  # Atualiza o tempo do último trade
-            elif decision["final_decision"] == "move_stop":
-                # Ajusta o stop_price com base no tipo de ordem
-                if sim.position["order_type"] == "buy":
-                    sim.position["stop_price"] = row["close"] * (1 - decision["stop_loss_pct"])
-                elif sim.position["order_type"] == "sell":
-                    sim.position["stop_price"] = row["close"] * (1 + decision["stop_loss_pct"])
-        else:  # Se não está em posição
-            if decision["final_decision"] == "buy":
-                sim.enter_position(row["close"], decision["position_size"],
-                                   decision["stop_loss_pct"], decision["take_profit_pct"], i, order_type="buy")
-                last_trade_time = i  # Atualiza o tempo do último trade
-            elif decision["final_decision"] == "sell":
-                sim.enter_position(row["close"], decision["position_size"],
-                                   decision["stop_loss_pct"], decision["take_profit_pct"], i, order_type="sell")
-                last_trade_time = i  # Atualiza o tempo do último trade
-
-        sim.log_equity()
+        sim.apply_decision(decision["final_decision"], row["close"], i, decision["position_size"],
+                           decision["stop_loss_pct"] * rules.stop_loss_mult,
+                           decision["take_profit_pct"] * rules.take_profit_mult,
+                           allow_entry=rules.allow_entry(decision["confidence"]))
+        if len(sim.trade_log) != trades_before:
+            rules.on_trade_closed(sim.trade_log[-1]["pnl"], capital_before)
+
+        sim.log_equity(row["close"], i)
+        if progress and i % PROGRESS_EVERY == 0:
+            pbar.set_postfix(sim.metrics.progress_summary(), refresh=False)
+
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save(i + 1, sim=sim, rules=rules, decision_counter=dict(decision_counter),
+                            market_model=market_model_state())
+
+    if checkpoint is not None:
+        checkpoint.clear()
+    return sim, decision_counter
+
+def report_backtest(sim, decision_counter, started=None):
+    elapsed = time.perf_counter() - started if started is not None else None
 
     # Resultados finais
-    df_equity = pd.DataFrame(sim.equity_curve, columns=["equity"])
-    df_trades = pd.DataFrame(sim.trade_log)
-    df_equity.to_csv("backtest/equity_curve.csv", index=False)
-    df_trades.to_csv("backtest/trade_log.csv", index=False)
+    sim.save_results("backtest")
 
-    # --- NOVAS MÉTRICAS ---
-    metrics = calculate_metrics(sim.equity_curve, sim.trade_log)
+    # --- NOVAS MÉTRICAS --- (acumuladas durante a simulação)
+    metrics = sim.metrics.snapshot()
     print("\n📊 Métricas do Backtest:")
     print(f"Max Drawdown: {metrics['max_drawdown']:.2%}")
     print(f"Sharpe Ratio: {metrics['sharpe']:.2f}")
@@ -127,20 +151,26 @@ def run_backtest(start_index=50):
     print("📊 Distribuição de decisões do modelo:")
     for k, v in decision_counter.items():
         print(f"  {k}: {v}")
+    if elapsed is not None:
+        n_bars = len(sim.equity_curve)
+        print(f"⏱️ {n_bars} barras em {elapsed:.2f}s ({n_bars / max(elapsed, 1e-9):.0f} barras/s)")
 
-def calculate_metrics(equity_curve, trade_log):
-    equity = np.array(equity_curve)
+def calculate_metrics(equity_curve, trade_log, timeframe="D1"):
+    """Métricas a partir do histórico completo. Para acompanhamento contínuo use core.metrics.StreamingMetrics"""
+    equity = np.asarray(equity_curve, dtype=np.float64)
     returns = np.diff(equity) / equity[:-1]
     # Drawdown
     running_max = np.maximum.accumulate(equity)
     drawdown = (equity - running_max) / running_max
     max_drawdown = drawdown.min()
     # Sharpe Ratio (risk-free = 0)
-    sharpe = np.mean(returns) / (np.std(returns) + 1e-8) * np.sqrt(252)
+    sharpe = np.mean(returns) / (np.std(returns) + 1e-8) * np.sqrt(periods_per_year(timeframe))
     # Trade stats
     trades = trade_log
     if len(trades) > 0:
-        pnl = np.array([t["pnl"] for t in trades])
+        # Aceita arrays estruturados / DataFrames (coluna "pnl") ou listas de dicts
+        pnl = np.asarray(trades["pnl"], dtype=np.float64) if hasattr(trades, "dtype") or hasattr(trades, "columns") \
+            else np.array([t["pnl"] for t in trades])
         wins = pnl > 0
         losses = pnl < 0
         win_rate = wins.sum() / len(pnl)
@@ -181,4 +211,14 @@ def plot_equity_curve(equity_curve, filename="backtest/equity_curve.png"):
     plt.close()
 
 if __name__ == "__main__":
-    run_backtest()
+    parser = argparse.ArgumentParser(description="Backtest do robô de trading")
+    parser.add_argument("--start-index", type=int, default=50)
+    parser.add_argument("--batch", action="store_true", help="Pré-computa as decisões dos modelos em lote")
+    parser.add_argument("--symbol", default=None, help="Símbolo a simular (padrão: primeiro de general.symbols)")
+    parser.add_argument("--resume", action="store_true", help="Continua do último checkpoint do símbolo")
+    parser.add_argument("--checkpoint-interval", type=float, default=None,
+                        help="Segundos entre checkpoints (0 desativa; padrão: backtest.checkpoint_interval)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignora o cache de resultados e recalcula")
+    args = parser.parse_args()
+    run_backtest(start_index=args.start_index, batched=args.batch, symbol=args.symbol,
+                 resume=args.resume, checkpoint_interval=args.checkpoint_interval, use_cache=not args.no_cache)
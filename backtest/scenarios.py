@@ -0,0 +1,250 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import csv
+import time
+import numpy as np
+import pandas as pd
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from config.config import load_config
+from core.signals import add_indicators
+
+cfg = load_config()
+
+RAW_COLUMNS = ["time", "open", "high", "low", "close", "tick_volume", "spread", "real_volume", "symbol"]
+PRICE_COLUMNS = ("open", "high", "low", "close")
+RESULTS_PATH = "backtest/scenarios.csv"
+
+
+# --- Transformações vetorizadas sobre os arrays OHLCV ---
+# Cada uma recebe o dict de arrays (já copiados) e seus parâmetros.
+# Posições ('at', 'start') em [0, 1) são frações do período; inteiros são índices de candle.
+
+def _position(at, n):
+    return int(at * n) if isinstance(at, float) and 0 <= at < 1 else min(int(at), n - 1)
+
+
+def _fix_wicks(bars, start=0, end=None):
+    """Garante high >= max(open, close) e low <= min(open, close) depois das transformações"""
+    s = slice(start, end)
+    bars["high"][s] = np.maximum(bars["high"][s], np.maximum(bars["open"][s], bars["close"][s]))
+    bars["low"][s] = np.minimum(bars["low"][s], np.minimum(bars["open"][s], bars["close"][s]))
+
+
+def apply_gap(bars, at=0.5, size=-0.02):
+    """Gap na abertura do candle 'at': todos os preços a partir dele deslocados em 'size' (relativo)"""
+    i = _position(at, len(bars["close"]))
+    for col in PRICE_COLUMNS:
+        bars[col][i:] *= 1 + size
+    return bars
+
+
+def apply_spread_blowup(bars, start=0.5, length=50, factor=10.0):
+    """Spread multiplicado por 'factor' durante 'length' candles"""
+    i = _position(start, len(bars["close"]))
+    bars["spread"][i:i + length] = np.ceil(bars["spread"][i:i + length] * factor)
+    return bars
+
+
+def apply_volatility_regime(bars, start=0.5, length=500, factor=3.0):
+    """Retornos e pavios multiplicados por 'factor' em [start, start + length); preços seguintes acompanham"""
+    n = len(bars["close"])
+    i = _position(start, n)
+    j = min(n, i + length)
+    close = bars["close"]
+    returns = np.diff(np.log(close))
+    returns[max(i - 1, 0):j - 1] *= factor
+    new_close = close[0] * np.exp(np.concatenate([[0.0], np.cumsum(returns)]))
+    scale = np.ones(n)
+    scale[i:j] = factor
+    for col in ("open", "high", "low"):
+        # Distância relativa ao fechamento, ampliada dentro do regime
+        bars[col] = new_close * (1 + (bars[col] / close - 1) * scale)
+    bars["close"] = new_close
+    _fix_wicks(bars, i, j)
+    return bars
+
+
+def apply_flash_crash(bars, at=0.5, depth=0.05, recovery=20):
+    """Queda de 'depth' no candle 'at' com recuperação linear em 'recovery' candles"""
+    n = len(bars["close"])
+    i = _position(at, n)
+    j = min(n, i + recovery)
+    multiplier = np.ones(n)
+    multiplier[i:j] = 1 - depth * (1 - np.arange(j - i) / max(recovery, 1))
+    for col in PRICE_COLUMNS:
+        bars[col] *= multiplier
+    # O pavio do candle do crash vai além do fechamento
+    bars["low"][i] *= 1 - depth / 2
+    _fix_wicks(bars, i, j)
+    return bars
+
+
+TRANSFORMS = {
+    "gap": apply_gap,
+    "spread": apply_spread_blowup,
+    "volatility": apply_volatility_regime,
+    "flash_crash": apply_flash_crash,
+}
+
+
+def recompute_features(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Recalcula as features do parquet processado a partir do OHLCV.
+    Usa o mesmo pipeline do pré-processamento (biblioteca ta) quando instalado;
+    senão core.signals.add_indicators mais as colunas derivadas.
+    """
+    try:
+        from data.utils.preprocess_mt5_data import add_indicators as preprocess_indicators
+    except ImportError:
+        preprocess_indicators = None
+    if preprocess_indicators is not None:
+        return preprocess_indicators(frame.copy())
+
+    df = add_indicators(frame)
+    direction = np.sign(df["close"].diff()).fillna(0)
+    df["obv"] = (direction * df["tick_volume"]).cumsum().astype(np.int64)
+    df["volume_sma_20"] = df["tick_volume"].rolling(20).mean()
+    df["volatility_stop"] = df["close"] - 2 * df["atr"]
+    df["volatility_score"] = df["atr"] / df["close"]
+    df["spread_pct"] = df["spread"] / df["close"]
+    return df.dropna().reset_index(drop=True)
+
+
+def build_scenario(base: pd.DataFrame, spec):
+    """Aplica as transformações de 'spec' a uma cópia do OHLCV base e recalcula as features"""
+    bars = {col: base[col].to_numpy(dtype=np.float64).copy() for col in (*PRICE_COLUMNS, "spread")}
+    for transform in spec.get("transforms", []):
+        params = {k: v for k, v in transform.items() if k != "type"}
+        bars = TRANSFORMS[transform["type"]](bars, **params)
+    frame = base.copy()
+    for col, values in bars.items():
+        frame[col] = values.astype(frame[col].dtype) if col == "spread" else values
+    return recompute_features(frame)
+
+
+def generate_scenarios(base: pd.DataFrame, specs):
+    """Gerador (spec, DataFrame): cada variante é criada só quando consumida"""
+    for spec in specs:
+        yield spec, build_scenario(base, spec)
+
+
+def random_specs(n, seed=42):
+    """n cenários aleatórios combinando 1 a 3 choques, mais o cenário base sem alterações"""
+    rng = np.random.default_rng(seed)
+    specs = [{"name": "baseline", "transforms": []}]
+    for k in range(n):
+        transforms = []
+        for kind in rng.choice(list(TRANSFORMS), size=rng.integers(1, 4), replace=False):
+            kind = str(kind)
+            at = round(float(rng.uniform(0.1, 0.9)), 3)
+            if kind == "gap":
+                transforms.append({"type": kind, "at": at, "size": round(float(rng.choice([-1, 1]) * rng.uniform(0.005, 0.03)), 4)})
+            elif kind == "spread":
+                transforms.append({"type": kind, "start": at, "length": int(rng.integers(10, 200)),
+                                   "factor": round(float(rng.uniform(3, 30)), 1)})
+            elif kind == "volatility":
+                transforms.append({"type": kind, "start": at, "length": int(rng.integers(100, 1000)),
+                                   "factor": round(float(rng.uniform(1.5, 4)), 2)})
+            else:
+                transforms.append({"type": kind, "at": at, "depth": round(float(rng.uniform(0.01, 0.08)), 4),
+                                   "recovery": int(rng.integers(5, 60))})
+        specs.append({"name": f"random_{k:04d}", "transforms": transforms})
+    return specs
+
+
+def load_specs(path):
+    with open(path, "r") as f:
+        specs = yaml.safe_load(f)
+    return specs["scenarios"] if isinstance(specs, dict) else specs
+
+
+# --- Execução ---
+
+_base = None
+_fresh_model_state = None
+
+
+def _init_worker(symbol, data_path):
+    """Carrega o OHLCV base e guarda o estado inicial do modelo de mercado uma vez por processo"""
+    global _base, _fresh_model_state
+    from backtest.run_backtest import load_symbol_data
+    from backtest.checkpoint import market_model_state
+
+    data = load_symbol_data(symbol, data_path)
+    _base = data[[c for c in RAW_COLUMNS if c in data.columns]].copy()
+    _fresh_model_state = market_model_state()
+
+
+def _run_scenario(spec, symbol, start_index):
+    from backtest.run_backtest import simulate
+    from backtest.checkpoint import restore_market_model
+
+    started = time.perf_counter()
+    data = build_scenario(_base, spec)
+    # Cada cenário começa com o histórico do modelo de mercado vazio, independente da ordem
+    restore_market_model(_fresh_model_state)
+    sim, _ = simulate(data, symbol, start_index, batched=True, progress=False)
+    metrics = sim.metrics.snapshot()
+    return {
+        "scenario": spec.get("name", ""),
+        "transforms": ";".join(t["type"] for t in spec.get("transforms", [])) or "none",
+        **metrics,
+        "final_capital": sim.capital,
+        "elapsed_s": time.perf_counter() - started,
+    }
+
+
+def run_scenarios(specs, symbol=None, start_index=50, max_workers=1, data_path=None):
+    """
+    Gerador: roda o backtest em lote de cada cenário e devolve uma linha de métricas por cenário,
+    na ordem de 'specs'. Nenhuma variante é gravada em disco.
+    """
+    symbol = symbol or cfg["general"].get("symbols", ["EURUSD"])[0]
+    if max_workers == 1:
+        _init_worker(symbol, data_path)
+        for spec in specs:
+            yield _run_scenario(spec, symbol, start_index)
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(symbol, data_path)) as pool:
+        futures = [pool.submit(_run_scenario, spec, symbol, start_index) for spec in specs]
+        for future in futures:
+            yield future.result()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backtest sob cenários de estresse (gaps, spread, volatilidade, crashes)")
+    parser.add_argument("--specs", default=None, help="YAML com a lista de cenários {name, transforms: [{type, ...}]}")
+    parser.add_argument("--random", type=int, default=100, help="Nº de cenários aleatórios se --specs não for informado")
+    parser.add_argument("--symbol", default=None)
+    parser.add_argument("--start-index", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+
+    specs = load_specs(args.specs) if args.specs else random_specs(args.random, args.seed)
+    print(f"🌪️ {len(specs)} cenários de estresse...")
+    started = time.perf_counter()
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", newline="") as f:
+        writer = None
+        for k, row in enumerate(run_scenarios(specs, args.symbol, args.start_index, args.workers), 1):
+            if writer is None:
+                writer = csv.DictWriter(f, fieldnames=list(row))
+                writer.writeheader()
+            writer.writerow(row)
+            f.flush()
+            print(f"   [{k}/{len(specs)}] {row['scenario']} ({row['transforms']}): "
+                  f"capital {row['final_capital']:.2f} | DD {row['max_drawdown']:.2%} | sharpe {row['sharpe']:.2f}")
+
+    results = pd.read_csv(args.output)
+    print("\n📊 Piores cenários por drawdown:")
+    print(results.sort_values("max_drawdown").head(10)[["scenario", "transforms", "max_drawdown", "sharpe", "final_capital"]]
+          .to_string(index=False))
+    print(f"\n⏱️ {len(specs)} cenários em {time.perf_counter() - started:.1f}s")
+    print(f"💾 Resultados salvos em {args.output}")
@@ -0,0 +1,142 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import itertools
+import json
+import time
+import numpy as np
+import pandas as pd
+import yaml
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+from config.config import load_config
+
+cfg = load_config()
+
+RESULTS_PATH = "backtest/sweep_results.csv"
+# Colunas numéricas copiadas para a memória compartilhada (as demais não são usadas pelo backtest)
+SHARED_COLUMNS = [
+    "open", "high", "low", "close", "spread", "spread_pct", "atr",
+    "ema_20", "ema_50", "signal", "confidence"
+]
+
+# Estado do worker: visão da memória compartilhada e arrays de mercado prontos
+_shm = None
+_frame = None
+_market = None
+
+
+def expand_grid(grid: dict):
+    """Produto cartesiano do grid {parâmetro: [valores]} em uma lista de dicts"""
+    keys = list(grid)
+    values = [v if isinstance(v, (list, tuple)) else [v] for v in grid.values()]
+    return [dict(zip(keys, combo)) for combo in itertools.product(*values)]
+
+
+def load_grid(path=None):
+    """Lê o grid de um YAML/JSON ou usa a seção sweep.grid da configuração"""
+    if path is None:
+        grid = cfg.get("sweep", {}).get("grid")
+        if not grid:
+            raise ValueError("Nenhum grid informado e sweep.grid não definido em settings.yaml")
+        return grid
+    with open(path, "r") as f:
+        return json.load(f) if path.endswith(".json") else yaml.safe_load(f)
+
+
+def _share_market_data(data: pd.DataFrame, start_index):
+    """Copia as colunas numéricas para um bloco de memória compartilhada (float64, colunas contíguas)"""
+    from core.logic import predict_market_batch
+
+    data = data.iloc[start_index:len(data) - 1].reset_index(drop=True)
+    # O sinal do modelo de mercado não depende dos parâmetros: calcula uma vez só
+    signals, confidences = predict_market_batch(data)
+    data = data.assign(signal=signals, confidence=confidences)
+
+    columns = [c for c in SHARED_COLUMNS if c in data.columns]
+    shape = (len(columns), len(data))
+    shm = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * 8))
+    block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+    for k, col in enumerate(columns):
+        block[k] = data[col].to_numpy(dtype=np.float64)
+    return shm, columns, shape
+
+
+def _init_worker(shm_name, columns, shape, symbol):
+    """Anexa a memória compartilhada e monta os arrays de mercado uma vez por worker"""
+    global _shm, _frame, _market
+    from core.logic import prepare_market_batch
+
+    # Os workers compartilham o resource tracker do processo pai, que remove o segmento no final
+    _shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=_shm.buf)
+    block.flags.writeable = False
+    _frame = pd.DataFrame({col: block[k] for k, col in enumerate(columns)})
+    _frame["symbol"] = symbol
+    _market = prepare_market_batch(_frame, _frame["signal"].to_numpy(), _frame["confidence"].to_numpy())
+
+
+def _run_combination(params, symbol, start_index, timeframe=None):
+    from backtest.trader_simulator import TraderSimulator
+    from backtest.batch_engine import simulate_batched
+
+    sim = TraderSimulator(initial_capital=cfg["trading"]["initial_capital"], symbol=symbol,
+                          lot_size=cfg.get("mt5", {}).get("lot_size", 0.01), timeframe=timeframe)
+    # O bloco compartilhado já começa em start_index: o simulador lê apenas os arrays de _market
+    simulate_batched(None, sim, start_index=start_index, progress=False, params=params, market=_market)
+    metrics = sim.metrics.snapshot() if len(sim.equity_curve) else {}
+    return {**params, **metrics, "final_capital": sim.capital, "n_trades": len(sim.trade_log)}
+
+
+def run_sweep(grid, symbol=None, start_index=50, max_workers=None, output=RESULTS_PATH, rank_by="sharpe"):
+    """Roda todas as combinações do grid sobre os mesmos dados compartilhados e grava a tabela ranqueada"""
+    from backtest.run_backtest import load_symbol_data
+    from core.metrics import infer_timeframe
+
+    symbol = symbol or cfg["general"].get("symbols", ["EURUSD"])[0]
+    combinations = expand_grid(grid)
+    print(f"🧪 Varredura: {len(combinations)} combinações para {symbol}")
+    started = time.perf_counter()
+
+    data = load_symbol_data(symbol)
+    timeframe = infer_timeframe(data["time"]) if "time" in data.columns else None
+    shm, columns, shape = _share_market_data(data, start_index)
+    rows = []
+    try:
+        max_workers = max_workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(shm.name, columns, shape, symbol)) as pool:
+            futures = [pool.submit(_run_combination, params, symbol, start_index, timeframe) for params in combinations]
+            for done, future in enumerate(as_completed(futures), 1):
+                rows.append(future.result())
+                if done % max(1, len(futures) // 20) == 0 or done == len(futures):
+                    print(f"   {done}/{len(futures)} combinações concluídas")
+    finally:
+        shm.close()
+        shm.unlink()
+
+    results = pd.DataFrame(rows).sort_values(rank_by, ascending=False).reset_index(drop=True)
+    results.insert(0, "rank", range(1, len(results) + 1))
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    results.to_csv(output, index=False)
+
+    print(f"\n🏆 Top 10 por {rank_by}:")
+    cols = ["rank", *grid.keys(), "sharpe", "max_drawdown", "profit_factor", "n_trades"]
+    print(results[[c for c in cols if c in results.columns]].head(10).to_string(index=False))
+    print(f"\n⏱️ {len(combinations)} combinações em {time.perf_counter() - started:.1f}s")
+    print(f"💾 Resultados salvos em {output}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Varredura de parâmetros do backtest")
+    parser.add_argument("--grid", default=None, help="Arquivo YAML/JSON {parâmetro: [valores]} (padrão: sweep.grid)")
+    parser.add_argument("--symbol", default=None)
+    parser.add_argument("--start-index", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--rank-by", default="sharpe")
+    parser.add_argument("--output", default=RESULTS_PATH)
+    args = parser.parse_args()
+    run_sweep(load_grid(args.grid), args.symbol, args.start_index, args.workers, args.output, args.rank_by)
@@ -1,5 +1,10 @@
-import pandas as pd
+import os
+import numpy as np
 from config.config import load_config
+from backtest.exit_engine import exit_fill
+from backtest.records import RecordBuffer, TRADE_DTYPE, EQUITY_DTYPE
+from core.metrics import StreamingMetrics
+from core.risk_state import RiskStateTracker
 
 def get_pip_value(symbol, lot_size):
     # Para pares padrão (ex: EURUSD), 1 pip = 0.0001, 1 lote = 100.000 unidades, pip value = $10 por lote
@@ -14,17 +19,24 @@ def get_pip_value(symbol, lot_size):
     return pip_size, pip_value_per_lot * lot_size
 
 class TraderSimulator:
-    def __init__(self, initial_capital=10000, symbol="EURUSD", lot_size=None):
+    def __init__(self, initial_capital=10000, symbol="EURUSD", lot_size=None, exit_mode=None, timeframe=None):
         self.initial_capital = initial_capital
         self.capital = initial_capital
         self.balance = initial_capital
         self.position = None
-        self.equity_curve = []
-        self.trade_log = []
+        # Históricos em arrays estruturados: trade_log[-1]["pnl"], trade_log["pnl"], equity["equity"]...
+        self.equity = RecordBuffer(EQUITY_DTYPE, capacity=4096)
+        self.trade_log = RecordBuffer(TRADE_DTYPE, capacity=256)
         self.symbol = symbol
         cfg = load_config()
         self.lot_size = lot_size if lot_size is not None else cfg.get("mt5", {}).get("lot_size", 0.01)
         self.pip_size, self.pip_value = get_pip_value(self.symbol, self.lot_size)
+        # "close": stop/take profit avaliados no fechamento; "ohlc": toques intrabar pela máxima/mínima
+        self.exit_mode = exit_mode or cfg.get("backtest", {}).get("exit_mode", "close")
+        # Métricas incrementais (timeframe em 'M15', 'H1'... ou duração do candle em segundos)
+        self.metrics = StreamingMetrics(timeframe or cfg["general"].get("timeframe", "D1"))
+        # Features de risco para os modelos (mesmo rastreador do robô ao vivo)
+        self.risk_state = RiskStateTracker(initial_capital)
 
     def enter_position(self, price, lotes, stop_loss_pct, take_profit_pct, time_step, order_type="buy"):
         # lotes: quantidade de lotes a ser operada (ex: 0.01 a 0.1)
@@ -38,6 +50,20 @@ class TraderSimulator:
             "stop_loss_pct": stop_loss_pct,
             "take_profit_pct": take_profit_pct
         }
+        self.risk_state.on_trade_opened(time_step)
+
+    @property
+    def equity_curve(self):
+        """Equity mark-to-market por passo (visão float64, sem cópia)"""
+        return self.equity["equity"]
+
+    def unrealized_pnl(self, price):
+        """PnL em USD da posição aberta se fechada a 'price' (aceita arrays)"""
+        if not self.position:
+            return np.zeros_like(price, dtype=np.float64) if np.ndim(price) else 0.0
+        direction = 1 if self.position["order_type"] == "buy" else -1
+        pnl_pips = direction * (price - self.position["entry_price"]) / self.pip_size
+        return pnl_pips * self.pip_value * self.position["lotes"]
 
     def exit_position(self, price, time_step, reason=None):
         entry = self.position
@@ -56,26 +82,45 @@ class TraderSimulator:
         self.capital += pnl
         self.capital = min(self.capital, 1e7)
 
-        self.trade_log.append({
-            "entry_price": round(entry["entry_price"], 5),
-            "exit_price": round(price, 5),
-            "lotes": round(lotes, 2),
-            "entry_time": entry["entry_time"],
-            "exit_time": time_step,
-            "pnl": round(pnl, 5),
-            "pnl_pips": round(pnl_pips, 5),
-            "reason": reason
-        })
+        self.trade_log.append(
+            entry_price=round(entry["entry_price"], 5),
+            exit_price=round(price, 5),
+            lotes=round(lotes, 2),
+            entry_time=entry["entry_time"],
+            exit_time=time_step,
+            pnl=round(pnl, 5),
+            pnl_pips=round(pnl_pips, 5),
+            order_type=entry["order_type"],
+            reason=reason or ""
+        )
+        self.metrics.update_trade(pnl)
+        self.risk_state.on_trade_closed(pnl, time_step, self.capital)
 
         self.position = None
 
-    def log_equity(self):
-        equity = min(self.capital, 1e7)
-        self.equity_curve.append(equity)
+    def log_equity(self, price=None, time_step=None):
+        """Registra o passo: equity = capital realizado + PnL não realizado ao preço 'price'"""
+        balance = min(self.capital, 1e7)
+        unrealized = self.unrealized_pnl(price) if price is not None else 0.0
+        self.equity.append(
+            time_step=len(self.equity) if time_step is None else time_step,
+            equity=balance + unrealized,
+            balance=balance
+        )
+        self.metrics.update_equity(balance + unrealized)
+
+    def log_equity_block(self, time_steps, prices):
+        """Registra vários passos sem mudança de capital de uma vez (saltos do modo em lote)"""
+        balance = min(self.capital, 1e7)
+        equity = balance + self.unrealized_pnl(np.asarray(prices, dtype=np.float64))
+        self.equity.extend(time_step=time_steps, equity=equity, balance=balance)
+        self.metrics.update_equity_block(equity)
 
-    def save_results(self):
-        pd.DataFrame(self.equity_curve, columns=["equity"]).to_csv("equity_curve.csv", index=False)
-        pd.DataFrame(self.trade_log).to_csv("trade_log.csv", index=False)
+    def save_results(self, output_dir="backtest"):
+        """Exporta curva de capital e trades direto para parquet"""
+        os.makedirs(output_dir, exist_ok=True)
+        self.equity.to_parquet(os.path.join(output_dir, "equity_curve.parquet"))
+        self.trade_log.to_parquet(os.path.join(output_dir, "trade_log.parquet"))
 
     def check_stop_or_tp(self, price, time_step):
         if self.position:
@@ -88,4 +133,38 @@ class TraderSimulator:
                 if price >= self.position["stop_price"]:
                     self.exit_position(self.position["stop_price"], time_step, reason="stop_loss")
                 elif price <= self.position["take_profit_price"]:
-                    self.exit_position(self.position["take_profit_price"], time_step, reason="take_profit")
\ No newline at end of file
+                    self.exit_position(self.position["take_profit_price"], time_step, reason="take_profit")
+
+    def apply_decision(self, final_decision, price, time_step, position_size=None, stop_loss_pct=None, take_profit_pct=None,
+                       allow_entry=True):
+        """Executa a decisão do modelo sobre a posição atual. Retorna True se abriu ou fechou um trade."""
+        if self.position:
+            if (final_decision == "sell" and self.position["order_type"] == "buy") or \
+               (final_decision == "buy" and self.position["order_type"] == "sell"):
+                self.exit_position(price, time_step, "model_exit")
+                return True
+            elif final_decision == "move_stop":
+                # Ajusta o stop_price com base no tipo de ordem
+                if self.position["order_type"] == "buy":
+                    self.position["stop_price"] = price * (1 - stop_loss_pct)
+                elif self.position["order_type"] == "sell":
+                    self.position["stop_price"] = price * (1 + stop_loss_pct)
+        elif allow_entry and final_decision in ("buy", "sell"):  # Se não está em posição
+            self.enter_position(price, position_size, stop_loss_pct, take_profit_pct, time_step, order_type=final_decision)
+            return True
+        return False
+
+    def check_stop_or_tp_ohlc(self, bar_open, high, low, time_step):
+        """Verifica toques intrabar do stop/take profit usando máxima e mínima do candle"""
+        if self.position:
+            hit = exit_fill(self.position["order_type"], self.position["stop_price"],
+                            self.position["take_profit_price"], bar_open, high, low)
+            if hit:
+                self.exit_position(hit[0], time_step, reason=hit[1])
+
+    def check_exit(self, time_step, close, bar_open=None, high=None, low=None):
+        """Aplica a verificação de saída conforme o exit_mode configurado"""
+        if self.exit_mode == "ohlc" and high is not None and low is not None:
+            self.check_stop_or_tp_ohlc(close if bar_open is None else bar_open, high, low, time_step)
+        else:
+            self.check_stop_or_tp(close, time_step)
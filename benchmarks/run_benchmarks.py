@@ -0,0 +1,340 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from benchmarks.synthetic import make_ohlcv, make_features
+
+RESULTS_DIR = "benchmarks/results"
+BASELINE_PATH = "benchmarks/baseline.json"
+# Queda de throughput acima disso em relação à baseline é tratada como regressão
+REGRESSION_TOLERANCE = 0.10
+
+
+class SkipStage(Exception):
+    """Estágio sem as dependências necessárias neste ambiente"""
+
+
+@contextlib.contextmanager
+def quiet():
+    """Descarta os prints das funções medidas (o custo de formatar continua sendo medido)"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _percentiles(latencies):
+    latencies = np.asarray(latencies, dtype=np.float64) * 1000
+    return {
+        "p50": float(np.percentile(latencies, 50)),
+        "p90": float(np.percentile(latencies, 90)),
+        "p99": float(np.percentile(latencies, 99)),
+        "max": float(latencies.max()),
+    }
+
+
+def measure(run, n_items, unit, repeat=3):
+    """
+    Executa 'run' uma vez sob tracemalloc (pico de memória, também serve de aquecimento)
+    e depois 'repeat' vezes cronometradas. 'run' pode retornar a lista de latências por item
+    (segundos); senão as latências são os tempos de cada execução inteira.
+    """
+    tracemalloc.start()
+    run()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    totals, latencies = [], []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        per_item = run()
+        totals.append(time.perf_counter() - started)
+        if isinstance(per_item, list):
+            latencies.extend(per_item)
+    seconds = float(np.median(totals))
+    return {
+        "status": "ok",
+        "unit": unit,
+        "items": n_items,
+        "seconds": seconds,
+        "throughput": n_items / max(seconds, 1e-12),
+        "latency_ms": _percentiles(latencies or totals),
+        "peak_memory_mb": peak / 2 ** 20,
+    }
+
+
+def _import_logic():
+    try:
+        with quiet():
+            import core.logic as logic
+            logic.models.preload(background=False)
+    except Exception as e:  # modelos, TensorFlow ou MetaTrader5 ausentes
+        raise SkipStage(f"core.logic indisponível: {type(e).__name__}: {e}")
+    return logic
+
+
+def _initial_state(capital=10000):
+    return {"capital": capital, "in_position": 0, "drawdown": 0.0, "time_in_trade": 0, "recent_losses": 0,
+            "profit_pct": 0.0, "rolling_loss_ratio": 0.0, "time_since_last_trade": 0}
+
+
+# --- Estágios ---
+
+def bench_signals_indicators(ctx):
+    from core.signals import add_indicators
+    return measure(lambda: add_indicators(ctx["ohlcv"]), len(ctx["ohlcv"]), "bars", ctx["repeat"])
+
+
+def bench_streaming_indicators(ctx):
+    from core.streaming_indicators import StreamingIndicators
+    candles = ctx["ohlcv"].to_dict("records")
+
+    def run():
+        engine = StreamingIndicators()
+        for candle in candles:
+            engine.update(candle)
+
+    return measure(run, len(candles), "bars", ctx["repeat"])
+
+
+def bench_preprocess_indicators(ctx):
+    try:
+        from data.utils.preprocess_mt5_data import add_indicators
+    except ImportError as e:
+        raise SkipStage(str(e))
+    # A função altera o DataFrame recebido: cada execução usa uma cópia
+    return measure(lambda: add_indicators(ctx["ohlcv"].copy()), len(ctx["ohlcv"]), "bars", ctx["repeat"])
+
+
+def bench_simulator_step(ctx):
+    from backtest.trader_simulator import TraderSimulator
+
+    features = ctx["features"]
+    close = features["close"].to_numpy()
+    bar_open, high, low = features["open"].to_numpy(), features["high"].to_numpy(), features["low"].to_numpy()
+    rng = np.random.default_rng(0)
+    decisions = rng.choice(["buy", "sell", "hold", "no_action", "move_stop"], len(close), p=[0.05, 0.05, 0.4, 0.4, 0.1])
+
+    def run():
+        sim = TraderSimulator(initial_capital=10000, symbol="EURUSD", lot_size=0.01)
+        latencies = []
+        for i in range(len(close)):
+            started = time.perf_counter()
+            sim.check_exit(i, close[i], bar_open[i], high[i], low[i])
+            sim.apply_decision(decisions[i], close[i], i, 0.01, 0.002, 0.004)
+            sim.log_equity(close[i], i)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    return measure(run, len(close), "bars", ctx["repeat"])
+
+
+def bench_autonomous_decision(ctx):
+    logic = _import_logic()
+    rows = ctx["features"].iloc[:ctx["decisions"]].to_dict("records")
+    state = _initial_state()
+
+    def run():
+        latencies = []
+        with quiet():
+            for market in rows:
+                started = time.perf_counter()
+                logic.run_autonomous_decision(market, state)
+                latencies.append(time.perf_counter() - started)
+        return latencies
+
+    return measure(run, len(rows), "decisions", ctx["repeat"])
+
+
+def bench_decision_batch(ctx, block=256):
+    logic = _import_logic()
+    with quiet():
+        market = logic.prepare_market_batch(ctx["features"])
+    n = len(market["close"])
+    state = _initial_state()
+
+    def run():
+        latencies = []
+        lot_limits = {}
+        for start in range(0, n, block):
+            segment = {key: values[start:start + block] for key, values in market.items()}
+            started = time.perf_counter()
+            logic.run_decision_batch(segment, state, lot_limits)
+            latencies.append(time.perf_counter() - started)
+        return latencies
+
+    return measure(run, n, "decisions", ctx["repeat"])
+
+
+def _bench_backtest(ctx, batched):
+    _import_logic()
+    from backtest.run_backtest import simulate
+
+    data = ctx["features"] if batched else ctx["features"].iloc[:ctx["decisions"] + 51].reset_index(drop=True)
+
+    def run():
+        with quiet():
+            simulate(data, "EURUSD", start_index=50, batched=batched, progress=False)
+
+    return measure(run, len(data) - 51, "bars", ctx["repeat"])
+
+
+def bench_backtest_scalar(ctx):
+    return _bench_backtest(ctx, batched=False)
+
+
+def bench_backtest_batched(ctx):
+    return _bench_backtest(ctx, batched=True)
+
+
+def bench_risk_dataset(ctx):
+    try:
+        from models.risk_management.risk_dataset import generate_risk_dataset_from_market_data
+    except ImportError as e:
+        raise SkipStage(str(e))
+
+    def run():
+        with quiet():
+            generate_risk_dataset_from_market_data(ctx["parquet_path"])
+
+    return measure(run, len(ctx["features"]), "rows", ctx["repeat"])
+
+
+def bench_exec_dataset(ctx):
+    try:
+        from models.strategy_execution.exec_dataset import generate_exec_dataset_from_market
+    except ImportError as e:
+        raise SkipStage(str(e))
+
+    def run():
+        with quiet():
+            generate_exec_dataset_from_market(ctx["parquet_path"])
+
+    return measure(run, len(ctx["features"]), "rows", ctx["repeat"])
+
+
+STAGES = {
+    "signals.add_indicators": bench_signals_indicators,
+    "preprocess.add_indicators": bench_preprocess_indicators,
+    "signals.streaming": bench_streaming_indicators,
+    "simulator.step": bench_simulator_step,
+    "logic.run_autonomous_decision": bench_autonomous_decision,
+    "logic.run_decision_batch": bench_decision_batch,
+    "backtest.scalar": bench_backtest_scalar,
+    "backtest.batched": bench_backtest_batched,
+    "dataset.risk": bench_risk_dataset,
+    "dataset.exec": bench_exec_dataset,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(bars=20000, decisions=1000, repeat=3, stages=None):
+    """Roda os estágios selecionados (nome ou prefixo, ex.: 'logic') e retorna o relatório"""
+    selected = [name for name in STAGES if not stages or any(name.startswith(s) for s in stages)]
+
+    print(f"🧪 Gerando dados sintéticos: {bars} candles...")
+    ohlcv = make_ohlcv(bars)
+    features = make_features(bars)
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "bars": bars,
+            "decisions": decisions,
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        parquet_path = os.path.join(tmp, "features.parquet")
+        features.to_parquet(parquet_path, index=False)
+        ctx = {"ohlcv": ohlcv, "features": features, "parquet_path": parquet_path,
+               "decisions": min(decisions, len(features)), "repeat": repeat}
+
+        for name in selected:
+            try:
+                result = STAGES[name](ctx)
+                print(f"✅ {name}: {result['throughput']:.0f} {result['unit']}/s | "
+                      f"p50 {result['latency_ms']['p50']:.3f} ms | p99 {result['latency_ms']['p99']:.3f} ms | "
+                      f"pico {result['peak_memory_mb']:.1f} MB")
+            except SkipStage as e:
+                result = {"status": "skipped", "reason": str(e)}
+                print(f"⏭️ {name}: ignorado ({e})")
+            report["stages"][name] = result
+    return report
+
+
+def compare(report, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Compara o throughput com a baseline. Retorna a lista de estágios com regressão"""
+    regressions = []
+    print(f"\n📊 Comparação com a baseline ({baseline['meta'].get('commit')} de {baseline['meta'].get('timestamp')}):")
+    for name, stage in report["stages"].items():
+        base = baseline.get("stages", {}).get(name)
+        if stage.get("status") != "ok" or not base or base.get("status") != "ok":
+            continue
+        change = stage["throughput"] / base["throughput"] - 1
+        flag = "🔴" if change < -tolerance else ("🟢" if change > tolerance else "⚪")
+        print(f"{flag} {name}: {base['throughput']:.0f} -> {stage['throughput']:.0f} {stage['unit']}/s ({change:+.1%}) | "
+              f"memória {base['peak_memory_mb']:.1f} -> {stage['peak_memory_mb']:.1f} MB")
+        if change < -tolerance:
+            regressions.append(name)
+    return regressions
+
+
+def save_report(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks de throughput em dados OHLCV sintéticos")
+    parser.add_argument("--bars", type=int, default=20000, help="Candles sintéticos")
+    parser.add_argument("--decisions", type=int, default=1000, help="Passos dos estágios passo a passo (decisão/backtest escalar)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--stages", nargs="+", default=None, help=f"Estágios ou prefixos: {list(STAGES)}")
+    parser.add_argument("--output", default=None, help="Padrão: benchmarks/results/bench_<data>.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Grava este resultado como nova baseline")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--fail-on-regression", action="store_true", help="Sai com código 1 se houver regressão")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.bars, args.decisions, args.repeat, args.stages)
+    output = args.output or os.path.join(RESULTS_DIR, f"bench_{time.strftime('%Y%m%d_%H%M%S')}.json")
+    save_report(report, output)
+    print(f"💾 Resultado salvo em {output}")
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+    if args.save_baseline:
+        save_report(report, args.baseline)
+        print(f"📌 Baseline atualizada: {args.baseline}")
+    if regressions:
+        print(f"⚠️ Regressões acima de {args.tolerance:.0%}: {regressions}")
+        if args.fail_on_regression:
+            sys.exit(1)
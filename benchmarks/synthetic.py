@@ -0,0 +1,27 @@
+import numpy as np
+import pandas as pd
+from backtest.scenarios import recompute_features
+
+
+def make_ohlcv(n_bars=20000, symbol="EURUSD", start_price=1.10, freq="15min", seed=42):
+    """Candles OHLCV sintéticos (passeio aleatório geométrico) no formato do MT5"""
+    rng = np.random.default_rng(seed)
+    close = start_price * np.exp(np.cumsum(rng.normal(0, 0.0008, n_bars)))
+    open_ = np.concatenate([[start_price], close[:-1]]) * (1 + rng.normal(0, 0.0001, n_bars))
+    wick = np.abs(rng.normal(0, 0.0006, (2, n_bars))) * close
+    return pd.DataFrame({
+        "time": pd.date_range("2020-01-01", periods=n_bars, freq=freq),
+        "open": open_,
+        "high": np.maximum(open_, close) + wick[0],
+        "low": np.minimum(open_, close) - wick[1],
+        "close": close,
+        "tick_volume": rng.integers(200, 3000, n_bars),
+        "spread": rng.integers(5, 20, n_bars),
+        "real_volume": np.zeros(n_bars, dtype=np.int64),
+        "symbol": symbol,
+    })
+
+
+def make_features(n_bars=20000, symbol="EURUSD", seed=42):
+    """OHLCV sintético com as mesmas colunas de data/processed/market_features_m15.parquet"""
+    return recompute_features(make_ohlcv(n_bars, symbol, seed=seed))
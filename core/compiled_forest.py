@@ -0,0 +1,209 @@
+import os
+import numpy as np
+
+COMPILED_SUFFIX = ".npz"
+# Modelos suportados: florestas do sklearn (classificação e regressão) e regressão linear
+KINDS = ("forest_classifier", "forest_regressor", "linear")
+
+
+def compiled_path(model_path):
+    """Caminho do artefato compilado ao lado do pickle: model.pkl -> model.npz"""
+    return os.path.splitext(model_path)[0] + COMPILED_SUFFIX
+
+
+def _flatten_trees(estimators, classifier):
+    """Concatena os nós de todas as árvores em arrays contíguos (filhos com índices globais)"""
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in estimators:
+        tree = estimator.tree_
+        if tree.n_outputs != 1:
+            raise ValueError("Apenas modelos com uma saída são suportados")
+        leaf = tree.children_left == -1
+        features.append(np.where(leaf, 0, tree.feature).astype(np.int32))
+        thresholds.append(tree.threshold.astype(np.float64))
+        # Folhas apontam para si mesmas: a descida pode continuar sem teste de folha
+        node_ids = np.arange(tree.node_count) + offset
+        lefts.append(np.where(leaf, node_ids, tree.children_left + offset).astype(np.int32))
+        rights.append(np.where(leaf, node_ids, tree.children_right + offset).astype(np.int32))
+        value = tree.value[:, 0, :].astype(np.float64)
+        normalizer = value.sum(axis=1, keepdims=True)
+        if classifier and not np.allclose(normalizer[normalizer > 0], 1.0):
+            # sklearn >= 1.4 já guarda frações por classe; pickles antigos guardam contagens
+            normalizer[normalizer == 0.0] = 1.0
+            value = value / normalizer
+        values.append(value)
+        roots.append(offset)
+        offset += tree.node_count
+    return {
+        "feature": np.concatenate(features),
+        "threshold": np.concatenate(thresholds),
+        "left": np.concatenate(lefts),
+        "right": np.concatenate(rights),
+        "value": np.concatenate(values),
+        "roots": np.array(roots, dtype=np.int32),
+        "depth": np.array(max(e.tree_.max_depth for e in estimators), dtype=np.int32),
+    }
+
+
+def model_arrays(model):
+    """
+    Arrays NumPy de um modelo do sklearn já treinado.
+    RandomForestClassifier/Regressor: nós de todas as árvores (feature, threshold, filhos, valores);
+    LinearRegression: coeficientes.
+    """
+    arrays = {}
+    if hasattr(model, "estimators_") and hasattr(model, "classes_"):
+        kind = "forest_classifier"
+        arrays.update(_flatten_trees(model.estimators_, classifier=True))
+        arrays["classes"] = np.asarray(model.classes_)
+    elif hasattr(model, "estimators_"):
+        kind = "forest_regressor"
+        arrays.update(_flatten_trees(model.estimators_, classifier=False))
+    elif hasattr(model, "coef_") and hasattr(model, "intercept_"):
+        kind = "linear"
+        arrays["coef"] = np.asarray(model.coef_, dtype=np.float64).reshape(-1)
+        arrays["intercept"] = np.asarray(model.intercept_, dtype=np.float64).reshape(())
+    else:
+        raise ValueError(f"Modelo não suportado para compilação: {type(model).__name__}")
+
+    arrays["kind"] = np.array(kind)
+    arrays["n_features"] = np.array(model.n_features_in_, dtype=np.int32)
+    if hasattr(model, "feature_names_in_"):
+        arrays["feature_names"] = np.asarray(model.feature_names_in_, dtype=str)
+    return arrays
+
+
+def export_model(model, path):
+    """Grava o modelo como arrays NumPy (.npz), carregáveis sem o sklearn. Retorna o tamanho do arquivo em bytes"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    np.savez_compressed(path, **model_arrays(model))
+    return os.path.getsize(path)
+
+
+class CompiledModel:
+    """
+    Avaliador NumPy dos modelos exportados por export_model, com as mesmas previsões do sklearn
+    para uma linha ou um lote. A descida nas árvores é vetorizada sobre (linhas x árvores):
+    uma iteração por nível de profundidade, com as folhas apontando para si mesmas.
+    """
+
+    def __init__(self, arrays):
+        self.kind = str(arrays["kind"])
+        if self.kind not in KINDS:
+            raise ValueError(f"Artefato compilado de tipo desconhecido: {self.kind}")
+        self.n_features_in_ = int(arrays["n_features"])
+        if "feature_names" in arrays:
+            self.feature_names_in_ = np.asarray(arrays["feature_names"], dtype=object)
+        if self.kind == "linear":
+            self.coef_ = arrays["coef"]
+            self.intercept_ = float(arrays["intercept"])
+            return
+
+        self.feature = arrays["feature"]
+        self.threshold = arrays["threshold"]
+        self.left = arrays["left"]
+        self.right = arrays["right"]
+        self.value = arrays["value"]
+        self.roots = arrays["roots"]
+        self.depth = int(arrays["depth"])
+        self.n_estimators = len(self.roots)
+        if self.kind == "forest_classifier":
+            self.classes_ = arrays["classes"]
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls({key: data[key] for key in data.files})
+
+    @classmethod
+    def from_model(cls, model):
+        """Versão compilada em memória (aceita também um CompiledModel)"""
+        return model if isinstance(model, cls) else cls(model_arrays(model))
+
+    @property
+    def n_nodes(self):
+        return 0 if self.kind == "linear" else len(self.feature)
+
+    def _input(self, X):
+        # As árvores do sklearn comparam as features em float32 com thresholds float64
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Esperadas {self.n_features_in_} features, recebidas {X.shape[1]}")
+        return X
+
+    def apply(self, X):
+        """Índice global da folha atingida em cada árvore: array (linhas, árvores)"""
+        X = self._input(X)
+        rows = np.arange(len(X))[:, None]
+        node = np.broadcast_to(self.roots, (len(X), self.n_estimators)).copy()
+        for _ in range(self.depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _tree_mean(self, X):
+        leaves = self.apply(X)
+        # Soma sequencial árvore a árvore (cumsum), na mesma ordem de acumulação do sklearn
+        return np.cumsum(self.value[leaves], axis=1)[:, -1] / self.n_estimators
+
+    def contributions(self, X, chunk_size=2048):
+        """
+        Atribuição por feature no estilo Saabas (TreeSHAP aproximado): em cada nó do caminho,
+        a variação do valor do nó pai para o filho é creditada à feature do split.
+        Retorna (bias (n, saídas), contribuições (n, features, saídas)), com
+        bias + contribuições.sum(axis=1) igual a predict_proba (classificador) ou predict (regressão).
+        """
+        X = self._input(X)
+        n, n_features = X.shape
+        if self.kind == "linear":
+            bias = np.full((n, 1), self.intercept_)
+            return bias, (X.astype(np.float64) * self.coef_)[:, :, None]
+
+        n_outputs = self.value.shape[1]
+        bias = np.broadcast_to(self.value[self.roots].mean(axis=0), (n, n_outputs)).copy()
+        contrib = np.zeros((n, n_features, n_outputs))
+        for begin in range(0, n, chunk_size):
+            block = X[begin:begin + chunk_size]
+            m = len(block)
+            rows = np.arange(m)[:, None]
+            node = np.broadcast_to(self.roots, (m, self.n_estimators)).copy()
+            flat = np.zeros((m * n_features, n_outputs))
+            for _ in range(self.depth):
+                feature = self.feature[node]
+                go_left = block[rows, feature] <= self.threshold[node]
+                child = np.where(go_left, self.left[node], self.right[node])
+                delta = self.value[child] - self.value[node]  # zero nas folhas (filho = próprio nó)
+                index = (rows * n_features + feature).ravel()
+                for out in range(n_outputs):
+                    flat[:, out] += np.bincount(index, weights=delta[:, :, out].ravel(), minlength=m * n_features)
+                node = child
+            contrib[begin:begin + m] = flat.reshape(m, n_features, n_outputs) / self.n_estimators
+        return bias, contrib
+
+    def predict_proba(self, X):
+        if self.kind != "forest_classifier":
+            raise AttributeError("predict_proba disponível apenas para classificadores")
+        return self._tree_mean(X)
+
+    def predict(self, X):
+        if self.kind == "linear":
+            return np.asarray(X, dtype=np.float64).reshape(-1, self.n_features_in_) @ self.coef_ + self.intercept_
+        if self.kind == "forest_classifier":
+            return self.classes_.take(np.argmax(self._tree_mean(X), axis=1))
+        return self._tree_mean(X)[:, 0]
+
+
+def load_model(model_path, prefer_compiled=True):
+    """
+    Carrega o artefato compilado (.npz) se existir e não for mais antigo que o pickle;
+    senão o pickle com joblib (exige o sklearn).
+    """
+    npz_path = compiled_path(model_path)
+    if prefer_compiled and os.path.exists(npz_path) and (
+            not os.path.exists(model_path) or os.path.getmtime(npz_path) >= os.path.getmtime(model_path)):
+        return CompiledModel.load(npz_path)
+    import joblib
+    return joblib.load(model_path)
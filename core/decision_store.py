@@ -0,0 +1,105 @@
+import json
+import os
+import threading
+import time
+
+SNAPSHOT_DIR = "decisions"
+LAST_DECISION_PATH = "last_decision.json"
+
+
+def _write_json(path, data):
+    """Escrita atômica: quem lê (dashboard, Telegram) nunca vê um arquivo pela metade"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+class DecisionStore:
+    """
+    Última decisão de cada símbolo em memória: o robô passa a decisão direto para a ordem.
+    Os snapshots em disco (decisions/<símbolo>.json e last_decision.json, lidos pelo dashboard
+    e pelo Telegram) são opcionais e gravados por uma thread em segundo plano; decisões que
+    chegam antes da gravação anterior terminar são agrupadas e só a mais recente de cada
+    símbolo é escrita.
+    """
+
+    def __init__(self, snapshot_dir=SNAPSHOT_DIR, last_path=LAST_DECISION_PATH, snapshots=True):
+        self.snapshot_dir = snapshot_dir
+        self.last_path = last_path
+        self.snapshots = snapshots
+        self._decisions = {}
+        self._pending = {}
+        self._last_symbol = None
+        self._cond = threading.Condition()
+        self._writing = False
+        self._writer = None
+
+    def put(self, symbol, decision):
+        decision = {**decision, "symbol": symbol, "timestamp": time.time()}
+        self._decisions[symbol] = decision
+        if self.snapshots:
+            with self._cond:
+                self._pending[symbol] = decision
+                self._last_symbol = symbol
+                self._ensure_writer()
+                self._cond.notify()
+        return decision
+
+    def get(self, symbol, default=None):
+        return self._decisions.get(symbol, default)
+
+    def all(self):
+        return dict(self._decisions)
+
+    def flush(self, timeout=5.0):
+        """Espera os snapshots pendentes serem gravados. Retorna False se o tempo acabar"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._writing:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def _ensure_writer(self):
+        if self._writer is None or not self._writer.is_alive():
+            self._writer = threading.Thread(target=self._write_loop, name="decision-snapshots", daemon=True)
+            self._writer.start()
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                pending, self._pending = self._pending, {}
+                last = pending.get(self._last_symbol)
+                self._writing = True
+            try:
+                os.makedirs(self.snapshot_dir, exist_ok=True)
+                for symbol, decision in pending.items():
+                    _write_json(os.path.join(self.snapshot_dir, f"{symbol}.json"), decision)
+                if last is not None:
+                    _write_json(self.last_path, last)
+            except Exception as e:
+                print(f"⚠️ Falha ao salvar snapshot de decisão: {e}")
+            finally:
+                with self._cond:
+                    self._writing = False
+                    self._cond.notify_all()
+
+
+def load_snapshots(snapshot_dir=SNAPSHOT_DIR):
+    """Snapshots por símbolo gravados pelo DecisionStore ({símbolo: decisão})"""
+    snapshots = {}
+    if not os.path.isdir(snapshot_dir):
+        return snapshots
+    for name in sorted(os.listdir(snapshot_dir)):
+        if name.endswith(".json"):
+            try:
+                with open(os.path.join(snapshot_dir, name), "r") as f:
+                    snapshots[name[:-5]] = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+    return snapshots
@@ -0,0 +1,84 @@
+import threading
+import warnings
+import numpy as np
+from models.risk_management.risk_dataset import RISK_FEATURES
+from models.strategy_execution.exec_dataset import EXEC_FEATURES
+
+
+class FeatureSchema:
+    """
+    Ordem fixa das colunas de entrada de um grupo de modelos, a mesma usada no treino.
+    Monta as entradas direto em arrays float64 pré-alocados e reutilizados entre chamadas,
+    sem DataFrame: valores inf/NaN viram 0, como o replace/fillna do caminho com pandas.
+    Os buffers são por thread (robô, dashboard, Telegram e o preload não se sobrescrevem); dentro
+    da mesma thread, os arrays devolvidos são sobrescritos na chamada seguinte: use antes de montar outra entrada.
+    """
+
+    def __init__(self, name, columns):
+        self.name = name
+        self.columns = tuple(columns)
+        self.index = {col: j for j, col in enumerate(self.columns)}
+        self._local = threading.local()
+
+    def __len__(self):
+        return len(self.columns)
+
+    def _buffers(self):
+        local = self._local
+        if not hasattr(local, "row"):
+            local.row = np.zeros((1, len(self.columns)), dtype=np.float64)
+            local.matrix = np.zeros((0, len(self.columns)), dtype=np.float64)
+        return local
+
+    def row(self, values: dict):
+        """Entrada (1, n_features) de uma decisão a partir de um dict com todas as colunas"""
+        buffer = self._buffers().row
+        row = buffer[0]
+        for j, col in enumerate(self.columns):
+            row[j] = values[col]
+        if not np.isfinite(row).all():
+            row[~np.isfinite(row)] = 0.0
+        return buffer
+
+    def matrix(self, values: dict, n):
+        """Entrada (n, n_features) a partir de um dict de arrays (ou escalares) por coluna"""
+        local = self._buffers()
+        if len(local.matrix) < n:
+            local.matrix = np.zeros((max(n, 2 * len(local.matrix)), len(self.columns)), dtype=np.float64)
+        matrix = local.matrix[:n]
+        for j, col in enumerate(self.columns):
+            matrix[:, j] = values[col]
+        finite = np.isfinite(matrix)
+        if not finite.all():
+            matrix[~finite] = 0.0
+        return matrix
+
+    def predict(self, model, X, method="predict"):
+        """
+        Previsão de um modelo validado sobre os arrays do schema. A ordem das colunas já foi conferida
+        em validate, então o aviso de "valid feature names" do sklearn é ignorado só nesta chamada;
+        o modelo não é alterado e continua avisando para quem o usar com outras entradas.
+        """
+        if not type(model).__module__.startswith("sklearn"):
+            return getattr(model, method)(X)
+        with warnings.catch_warnings():
+            warnings.filterwarnings("ignore", message="X does not have valid feature names")
+            return getattr(model, method)(X)
+
+    def validate(self, model, model_name=None):
+        """Confere a ordem das colunas com feature_names_in_ do modelo (se treinado com DataFrame)"""
+        names = getattr(model, "feature_names_in_", None)
+        if names is not None and tuple(names) != self.columns:
+            raise ValueError(
+                f"Modelo '{model_name or self.name}' foi treinado com as colunas {list(names)}, "
+                f"mas o schema '{self.name}' usa {list(self.columns)}"
+            )
+        n_features = getattr(model, "n_features_in_", None)
+        if n_features is not None and n_features != len(self.columns):
+            raise ValueError(f"Modelo '{model_name or self.name}' espera {n_features} features, "
+                             f"o schema '{self.name}' tem {len(self.columns)}")
+        return model
+
+
+RISK_SCHEMA = FeatureSchema("risk", RISK_FEATURES)
+EXEC_SCHEMA = FeatureSchema("exec", EXEC_FEATURES)
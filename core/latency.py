@@ -0,0 +1,127 @@
+import json
+import math
+import os
+import time
+from bisect import bisect_left
+
+# Limites dos buckets: de 1 µs a 10 s, 20 por década (erro relativo de ~12% nos percentis)
+MIN_SECONDS = 1e-6
+MAX_SECONDS = 10.0
+BUCKETS_PER_DECADE = 20
+PERCENTILES = (50, 95, 99)
+LATENCY_PATH = "latency.json"
+
+
+def _bucket_bounds():
+    decades = int(round(math.log10(MAX_SECONDS / MIN_SECONDS)))
+    return [MIN_SECONDS * 10 ** (i / BUCKETS_PER_DECADE) for i in range(decades * BUCKETS_PER_DECADE + 1)]
+
+
+BUCKET_BOUNDS = _bucket_bounds()
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências com buckets fixos em escala logarítmica: memória constante,
+    registro O(log buckets) e percentis aproximados pelo limite superior do bucket.
+    """
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)  # último bucket: acima de MAX_SECONDS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, q):
+        """Latência (segundos) abaixo da qual ficam q% das amostras"""
+        if self.count == 0:
+            return 0.0
+        target = self.count * q / 100.0
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self):
+        """Resumo em milissegundos: contagem, média, p50/p95/p99 e máximo"""
+        summary = {"count": self.count, "mean_ms": self.total / self.count * 1000 if self.count else 0.0}
+        for q in PERCENTILES:
+            summary[f"p{q}_ms"] = self.percentile(q) * 1000
+        summary["max_ms"] = self.max * 1000
+        return summary
+
+
+class LatencyRecorder:
+    """
+    Timers por etapa do caminho quente. Uso:
+        started = latency.start()
+        ...etapa...
+        started = latency.lap("etapa", started)
+    Desligado, start()/lap() só testam um booleano e não chamam o relógio.
+    """
+
+    def __init__(self, enabled=False, log_interval=300, path=LATENCY_PATH):
+        self.enabled = enabled
+        self.log_interval = log_interval
+        self.path = path
+        self.histograms = {}
+        self._last_report = time.monotonic()
+
+    def start(self):
+        return time.perf_counter() if self.enabled else 0.0
+
+    def lap(self, stage, started):
+        """Registra o tempo desde 'started' na etapa e retorna o instante atual (início da próxima etapa)"""
+        if not self.enabled:
+            return 0.0
+        now = time.perf_counter()
+        self.record(stage, now - started)
+        return now
+
+    def record(self, stage, seconds):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = LatencyHistogram()
+        histogram.record(seconds)
+
+    def snapshot(self):
+        """{etapa: resumo em ms} de todas as etapas registradas"""
+        return {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+
+    def reset(self):
+        self.histograms = {}
+
+    def log_line(self):
+        parts = [f"{stage} p50={s['p50_ms']:.2f} p95={s['p95_ms']:.2f} p99={s['p99_ms']:.2f}ms (n={s['count']})"
+                 for stage, s in self.snapshot().items()]
+        return "⏱️ Latência | " + " | ".join(parts) if parts else "⏱️ Latência | sem amostras"
+
+    def save(self, path=None):
+        """Grava o snapshot (atômico) para o dashboard, que roda em outro processo"""
+        path = path or self.path
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"timestamp": time.time(), "stages": self.snapshot()}, f)
+        os.replace(tmp_path, path)
+
+    def maybe_report(self):
+        """A cada log_interval segundos: imprime a linha de latência e grava o snapshot"""
+        if not self.enabled or time.monotonic() - self._last_report < self.log_interval:
+            return False
+        self._last_report = time.monotonic()
+        print(self.log_line())
+        try:
+            self.save()
+        except OSError as e:
+            print(f"⚠️ Falha ao salvar latências: {e}")
+        return True
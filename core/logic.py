@@ -1,51 +1,86 @@
 import joblib
 import numpy as np
 import pandas as pd
-import json
 from config.config import load_config
-from live_trading.mt5_trader import get_lot_limits
+from core.model_registry import ModelRegistry
+from core.decision_store import DecisionStore
+from core.feature_schema import RISK_SCHEMA, EXEC_SCHEMA
+from core.compiled_forest import load_model
+from core.latency import LatencyRecorder
 # Removido shap por enquanto, pois é específico para modelos scikit-learn.
 # Para LSTMs, alternativas como LIME ou Captum (PyTorch) ou tf-explain (TF) seriam necessárias.
 # import shap
 
-# Importa o nosso novo wrapper LSTM
-from models.market_analysis.lstm_model_wrapper import LSTMModelWrapper
-
 # Carrega configuração
 cfg = load_config()
 
-# Carregamento dos modelos usando configuração
-try:
-    # Carregar o LSTM Wrapper
-    lstm_model_path = cfg["model_paths"]["lstm_market_model"]
-    lstm_scaler_path = cfg["model_paths"]["lstm_market_scaler"]
+# Modelos carregados sob demanda (primeiro uso) pelo registry; importar este módulo não carrega nada.
+# Para carregar tudo antecipadamente: models.preload() (thread em segundo plano) ou models.preload(background=False)
+models = ModelRegistry()
+
+def _load_market_model():
+    # Importa o nosso wrapper LSTM (inferência em NumPy) só quando o modelo de mercado é usado
+    from models.market_analysis.lstm_model_wrapper import LSTMModelWrapper
 
     # Parâmetros do wrapper podem vir da config ou usar defaults
     lstm_params = cfg.get("lstm_wrapper_params", {})
-    timesteps = lstm_params.get("timesteps", 20) # Default no wrapper é 20
-    expected_features_lstm = lstm_params.get("expected_features", None) # Default no wrapper é uma lista específica
-
-    # Instanciar o wrapper LSTM como o novo 'market_model'
-    market_model = LSTMModelWrapper(
-        model_path=lstm_model_path,
-        scaler_path=lstm_scaler_path,
-        timesteps=timesteps,
-        expected_features=expected_features_lstm
+    model = LSTMModelWrapper(
+        model_path=cfg["model_paths"]["lstm_market_model"],
+        scaler_path=cfg["model_paths"]["lstm_market_scaler"],
+        timesteps=lstm_params.get("timesteps", 20),  # Default no wrapper é 20
+        expected_features=lstm_params.get("expected_features", None),  # Default no wrapper é uma lista específica
+        class_signals=lstm_params.get("class_signals", None)  # Sinal de cada classe da saída (default -1, 0, 1)
     )
-    print(f"✅ Modelo de Análise de Mercado (LSTM Wrapper) carregado.")
-
-    risk_action_model = joblib.load(cfg["model_paths"]["risk_action"])
-    risk_level_model = joblib.load(cfg["model_paths"]["risk_level"])
-    position_size_model = joblib.load(cfg["model_paths"]["position_size"])
-    stop_loss_model = joblib.load(cfg["model_paths"]["stop_loss"])
-    take_profit_model = joblib.load(cfg["model_paths"]["take_profit"])
-    exec_model = joblib.load(cfg["model_paths"]["strategy_exec"])
-    label_map = joblib.load(cfg["model_paths"]["exec_labels"])
-    print("✅ Modelos de Risco e Execução carregados com sucesso.")
-except Exception as e:
-    print(f"❌ Erro ao carregar modelos: {e}")
-    print("⚠️ Verifique os caminhos dos modelos e a configuração.")
-    raise
+    print("✅ Modelo de Análise de Mercado (LSTM Wrapper) carregado.")
+    return model
+
+# Última decisão por símbolo em memória (entregue direto à ordem); snapshots JSON em segundo plano
+decision_store = DecisionStore(snapshots=cfg["general"].get("decision_snapshots", True))
+
+# Timers por etapa das decisões (general.latency_timers); desligados custam só um teste de booleano
+latency = LatencyRecorder(enabled=cfg["general"].get("latency_timers", False),
+                          log_interval=cfg["general"].get("latency_log_interval", 300))
+
+def _joblib_loader(path_key, schema=None):
+    # Com schema, a ordem das colunas do modelo é conferida no carregamento
+    if schema is None:
+        return lambda: joblib.load(cfg["model_paths"][path_key])
+    return lambda: schema.validate(_load_sklearn_model(cfg["model_paths"][path_key]), path_key)
+
+def _load_sklearn_model(path):
+    # Versão compilada (.npz, gerada por models/compile_models.py) quando existir e estiver atualizada
+    return load_model(path, prefer_compiled=cfg["general"].get("use_compiled_models", True))
+
+models.register("market", _load_market_model)
+for _name in ("risk_action", "risk_level", "position_size", "stop_loss", "take_profit"):
+    models.register(_name, _joblib_loader(_name, RISK_SCHEMA))
+models.register("strategy_exec", _joblib_loader("strategy_exec", EXEC_SCHEMA))
+models.register("exec_labels", _joblib_loader("exec_labels"))
+
+# Nomes antigos dos modelos como atributos do módulo (ex.: from core.logic import market_model)
+LEGACY_MODEL_NAMES = {
+    "market_model": "market",
+    "risk_action_model": "risk_action",
+    "risk_level_model": "risk_level",
+    "position_size_model": "position_size",
+    "stop_loss_model": "stop_loss",
+    "take_profit_model": "take_profit",
+    "exec_model": "strategy_exec",
+    "label_map": "exec_labels",
+}
+
+def __getattr__(name):
+    if name in LEGACY_MODEL_NAMES:
+        return models.get(LEGACY_MODEL_NAMES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+def get_lot_limits(symbol):
+    # MetaTrader5 só é importado quando os limites de lote são consultados
+    from live_trading.mt5_trader import get_lot_limits as mt5_lot_limits
+    return mt5_lot_limits(symbol)
+
+INITIAL_CAPITAL = 10000
+REINVESTMENT_RATE = 0.5
 
 def _calculate_trend_type(market: dict, threshold=0.001):
     """Calcula o tipo de tendência baseado na diferença entre EMA20 e EMA50"""
@@ -61,17 +96,55 @@ def _calculate_trend_type(market: dict, threshold=0.001):
     else:
         return -1  # Baixa
 
-def run_autonomous_decision(market: dict, state: dict):
-    # Garante que spread_pct está presente
+def _adjust_position_size(raw_position_size, min_lot, max_lot, lot_step):
+    """Ajusta o lote sugerido para múltiplo do step e limites do ativo"""
+    position_size = max(min_lot, min(max_lot, round(round(raw_position_size / lot_step) * lot_step, 2)))
+    if (position_size - min_lot) % lot_step != 0:
+        position_size = min_lot + round((position_size - min_lot) / lot_step) * lot_step
+    return round(position_size, 2)
+
+def _ensure_spread_pct(market: dict):
+    """Garante que spread_pct está presente (altera o dict recebido)"""
     if "spread_pct" not in market:
         if "spread" in market and "close" in market and market["close"] != 0:
             market["spread_pct"] = market["spread"] / market["close"]
         else:
             market["spread_pct"] = 0.0001  # valor default seguro
 
-    initial_capital = 10000
+# Última decisão de cada símbolo com a chave (timestamp do candle, estado): o mesmo candle com o
+# mesmo estado não passa de novo pelos modelos (nem entra duas vezes no histórico do modelo de mercado)
+_decision_memo = {}
+
+def _decision_memo_key(market: dict, state: dict, reinvestment_rate):
+    # Só candles com timestamp (robô ao vivo) são memorizados
+    timestamp = market.get("timestamp")
+    if timestamp is None:
+        return None
+    state_items = tuple(sorted((k, v) for k, v in state.items() if isinstance(v, (bool, int, float, str))))
+    return timestamp, reinvestment_rate, state_items
+
+def _memoized_decision(symbol, key):
+    entry = _decision_memo.get(symbol)
+    if key is not None and entry is not None and entry[0] == key:
+        return dict(entry[1])
+    return None
+
+def _memoize_decision(symbol, key, decision):
+    if key is not None:
+        _decision_memo[symbol] = (key, dict(decision))
+
+def run_autonomous_decision(market: dict, state: dict, reinvestment_rate=REINVESTMENT_RATE):
+    started = stage_started = latency.start()
+    memo_symbol = state.get('symbol', market.get('symbol', 'DEFAULT_LSTM_SYMBOL'))
+    memo_key = _decision_memo_key(market, state, reinvestment_rate)
+    memoized = _memoized_decision(memo_symbol, memo_key)
+    if memoized is not None:
+        latency.lap("memo_hit", started)
+        return memoized
+    _ensure_spread_pct(market)
+
+    initial_capital = INITIAL_CAPITAL
     capital = np.clip(state.get("capital", initial_capital), 0, 1e7)
-    reinvestment_rate = 0.5
     adjusted_capital = initial_capital + (capital - initial_capital) * reinvestment_rate
 
     atr = market.get("atr", 0)
@@ -87,9 +160,10 @@ def run_autonomous_decision(market: dict, state: dict):
 
     # O LSTMModelWrapper.predict() espera um dicionário de dados de mercado e o símbolo.
     # As features são selecionadas e pré-processadas dentro do wrapper.
-    signal, confidence = market_model.predict(market, symbol=current_symbol)
+    signal, confidence = models.get("market").predict(market, symbol=current_symbol)
     signal = int(signal)
     confidence = float(confidence)
+    stage_started = latency.lap("market_model", stage_started)
     
     # --- SHAP: Explicabilidade ---
     # A explicabilidade com SHAP para modelos scikit-learn (como o RandomForest anterior)
@@ -111,28 +185,23 @@ def run_autonomous_decision(market: dict, state: dict):
         "confidence": confidence,
         "recent_losses": state.get("recent_losses", 0),
         "volatility_score": atr / market["close"] if market["close"] > 0 else 0,
-        "rolling_loss_ratio": state.get("rolling_loss_ratio", 0)
+        "rolling_loss_ratio": state.get("rolling_loss_ratio", 0),
+        "spread_pct": market["spread_pct"]
     }
-    
-    # Adiciona features específicas do MT5 se disponíveis
-    if "spread_pct" in market:
-        risk_features["spread_pct"] = market["spread_pct"]
-
-    risk_input = pd.DataFrame([risk_features])
-    risk_input = risk_input.replace([np.inf, -np.inf], np.nan).fillna(0)
+    # Linha float64 pré-alocada na ordem de treino (sem DataFrame por decisão)
+    risk_input = RISK_SCHEMA.row(risk_features)
 
-    action_code = int(risk_action_model.predict(risk_input)[0])
-    risk_level = int(risk_level_model.predict(risk_input)[0])
-    raw_position_size = float(position_size_model.predict(risk_input)[0])
+    action_code = int(RISK_SCHEMA.predict(models.get("risk_action"), risk_input)[0])
+    risk_level = int(RISK_SCHEMA.predict(models.get("risk_level"), risk_input)[0])
+    raw_position_size = float(RISK_SCHEMA.predict(models.get("position_size"), risk_input)[0])
+    stop_loss_pct = float(RISK_SCHEMA.predict(models.get("stop_loss"), risk_input)[0])
+    take_profit_pct = float(RISK_SCHEMA.predict(models.get("take_profit"), risk_input)[0])
+    stage_started = latency.lap("risk_models", stage_started)
     # Ajusta para múltiplo do step e limites do ativo
     min_lot, max_lot, lot_step = get_lot_limits(state.get('symbol', market.get('symbol', 'EURUSD')))
-    position_size = max(min_lot, min(max_lot, round(round(raw_position_size / lot_step) * lot_step, 2)))
-    if (position_size - min_lot) % lot_step != 0:
-        position_size = min_lot + round((position_size - min_lot) / lot_step) * lot_step
-    position_size = round(position_size, 2)
+    position_size = _adjust_position_size(raw_position_size, min_lot, max_lot, lot_step)
     print(f"[Lote] {state.get('symbol', market.get('symbol', 'EURUSD'))}: min={min_lot}, max={max_lot}, step={lot_step}, sugerido={raw_position_size:.4f}, ajustado={position_size:.4f}")
-    stop_loss_pct = float(stop_loss_model.predict(risk_input)[0])
-    take_profit_pct = float(take_profit_model.predict(risk_input)[0])
+    stage_started = latency.lap("lot_sizing", stage_started)
 
     # Features para modelo de execução (adaptadas para MT5)
     exec_features = {
@@ -148,18 +217,14 @@ def run_autonomous_decision(market: dict, state: dict):
         "time_in_trade": state.get("time_in_trade", 0),
         "profit_pct": state.get("profit_pct", 0),
         "trend_type": _calculate_trend_type(market),
-        "time_since_last_trade": state.get("time_since_last_trade", 0)
+        "time_since_last_trade": state.get("time_since_last_trade", 0),
+        "spread_pct": market["spread_pct"]
     }
-    
-    # Adiciona features específicas do MT5 se disponíveis
-    if "spread_pct" in market:
-        exec_features["spread_pct"] = market["spread_pct"]
+    exec_input = EXEC_SCHEMA.row(exec_features)
 
-    exec_input = pd.DataFrame([exec_features])
-    exec_input = exec_input.replace([np.inf, -np.inf], np.nan).fillna(0)
-
-    decision_encoded = int(exec_model.predict(exec_input)[0])
-    final_decision = label_map[decision_encoded]
+    decision_encoded = int(EXEC_SCHEMA.predict(models.get("strategy_exec"), exec_input)[0])
+    final_decision = models.get("exec_labels")[decision_encoded]
+    stage_started = latency.lap("exec_model", stage_started)
 
     last_decision = {
         "final_decision": final_decision,
@@ -171,11 +236,240 @@ def run_autonomous_decision(market: dict, state: dict):
         "stop_loss_pct": stop_loss_pct,
         "take_profit_pct": take_profit_pct
     }
+    decision_store.put(current_symbol, last_decision)
+    _memoize_decision(memo_symbol, memo_key, last_decision)
+    latency.lap("decision_store", stage_started)
+    latency.lap("decision_total", started)
+
+    return last_decision
+
+
+# --- Modo em lote (backtest) ---
+# As funções abaixo reproduzem run_autonomous_decision sobre muitas linhas de uma vez:
+# uma única chamada de predict por modelo, sem prints nem escrita de last_decision.json.
+
+def predict_market_batch(frame: pd.DataFrame, default_symbol="DEFAULT_LSTM_SYMBOL"):
+    """Retorna (signals, confidences) para todas as linhas de 'frame', na ordem"""
+    market_model = models.get("market")
+    if hasattr(market_model, "predict_batch"):
+        signals, confidences = market_model.predict_batch(frame, default_symbol=default_symbol)
+        return np.asarray(signals, dtype=np.int64), np.asarray(confidences, dtype=np.float64)
+
+    # Fallback: o wrapper é stateful (histórico por símbolo), então alimenta linha a linha
+    signals = np.zeros(len(frame), dtype=np.int64)
+    confidences = np.zeros(len(frame), dtype=np.float64)
+    for k, market in enumerate(frame.to_dict("records")):
+        signal, confidence = market_model.predict(market, symbol=market.get("symbol", default_symbol))
+        signals[k] = int(signal)
+        confidences[k] = float(confidence)
+    return signals, confidences
+
+def prepare_market_batch(frame: pd.DataFrame, signals=None, confidences=None, default_symbol="EURUSD"):
+    """Extrai do DataFrame de mercado os arrays independentes de estado usados pelos modelos"""
+    close = frame["close"].to_numpy(dtype=np.float64)
+    if "spread_pct" in frame:
+        spread_pct = frame["spread_pct"].to_numpy(dtype=np.float64)
+    elif "spread" in frame:
+        spread = frame["spread"].to_numpy(dtype=np.float64)
+        spread_pct = np.where(close != 0, spread / np.where(close != 0, close, 1), 0.0001)
+    else:
+        spread_pct = np.full(len(frame), 0.0001)
+
+    atr = frame["atr"].to_numpy(dtype=np.float64) if "atr" in frame else np.zeros(len(frame))
+    atr = np.where(np.isfinite(atr) & (atr <= 1e4), atr, 0.0)
+
+    ema_20 = frame["ema_20"].to_numpy(dtype=np.float64) if "ema_20" in frame else np.zeros(len(frame))
+    ema_50 = frame["ema_50"].to_numpy(dtype=np.float64) if "ema_50" in frame else np.zeros(len(frame))
+    diff = ema_20 - ema_50
+    trend_type = np.where(np.abs(diff) < 0.001 * close, 0, np.where(diff > 0, 1, -1))
+
+    if signals is None or confidences is None:
+        signals, confidences = predict_market_batch(frame)
+
+    symbol = frame["symbol"].to_numpy() if "symbol" in frame else np.full(len(frame), default_symbol, dtype=object)
+
+    def price_column(name):
+        return frame[name].to_numpy(dtype=np.float64) if name in frame else close
+
+    return {
+        "close": close,
+        "open": price_column("open"),
+        "high": price_column("high"),
+        "low": price_column("low"),
+        "atr": atr,
+        "volatility_score": np.where(close > 0, atr / np.where(close > 0, close, 1), 0.0),
+        "spread_pct": spread_pct,
+        "trend_type": trend_type,
+        "signal": np.asarray(signals, dtype=np.int64),
+        "confidence": np.asarray(confidences, dtype=np.float64),
+        "symbol": symbol,
+    }
+
+def run_decision_batch(market: dict, state: dict, lot_limits=None, reinvestment_rate=REINVESTMENT_RATE,
+                       record_inputs=False):
+    """
+    Versão vetorizada de run_autonomous_decision.
+    'market' vem de prepare_market_batch (fatiado ou não) e 'state' traz um array por
+    chave de estado (capital, in_position, drawdown, ...). Retorna um dict de arrays.
+    Com record_inputs=True inclui cópias das entradas dos modelos ("risk_input", "exec_input"),
+    usadas na atribuição offline (backtest/attribution.py).
+    """
+    n = len(market["close"])
+
+    def state_array(key, default=0.0):
+        value = state.get(key, default)
+        return np.broadcast_to(np.asarray(value, dtype=np.float64), (n,))
+
+    capital = np.clip(state_array("capital", INITIAL_CAPITAL), 0, 1e7)
+    adjusted_capital = INITIAL_CAPITAL + (capital - INITIAL_CAPITAL) * reinvestment_rate
+    in_position = state_array("in_position").astype(np.int64)
+
+    risk_input = RISK_SCHEMA.matrix({
+        "capital": adjusted_capital,
+        "in_position": in_position,
+        "drawdown": state_array("drawdown"),
+        "atr": market["atr"],
+        "signal": market["signal"],
+        "confidence": market["confidence"],
+        "recent_losses": state_array("recent_losses"),
+        "volatility_score": market["volatility_score"],
+        "rolling_loss_ratio": state_array("rolling_loss_ratio"),
+        "spread_pct": market["spread_pct"],
+    }, n)
+
+    action_code = RISK_SCHEMA.predict(models.get("risk_action"), risk_input).astype(np.int64)
+    risk_level = RISK_SCHEMA.predict(models.get("risk_level"), risk_input).astype(np.int64)
+    raw_position_size = RISK_SCHEMA.predict(models.get("position_size"), risk_input).astype(np.float64)
+    stop_loss_pct = RISK_SCHEMA.predict(models.get("stop_loss"), risk_input).astype(np.float64)
+    take_profit_pct = RISK_SCHEMA.predict(models.get("take_profit"), risk_input).astype(np.float64)
+
+    # Limites de lote consultados uma vez por símbolo
+    if lot_limits is None:
+        lot_limits = {}
+    position_size = np.empty(n, dtype=np.float64)
+    for k, (symbol, raw) in enumerate(zip(market["symbol"], raw_position_size)):
+        if symbol not in lot_limits:
+            lot_limits[symbol] = get_lot_limits(symbol)
+        position_size[k] = _adjust_position_size(float(raw), *lot_limits[symbol])
+
+    exec_input = EXEC_SCHEMA.matrix({
+        "signal": market["signal"],
+        "confidence": market["confidence"],
+        "action_code": action_code,
+        "risk_level_code": risk_level,
+        "position_size": position_size,
+        "stop_loss_pct": stop_loss_pct,
+        "take_profit_pct": take_profit_pct,
+        "capital": adjusted_capital,
+        "in_position": in_position,
+        "time_in_trade": state_array("time_in_trade"),
+        "profit_pct": state_array("profit_pct"),
+        "trend_type": market["trend_type"],
+        "time_since_last_trade": state_array("time_since_last_trade"),
+        "spread_pct": market["spread_pct"],
+    }, n)
+
+    decision_encoded = EXEC_SCHEMA.predict(models.get("strategy_exec"), exec_input).astype(np.int64)
+    label_map = models.get("exec_labels")
+    final_decision = np.array([label_map[code] for code in decision_encoded], dtype=object)
+
+    inputs = {"risk_input": risk_input.copy(), "exec_input": exec_input.copy()} if record_inputs else {}
+    return {
+        **inputs,
+        "final_decision": final_decision,
+        "signal": market["signal"],
+        "confidence": market["confidence"],
+        "action_code": action_code,
+        "risk_level": risk_level,
+        "position_size": position_size,
+        "stop_loss_pct": stop_loss_pct,
+        "take_profit_pct": take_profit_pct
+    }
+
+
+def run_autonomous_decisions(markets: list, states: list, reinvestment_rate=REINVESTMENT_RATE, lot_limits=None):
+    """
+    Decisões de vários ativos no mesmo tick, com o mesmo resultado de chamar
+    run_autonomous_decision para cada par (market, state) em sequência.
+    O modelo de mercado (com histórico por símbolo) roda em um forward só se o wrapper tem predict_many;
+    os modelos de risco e de execução rodam uma vez para todos via run_decision_batch.
+    Ativos com o mesmo candle (timestamp) e o mesmo estado da chamada anterior reutilizam a decisão.
+    """
+    if len(markets) != len(states):
+        raise ValueError(f"markets ({len(markets)}) e states ({len(states)}) devem ter o mesmo tamanho")
+
+    memo_symbols = [state.get('symbol', market.get('symbol', 'DEFAULT_LSTM_SYMBOL'))
+                    for market, state in zip(markets, states)]
+    memo_keys = [_decision_memo_key(market, state, reinvestment_rate) for market, state in zip(markets, states)]
+    decisions = [_memoized_decision(symbol, key) for symbol, key in zip(memo_symbols, memo_keys)]
+    pending = [k for k, decision in enumerate(decisions) if decision is None]
+    if pending:
+        fresh = _run_decisions_batch([markets[k] for k in pending], [states[k] for k in pending],
+                                     reinvestment_rate, lot_limits)
+        for k, decision in zip(pending, fresh):
+            decisions[k] = decision
+            _memoize_decision(memo_symbols[k], memo_keys[k], decision)
+    return decisions
+
+def _run_decisions_batch(markets: list, states: list, reinvestment_rate, lot_limits):
+    started = latency.start()
+    market_model = models.get("market")
+    n = len(markets)
+    columns = {key: np.empty(n, dtype=np.float64) for key in ("close", "atr", "spread_pct", "signal", "confidence")}
+    trend_type = np.empty(n, dtype=np.int64)
+    symbols = np.empty(n, dtype=object)
+    model_symbols = [state.get('symbol', market.get('symbol', 'DEFAULT_LSTM_SYMBOL'))
+                     for market, state in zip(markets, states)]
+    for market in markets:
+        _ensure_spread_pct(market)
+    if hasattr(market_model, "predict_many"):
+        # Um único forward do modelo de mercado para todos os ativos
+        columns["signal"][:], columns["confidence"][:] = market_model.predict_many(markets, model_symbols)
+    for k, (market, state) in enumerate(zip(markets, states)):
+        atr = market.get("atr", 0)
+        if not np.isfinite(atr) or atr > 1e4:
+            atr = 0.0
+        if not hasattr(market_model, "predict_many"):
+            signal, confidence = market_model.predict(market, symbol=model_symbols[k])
+            columns["signal"][k] = int(signal)
+            columns["confidence"][k] = float(confidence)
+        columns["close"][k] = market["close"]
+        columns["atr"][k] = atr
+        columns["spread_pct"][k] = market["spread_pct"]
+        trend_type[k] = _calculate_trend_type(market)
+        symbols[k] = state.get('symbol', market.get('symbol', 'EURUSD'))
+
+    stage_started = latency.lap("batch_market_model", started)
+    close = columns["close"]
+    batch = {
+        **columns,
+        "volatility_score": np.where(close > 0, columns["atr"] / np.where(close > 0, close, 1), 0.0),
+        "trend_type": trend_type,
+        "signal": columns["signal"].astype(np.int64),
+        "symbol": symbols,
+    }
+    state_batch = {key: np.array([s.get(key, default) for s in states], dtype=np.float64)
+                   for key, default in (("capital", INITIAL_CAPITAL), ("in_position", False), ("drawdown", 0),
+                                        ("time_in_trade", 0), ("recent_losses", 0), ("profit_pct", 0),
+                                        ("rolling_loss_ratio", 0), ("time_since_last_trade", 0))}
+    result = run_decision_batch(batch, state_batch, lot_limits, reinvestment_rate)
+    stage_started = latency.lap("batch_models", stage_started)
+
+    decisions = [{
+        "final_decision": result["final_decision"][k],
+        "signal": int(result["signal"][k]),
+        "confidence": float(result["confidence"][k]),
+        "action_code": int(result["action_code"][k]),
+        "risk_level": int(result["risk_level"][k]),
+        "position_size": float(result["position_size"][k]),
+        "stop_loss_pct": float(result["stop_loss_pct"][k]),
+        "take_profit_pct": float(result["take_profit_pct"][k])
+    } for k in range(n)]
 
-    try:
-        with open("last_decision.json", "w") as f:
-            json.dump(last_decision, f)
-    except Exception as e:
-        print(f"⚠️ Falha ao salvar last_decision.json: {e}")
+    # Como nas chamadas em sequência, o snapshot last_decision.json fica com a decisão do último ativo
+    for symbol, decision in zip(model_symbols, decisions):
+        decision_store.put(symbol, decision)
+    latency.lap("decision_store", stage_started)
+    latency.lap("batch_total", started)
 
-    return last_decision
\ No newline at end of file
+    return decisions
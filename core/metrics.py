@@ -0,0 +1,169 @@
+import json
+import math
+import os
+import numpy as np
+
+TRADING_DAYS = 252
+# Minutos por candle de cada timeframe MT5
+TIMEFRAME_MINUTES = {
+    "M1": 1, "M5": 5, "M15": 15, "M30": 30,
+    "H1": 60, "H4": 240, "D1": 1440
+}
+
+
+def periods_per_year(timeframe="D1"):
+    """Nº de candles por ano para anualizar o Sharpe. Aceita 'M15', 'H1'... ou a duração do candle em segundos."""
+    if isinstance(timeframe, str):
+        if timeframe not in TIMEFRAME_MINUTES:
+            raise ValueError(f"Timeframe desconhecido: {timeframe}")
+        minutes = TIMEFRAME_MINUTES[timeframe]
+    else:
+        minutes = float(timeframe) / 60
+    # D1 (ou maior) = 252 períodos, o padrão anterior do backtest
+    return TRADING_DAYS * max(1.0, 1440 / minutes)
+
+
+def infer_timeframe(times):
+    """Duração mediana do candle em segundos a partir da coluna de tempo"""
+    times = np.asarray(times, dtype="datetime64[s]").astype(np.int64)
+    if len(times) < 2:
+        return "D1"
+    return float(np.median(np.diff(times)))
+
+
+class StreamingMetrics:
+    """
+    Métricas de desempenho com atualização O(1) por candle e por trade.
+    Mantém o pico e o drawdown máximo correntes, média/variância dos retornos
+    (Welford) para o Sharpe e somatórios dos trades. Mesmas definições de
+    backtest.run_backtest.calculate_metrics, sem guardar o histórico.
+    """
+
+    def __init__(self, timeframe="D1"):
+        self.timeframe = timeframe
+        self.annualization = math.sqrt(periods_per_year(timeframe))
+        self.reset()
+
+    def reset(self):
+        self.first_equity = None
+        self.last_equity = None
+        self.peak = None
+        self.max_drawdown = 0.0
+        self.n_returns = 0
+        self.mean_return = 0.0
+        self.m2 = 0.0
+        self.n_trades = 0
+        self.n_wins = 0
+        self.n_losses = 0
+        self.gross_profit = 0.0
+        self.gross_loss = 0.0
+
+    def update_equity(self, equity):
+        equity = float(equity)
+        if self.first_equity is None:
+            self.first_equity = self.peak = equity
+        else:
+            if self.last_equity != 0:
+                r = (equity - self.last_equity) / self.last_equity
+                self.n_returns += 1
+                delta = r - self.mean_return
+                self.mean_return += delta / self.n_returns
+                self.m2 += delta * (r - self.mean_return)
+            self.peak = max(self.peak, equity)
+        if self.peak > 0:
+            self.max_drawdown = min(self.max_drawdown, (equity - self.peak) / self.peak)
+        self.last_equity = equity
+
+    def update_equity_block(self, equities):
+        """Vários candles de uma vez (vetorizado): combina o bloco pelas fórmulas de Chan para Welford"""
+        equities = np.asarray(equities, dtype=np.float64)
+        if len(equities) == 0:
+            return
+        if self.first_equity is None:
+            self.update_equity(equities[0])
+            equities = equities[1:]
+            if len(equities) == 0:
+                return
+
+        previous = np.concatenate([[self.last_equity], equities[:-1]])
+        returns = (equities - previous) / previous
+        returns = returns[previous != 0]
+        if len(returns):
+            n_b = len(returns)
+            mean_b = returns.mean()
+            m2_b = ((returns - mean_b) ** 2).sum()
+            n = self.n_returns + n_b
+            delta = mean_b - self.mean_return
+            self.m2 += m2_b + delta ** 2 * self.n_returns * n_b / n
+            self.mean_return += delta * n_b / n
+            self.n_returns = n
+
+        peaks = np.maximum.accumulate(np.concatenate([[self.peak], equities]))[1:]
+        valid = peaks > 0
+        if valid.any():
+            self.max_drawdown = min(self.max_drawdown, float(((equities[valid] - peaks[valid]) / peaks[valid]).min()))
+        self.peak = float(peaks[-1])
+        self.last_equity = float(equities[-1])
+
+    def update_trade(self, pnl):
+        pnl = float(pnl)
+        self.n_trades += 1
+        if pnl > 0:
+            self.n_wins += 1
+            self.gross_profit += pnl
+        elif pnl < 0:
+            self.n_losses += 1
+            self.gross_loss += pnl
+
+    @property
+    def sharpe(self):
+        if self.n_returns == 0:
+            return 0.0
+        std = math.sqrt(self.m2 / self.n_returns)
+        return self.mean_return / (std + 1e-8) * self.annualization
+
+    def snapshot(self):
+        """Métricas atuais no mesmo formato de calculate_metrics"""
+        metrics = {
+            "max_drawdown": self.max_drawdown,
+            "sharpe": self.sharpe,
+            "win_rate": 0, "avg_win": 0, "avg_loss": 0, "profit_factor": 0, "recovery_factor": 0,
+        }
+        if self.n_trades > 0:
+            metrics["win_rate"] = self.n_wins / self.n_trades
+            metrics["avg_win"] = self.gross_profit / self.n_wins if self.n_wins else 0
+            metrics["avg_loss"] = self.gross_loss / self.n_losses if self.n_losses else 0
+            metrics["profit_factor"] = self.gross_profit / (abs(self.gross_loss) + 1e-8) if self.n_losses else np.inf
+            metrics["recovery_factor"] = (self.last_equity - self.first_equity) / abs(self.max_drawdown * self.first_equity) \
+                if self.max_drawdown != 0 else np.inf
+        metrics["n_trades"] = self.n_trades
+        metrics["n_bars"] = self.n_returns + (1 if self.first_equity is not None else 0)
+        metrics["equity"] = self.last_equity
+        return metrics
+
+    def progress_summary(self):
+        """Resumo curto para barras de progresso / logs"""
+        return {
+            "equity": f"{self.last_equity or 0:.2f}",
+            "dd": f"{self.max_drawdown:.2%}",
+            "sharpe": f"{self.sharpe:.2f}",
+            "trades": self.n_trades,
+        }
+
+    def save(self, path="live_metrics.json"):
+        state = {key: value for key, value in self.__dict__.items() if key != "annualization"}
+        state["snapshot"] = {k: (None if isinstance(v, float) and not math.isfinite(v) else v)
+                             for k, v in self.snapshot().items()}
+        with open(path, "w") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, path="live_metrics.json"):
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Nenhum estado de métricas encontrado em {path}")
+        with open(path, "r") as f:
+            state = json.load(f)
+        state.pop("snapshot", None)
+        metrics = cls(timeframe=state.pop("timeframe", "D1"))
+        metrics.__dict__.update(state)
+        return metrics
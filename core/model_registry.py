@@ -0,0 +1,101 @@
+import threading
+import time
+
+
+class ModelRegistry:
+    """
+    Carrega cada modelo só no primeiro uso e mantém em cache.
+    Os loaders são funções sem argumentos registradas por nome; preload() pode carregar
+    tudo em uma thread em segundo plano enquanto o chamador segue inicializando.
+    O carregamento de cada modelo é protegido por um lock próprio: duas threads pedindo
+    o mesmo modelo esperam um único carregamento.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._timings = {}
+        self._errors = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, loader):
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._models.pop(name, None)
+            self._errors.pop(name, None)
+
+    @property
+    def names(self):
+        return list(self._loaders)
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def get(self, name):
+        """Retorna o modelo, carregando-o na primeira chamada"""
+        if name in self._models:
+            return self._models[name]
+        if name not in self._loaders:
+            raise KeyError(f"Modelo não registrado: {name}. Registrados: {self.names}")
+
+        with self._locks[name]:
+            if name in self._models:  # carregado por outra thread enquanto esperava
+                return self._models[name]
+            started = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._errors[name] = e
+                print(f"❌ Erro ao carregar o modelo '{name}': {e}")
+                print("⚠️ Verifique os caminhos dos modelos e a configuração.")
+                raise
+            self._timings[name] = time.perf_counter() - started
+            self._errors.pop(name, None)
+            self._models[name] = model
+        return model
+
+    __getitem__ = get
+
+    def preload(self, names=None, background=True):
+        """
+        Carrega os modelos indicados (padrão: todos). Em segundo plano retorna a thread (daemon);
+        erros ficam em errors e o próximo get() do modelo tenta carregar de novo.
+        """
+        names = list(names or self._loaders)
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    if not background:
+                        raise
+
+        if not background:
+            load_all()
+            return None
+        thread = threading.Thread(target=load_all, name="model-preload", daemon=True)
+        thread.start()
+        return thread
+
+    def unload(self, name=None):
+        """Descarta um modelo (ou todos): o próximo get() recarrega do disco"""
+        with self._lock:
+            for key in ([name] if name else list(self._models)):
+                self._models.pop(key, None)
+                self._timings.pop(key, None)
+
+    @property
+    def timings(self):
+        """Segundos gastos carregando cada modelo já carregado"""
+        return dict(self._timings)
+
+    @property
+    def errors(self):
+        return dict(self._errors)
+
+    def summary(self):
+        loaded = ", ".join(f"{name} {seconds * 1000:.0f} ms" for name, seconds in self._timings.items())
+        return f"{len(self._models)}/{len(self._loaders)} modelos carregados" + (f" ({loaded})" if loaded else "")
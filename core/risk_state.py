@@ -0,0 +1,85 @@
+import numpy as np
+
+ROLLING_WINDOW = 10  # trades usados no rolling_loss_ratio
+RECENT_WINDOW = 3    # trades usados no recent_losses
+
+
+class RiskStateTracker:
+    """
+    Estado de risco alimentado incrementalmente, igual no backtest e no robô ao vivo.
+    Os resultados dos trades ficam em um buffer circular com contadores de perdas,
+    então cada trade fechado e cada consulta por candle custam O(1).
+
+    Features produzidas: capital, in_position, drawdown (em relação ao pico do capital),
+    recent_losses (perdas nos últimos 3 trades), rolling_loss_ratio (fração de perdas nos
+    últimos 10 trades), time_in_trade e time_since_last_trade (em candles).
+    """
+
+    def __init__(self, initial_capital, start_step=0, window=ROLLING_WINDOW, recent_window=RECENT_WINDOW):
+        if recent_window > window:
+            raise ValueError("recent_window não pode ser maior que window")
+        self.window = window
+        self.recent_window = recent_window
+        self._results = np.zeros(window, dtype=np.int8)  # 1 = perda
+        self._head = 0
+        self.n_results = 0
+        self.window_losses = 0
+        self.recent_losses = 0
+
+        self.capital = initial_capital
+        self.peak_capital = initial_capital
+        self.in_position = False
+        self.entry_step = None
+        self.last_trade_step = start_step
+
+    @property
+    def drawdown(self):
+        return (self.peak_capital - self.capital) / self.peak_capital if self.peak_capital > 0 else 0
+
+    @property
+    def rolling_loss_ratio(self):
+        return self.window_losses / self.n_results if self.n_results else 0
+
+    def update_capital(self, capital):
+        self.capital = capital
+        self.peak_capital = max(self.peak_capital, capital)
+
+    def on_trade_opened(self, step):
+        self.in_position = True
+        self.entry_step = step
+        self.last_trade_step = step
+
+    def on_trade_closed(self, pnl, step, capital=None):
+        loss = 1 if pnl < 0 else 0
+        # Remove das janelas o resultado que deixa de contar
+        if self.n_results == self.window:
+            self.window_losses -= int(self._results[self._head])
+        if self.n_results >= self.recent_window:
+            self.recent_losses -= int(self._results[(self._head - self.recent_window) % self.window])
+        self._results[self._head] = loss
+        self._head = (self._head + 1) % self.window
+        self.n_results = min(self.n_results + 1, self.window)
+        self.window_losses += loss
+        self.recent_losses += loss
+
+        self.in_position = False
+        self.entry_step = None
+        self.last_trade_step = step
+        if capital is not None:
+            self.update_capital(capital)
+
+    def state(self, step, profit_pct=0.0):
+        """
+        Features de risco no candle 'step'. Aceita um array de passos: projeta o estado
+        de vários candles seguidos sem novos trades (modo em lote do backtest).
+        """
+        return {
+            "capital": self.capital,
+            "in_position": int(self.in_position),
+            "drawdown": self.drawdown,
+            "time_in_trade": (step - self.entry_step) if self.in_position else 0,
+            "recent_losses": self.recent_losses,
+            "profit_pct": profit_pct,
+            "rolling_loss_ratio": self.rolling_loss_ratio,
+            "time_since_last_trade": step - self.last_trade_step
+        }
@@ -0,0 +1,231 @@
+import math
+from collections import deque
+import numpy as np
+
+# Janelas e períodos, os mesmos de data/utils/preprocess_mt5_data.add_indicators (biblioteca ta)
+EMA_SPANS = (12, 20, 26, 50)
+MACD_FAST, MACD_SLOW, MACD_SIGNAL = 12, 26, 9
+RSI_WINDOW = 14
+STOCH_WINDOW = 14
+ATR_WINDOW = 14
+VOLUME_SMA_WINDOW = 20
+# Candles até todas as features saírem do aquecimento (a EMA-50 é a mais longa)
+WARMUP_BARS = 50
+
+
+class _Ema:
+    """
+    ewm(span ou alpha, adjust=False, min_periods).mean() incremental, com a mesma aritmética do pandas.
+    Valores NaN no início são ignorados (a média começa no primeiro valor válido).
+    """
+
+    def __init__(self, span=None, alpha=None, min_periods=0):
+        self.alpha = alpha if alpha is not None else 2.0 / (span + 1.0)
+        self.min_periods = min_periods
+        self.value = math.nan
+        self.count = 0
+
+    def update(self, x):
+        if x != x:
+            pass
+        elif self.value != self.value:
+            self.value = x
+            self.count += 1
+        else:
+            old_wt = 1.0 - self.alpha
+            self.value = (old_wt * self.value + self.alpha * x) / (old_wt + self.alpha)
+            self.count += 1
+        return self.value if self.count >= self.min_periods else math.nan
+
+
+class _WilderAtr:
+    """AverageTrueRange do ta: 0 até a janela completar, média simples dos primeiros TRs e depois suavização de Wilder"""
+
+    def __init__(self, window):
+        self.window = window
+        self.first = []
+        self.value = 0.0
+
+    def update(self, true_range):
+        if self.first is not None:
+            self.first.append(true_range)
+            if len(self.first) == self.window:
+                # Mesma soma do pandas (numpy) na média inicial
+                self.value = float(np.asarray(self.first).sum()) / float(self.window)
+                self.first = None
+        else:
+            self.value = (self.value * (self.window - 1) + true_range) / float(self.window)
+        return self.value
+
+
+class _RollingMean:
+    """
+    rolling(window).mean() incremental: soma compensada (Neumaier) ao entrar/sair da janela, para
+    um valor extremo que sai da janela não deixar resíduo, e os mesmos ajustes do pandas
+    (janela de valores iguais, sinal do resultado).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque()
+        self.sum = 0.0
+        self.compensation = 0.0
+        self.neg_ct = 0
+        self.same_ct = 0
+        self.prev = math.nan
+
+    def _accumulate(self, x):
+        t = self.sum + x
+        if abs(self.sum) >= abs(x):
+            self.compensation += (self.sum - t) + x
+        else:
+            self.compensation += (x - t) + self.sum
+        self.sum = t
+
+    def _add(self, x):
+        self._accumulate(x)
+        if math.copysign(1.0, x) < 0:
+            self.neg_ct += 1
+        self.same_ct = self.same_ct + 1 if x == self.prev else 1
+        self.prev = x
+
+    def _remove(self, x):
+        self._accumulate(-x)
+        if math.copysign(1.0, x) < 0:
+            self.neg_ct -= 1
+
+    def update(self, x):
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(x)
+        self._add(x)
+        n = len(self.values)
+        if n < self.window:
+            return math.nan
+        if self.same_ct >= n:
+            return self.prev
+        result = (self.sum + self.compensation) / n
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == n and result > 0:
+            return 0.0
+        return result
+
+
+class _RollingExtreme:
+    """rolling(window).max() (ou .min() com sign=-1) com deque monotônica: O(1) amortizado por candle"""
+
+    def __init__(self, window, sign=1.0):
+        self.window = window
+        self.sign = sign
+        self.candidates = deque()  # (índice, valor) em ordem decrescente de sign * valor
+        self.count = 0
+
+    def update(self, x):
+        while self.candidates and self.sign * self.candidates[-1][1] <= self.sign * x:
+            self.candidates.pop()
+        self.candidates.append((self.count, x))
+        if self.candidates[0][0] <= self.count - self.window:
+            self.candidates.popleft()
+        self.count += 1
+        return self.candidates[0][1] if self.count >= self.window else math.nan
+
+
+def _divide(numerator, denominator):
+    """Divisão com a semântica do pandas para denominador zero (inf ou NaN em vez de exceção)"""
+    if denominator == 0:
+        return math.nan if numerator == 0 or numerator != numerator else math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class StreamingIndicators:
+    """
+    Indicadores de um ativo atualizados candle a candle em O(1): EMA 20/50, MACD (histograma), RSI,
+    estocástico %K, ATR, OBV e média do volume, mais volatility_stop, volatility_score e spread_pct.
+    Reproduz a última linha de data/utils/preprocess_mt5_data.add_indicators (biblioteca ta, a mesma do
+    parquet de treino) calculada sobre todo o histórico recebido, sem reconstruir DataFrames nem depender
+    do ta. Aquecer com warm_up(candles fechados) antes do primeiro candle ao vivo.
+    EMAs, RSI e ATR são recursivos e OBV é cumulativo: o valor depende do primeiro candle recebido
+    (ao vivo, o início do aquecimento; no parquet, o início do CSV). As médias recursivas convergem em
+    algumas centenas de candles; o OBV difere por uma constante (só as variações coincidem).
+    """
+
+    def __init__(self):
+        self.emas = {span: _Ema(span, min_periods=span) for span in EMA_SPANS}
+        self.macd_signal = _Ema(MACD_SIGNAL, min_periods=MACD_SIGNAL)
+        self.avg_gain = _Ema(alpha=1.0 / RSI_WINDOW, min_periods=RSI_WINDOW)
+        self.avg_loss = _Ema(alpha=1.0 / RSI_WINDOW, min_periods=RSI_WINDOW)
+        self.low_min = _RollingExtreme(STOCH_WINDOW, sign=-1.0)
+        self.high_max = _RollingExtreme(STOCH_WINDOW)
+        self.avg_true_range = _WilderAtr(ATR_WINDOW)
+        self.volume_sma = _RollingMean(VOLUME_SMA_WINDOW)
+        self.prev_close = math.nan
+        self.obv = 0.0
+        self.count = 0
+        self.last = None
+
+    @property
+    def ready(self):
+        """True depois de WARMUP_BARS candles (todas as janelas completas)"""
+        return self.count >= WARMUP_BARS
+
+    def update(self, candle):
+        """Processa um candle fechado (dict com open/high/low/close, tick_volume ou volume, spread) e retorna as features"""
+        high, low, close = float(candle["high"]), float(candle["low"]), float(candle["close"])
+        volume = float(candle.get("tick_volume", candle.get("volume", 0.0)))
+        spread = float(candle.get("spread", 0.0))
+        ema = {span: self.emas[span].update(close) for span in EMA_SPANS}
+
+        macd_line = ema[MACD_FAST] - ema[MACD_SLOW]
+        macd = macd_line - self.macd_signal.update(macd_line)
+
+        prev_close = self.prev_close
+        if prev_close == prev_close:
+            delta = close - prev_close
+            true_range = max(high - low, abs(high - prev_close), abs(low - prev_close))
+        else:
+            delta = 0.0  # diff() do primeiro candle: o ta o trata como variação nula no RSI
+            true_range = high - low
+        avg_gain = self.avg_gain.update(delta if delta > 0 else 0.0)
+        avg_loss = self.avg_loss.update(-delta if delta < 0 else 0.0)
+        if avg_loss != avg_loss:
+            rsi = math.nan
+        elif avg_loss == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+        # OBV na convenção da biblioteca ta (parquet de treino): soma o volume também no primeiro candle e
+        # quando o fechamento se repete; só fechamento menor subtrai
+        self.obv += -volume if close < prev_close else volume
+
+        low_14 = self.low_min.update(low)
+        high_14 = self.high_max.update(high)
+        atr = self.avg_true_range.update(true_range)
+
+        features = dict(candle)
+        features["tick_volume"] = candle.get("tick_volume", volume)
+        features.update({
+            "ema_20": ema[20],
+            "ema_50": ema[50],
+            "macd": macd,
+            "rsi": rsi,
+            "stoch_k": _divide(100 * (close - low_14), high_14 - low_14),
+            "atr": atr,
+            "obv": int(self.obv),
+            "volume_sma_20": self.volume_sma.update(volume),
+            "volatility_stop": close - 2 * atr,
+            "volatility_score": atr / close,
+            "spread_pct": spread / close,
+        })
+        self.prev_close = close
+        self.count += 1
+        self.last = features
+        return features
+
+    def warm_up(self, candles):
+        """Aquece com o histórico (lista de dicts ou DataFrame, do mais antigo ao mais recente); retorna as últimas features"""
+        if hasattr(candles, "to_dict"):
+            candles = candles.to_dict("records")
+        for candle in candles:
+            self.update(candle)
+        return self.last
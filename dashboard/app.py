@@ -1,6 +1,7 @@
 from flask import Flask, render_template, jsonify
 import json
 from live_trading.mt5_trader import get_lot_limits
+from core.decision_store import load_snapshots
 
 app = Flask(__name__)
 
@@ -20,6 +21,9 @@ def data():
     positions = load_json("position_state.json")
     risk = load_json("risk_state.json")
     decision = load_json("last_decision.json")
+    decisions = load_snapshots()  # última decisão de cada ativo
+    metrics = load_json("live_metrics.json").get("snapshot", {})
+    latency = load_json("latency.json").get("stages", {})  # gravado pelo robô com general.latency_timers
     # Lista de trades em andamento
     open_trades = []
     lot_limits = {}
@@ -33,7 +37,10 @@ def data():
         "open_trades": open_trades,
         "risk": risk,
         "decision": decision,
-        "lot_limits": lot_limits
+        "decisions": decisions,
+        "lot_limits": lot_limits,
+        "metrics": metrics,
+        "latency": latency
     })
 
 if __name__ == "__main__":
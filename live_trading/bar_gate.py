@@ -0,0 +1,46 @@
+import time
+
+# Duração de cada timeframe do MT5 em segundos
+TIMEFRAME_SECONDS = {"M1": 60, "M5": 300, "M15": 900, "M30": 1800, "H1": 3600, "H4": 14400, "D1": 86400}
+# Folga após o fechamento do candle para o terminal publicar a barra
+BAR_CLOSE_DELAY = 2
+
+
+class BarGate:
+    """
+    Garante que cada candle fechado de cada símbolo é processado uma única vez (chave: timestamp).
+    Candles repetidos ou mais antigos que o último aceito são descartados antes de chegar
+    ao buffer de preços, aos modelos ou às chamadas à corretora.
+    """
+
+    def __init__(self, timeframe="M15"):
+        self.timeframe = timeframe
+        self.seconds = TIMEFRAME_SECONDS.get(timeframe, TIMEFRAME_SECONDS["M15"])
+        self.last_timestamp = {}
+        self.accepted = 0
+        self.duplicates = 0
+
+    def accept(self, symbol, candle):
+        """True (e marca o candle como visto) se for um candle novo do símbolo"""
+        if candle is None:
+            return False
+        timestamp = candle["timestamp"]
+        if timestamp <= self.last_timestamp.get(symbol, -1):
+            self.duplicates += 1
+            return False
+        self.last_timestamp[symbol] = timestamp
+        self.accepted += 1
+        return True
+
+    def seconds_until_next_close(self, now=None):
+        """
+        Segundos até o próximo fechamento de candle (mais a folga). Alinhado ao relógio local:
+        vale para fusos do servidor deslocados em horas inteiras (timeframes até H1).
+        """
+        now = time.time() if now is None else now
+        return self.seconds - (now % self.seconds) + BAR_CLOSE_DELAY
+
+    def summary(self):
+        total = self.accepted + self.duplicates
+        skipped = self.duplicates / total if total else 0.0
+        return f"🕯️ Candles novos: {self.accepted} | repetidos ignorados: {self.duplicates} ({skipped:.0%})"
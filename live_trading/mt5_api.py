@@ -48,28 +48,41 @@ def disconnect():
         _connected = False
         print("🔌 Desconectado do MetaTrader 5")
 
-def get_latest_candle(symbol: str, interval="M15") -> dict:
-    """Obtém o último candle de um símbolo"""
+# Mapeia timeframe string para constante MT5
+TIMEFRAME_MAP = {
+    "M1": mt5.TIMEFRAME_M1, "M5": mt5.TIMEFRAME_M5,
+    "M15": mt5.TIMEFRAME_M15, "M30": mt5.TIMEFRAME_M30,
+    "H1": mt5.TIMEFRAME_H1, "H4": mt5.TIMEFRAME_H4,
+    "D1": mt5.TIMEFRAME_D1
+}
+
+def get_latest_candle(symbol: str, interval="M15", closed=False) -> dict:
+    """Obtém o último candle de um símbolo (closed=True: o último já fechado, não o que está em formação)"""
     if not connect():
         return None
     
-    # Mapeia timeframe string para constante MT5
-    timeframe_map = {
-        "M1": mt5.TIMEFRAME_M1, "M5": mt5.TIMEFRAME_M5, 
-        "M15": mt5.TIMEFRAME_M15, "M30": mt5.TIMEFRAME_M30,
-        "H1": mt5.TIMEFRAME_H1, "H4": mt5.TIMEFRAME_H4, 
-        "D1": mt5.TIMEFRAME_D1
-    }
-    
-    timeframe = timeframe_map.get(interval, mt5.TIMEFRAME_M15)
+    timeframe = TIMEFRAME_MAP.get(interval, mt5.TIMEFRAME_M15)
     
-    # Obtém o último candle
-    rates = mt5.copy_rates_from_pos(symbol, timeframe, 0, 1)
+    # Obtém o último candle (posição 0 é o candle em formação)
+    rates = mt5.copy_rates_from_pos(symbol, timeframe, 1 if closed else 0, 1)
     if rates is None or len(rates) == 0:
         print(f"❌ Erro ao obter dados para {symbol}")
         return None
     
-    candle = rates[0]
+    return _candle_dict(rates[0])
+
+def get_closed_candles(symbol: str, interval="M15", n=500) -> list:
+    """Os últimos n candles fechados (do mais antigo ao mais recente), para aquecer os indicadores"""
+    if not connect():
+        return []
+    timeframe = TIMEFRAME_MAP.get(interval, mt5.TIMEFRAME_M15)
+    rates = mt5.copy_rates_from_pos(symbol, timeframe, 1, n)
+    if rates is None or len(rates) == 0:
+        print(f"❌ Erro ao obter histórico para {symbol}")
+        return []
+    return [_candle_dict(candle) for candle in rates]
+
+def _candle_dict(candle) -> dict:
     return {
         "open": float(candle["open"]),
         "high": float(candle["high"]),
@@ -5,15 +5,20 @@ from config.config import load_config
 from datetime import datetime
 import MetaTrader5 as mt5
 from live_trading.mt5_api import connect as connect_mt5, disconnect as disconnect_mt5, get_latest_candle, get_config
+from live_trading.symbol_cache import symbol_cache
+
+# Retornos do order_send que indicam metadados do símbolo desatualizados no cache
+STALE_SYMBOL_RETCODES = ("TRADE_RETCODE_INVALID_VOLUME", "TRADE_RETCODE_INVALID_FILL", "TRADE_RETCODE_INVALID_STOPS")
 
 def get_lot_limits(symbol):
-    info = mt5.symbol_info(symbol)
-    if info is None:
-        return 0.01, 100.0, 0.01  # defaults
-    return info.volume_min, info.volume_max, info.volume_step
+    return symbol_cache.lot_limits(symbol)
 
-def place_market_order(symbol: str, side: str, quantity: float):
-    """Executa ordem de mercado no MT5"""
+def place_market_order(symbol: str, side: str, quantity: float, decision: dict = None):
+    """
+    Executa ordem de mercado no MT5.
+    SL/TP vêm dos percentuais da decisão do modelo ('decision'); sem ela, da última decisão
+    do símbolo em memória (core.logic.decision_store).
+    """
     if not connect_mt5():
         return None
     
@@ -34,8 +39,14 @@ def place_market_order(symbol: str, side: str, quantity: float):
     # Determina tipo de ordem
     order_type = mt5.ORDER_TYPE_BUY if side == "BUY" else mt5.ORDER_TYPE_SELL
 
+    # Metadados do ativo (limites de lote, modos de preenchimento, ponto) do cache
+    symbol_info = symbol_cache.get(symbol)
+    if symbol_info is None:
+        print(f"Erro: Não foi possível obter informações do símbolo {symbol}")
+        return None
+
     # Ajusta o volume para os limites do ativo
-    min_lot, max_lot, lot_step = get_lot_limits(symbol)
+    min_lot, max_lot, lot_step = symbol_info.volume_min, symbol_info.volume_max, symbol_info.volume_step
     # Corrige para múltiplo do step
     adj_qty = max(min_lot, min(max_lot, round(quantity / lot_step) * lot_step))
     if (adj_qty - min_lot) % lot_step != 0:
@@ -46,11 +57,7 @@ def place_market_order(symbol: str, side: str, quantity: float):
         print(f"❌ Volume ajustado ({adj_qty}) fora dos limites do ativo {symbol} (min: {min_lot}, max: {max_lot}, step: {lot_step})")
         return None
 
-    # Obtém os modos de preenchimento permitidos para o símbolo
-    symbol_info = mt5.symbol_info(symbol)
-    if symbol_info is None:
-        print(f"Erro: Não foi possível obter informações do símbolo {symbol}")
-        return None
+    # Modos de preenchimento permitidos para o símbolo
     allowed_filling_modes = symbol_info.filling_mode
 
     # Lista de modos suportados pelo MetaTrader 5
@@ -70,20 +77,18 @@ def place_market_order(symbol: str, side: str, quantity: float):
         disconnect_mt5()
         return None
 
-    # Obtém o tamanho do ponto do ativo
-    point = mt5.symbol_info(symbol).point if mt5.symbol_info(symbol) else 0.0
+    # Tamanho do ponto do ativo
+    point = symbol_info.point
 
-    # --- NOVO BLOCO: lê os percentuais do modelo ---
-    import json
-    try:
-        with open("d:/forex_trader_ai/last_decision.json", "r") as f:
-            decision = json.load(f)
-        stop_loss_pct = decision.get("stop_loss_pct", 0.0)
-        take_profit_pct = decision.get("take_profit_pct", 0.0)
-    except Exception as e:
-        print(f"Erro ao ler last_decision.json: {e}")
-        stop_loss_pct = 0.0
-        take_profit_pct = 0.0
+    # Percentuais de SL/TP do modelo
+    if decision is None:
+        from core.logic import decision_store
+        decision = decision_store.get(symbol)
+    if decision is None:
+        print(f"⚠️ Nenhuma decisão do modelo para {symbol}: ordem sem SL/TP")
+        decision = {}
+    stop_loss_pct = decision.get("stop_loss_pct", 0.0)
+    take_profit_pct = decision.get("take_profit_pct", 0.0)
 
     # Calcula SL e TP conforme o lado da ordem
     if side == "BUY":
@@ -117,6 +122,9 @@ def place_market_order(symbol: str, side: str, quantity: float):
             return None
         if result.retcode != mt5.TRADE_RETCODE_DONE:
             print(f"❌ Erro na ordem: {result.comment}")
+            if any(result.retcode == getattr(mt5, name, None) for name in STALE_SYMBOL_RETCODES):
+                # Volume, preenchimento ou stops recusados: recarrega os metadados na próxima ordem
+                symbol_cache.invalidate(symbol)
             return None
         print(f"✅ Ordem executada: {side} {adj_qty} {symbol}")
         return {
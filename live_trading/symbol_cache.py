@@ -0,0 +1,64 @@
+import threading
+import time
+from collections import namedtuple
+import MetaTrader5 as mt5
+from live_trading.mt5_api import get_config
+
+# Segundos até os metadados de um símbolo serem consultados de novo no terminal
+SYMBOL_CACHE_TTL = 300
+DEFAULT_LOT_LIMITS = (0.01, 100.0, 0.01)
+
+SymbolMeta = namedtuple("SymbolMeta", ["symbol", "volume_min", "volume_max", "volume_step", "point", "digits",
+                                       "filling_mode"])
+
+
+class SymbolCache:
+    """
+    Metadados dos símbolos (limites de lote, ponto, dígitos, modos de preenchimento) com TTL.
+    Uma consulta a mt5.symbol_info por símbolo a cada 'ttl' segundos em vez de uma por decisão/ordem.
+    Símbolos sem resposta do terminal não são guardados: a próxima chamada tenta de novo.
+    """
+
+    def __init__(self, ttl=None, fetch=None):
+        self.ttl = ttl if ttl is not None else get_config().get("mt5", {}).get("symbol_cache_ttl", SYMBOL_CACHE_TTL)
+        self._fetch = fetch or mt5.symbol_info
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, symbol):
+        """SymbolMeta do símbolo ou None se o terminal não o conhece"""
+        entry = self._entries.get(symbol)
+        if entry is not None and time.monotonic() - entry[1] < self.ttl:
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        info = self._fetch(symbol)
+        if info is None:
+            return None
+        meta = SymbolMeta(symbol, info.volume_min, info.volume_max, info.volume_step, info.point, info.digits,
+                          info.filling_mode)
+        with self._lock:
+            self._entries[symbol] = (meta, time.monotonic())
+        return meta
+
+    def lot_limits(self, symbol):
+        """(volume_min, volume_max, volume_step); defaults se o símbolo não for encontrado"""
+        meta = self.get(symbol)
+        if meta is None:
+            return DEFAULT_LOT_LIMITS
+        return meta.volume_min, meta.volume_max, meta.volume_step
+
+    def invalidate(self, symbol=None):
+        """Descarta um símbolo (ou todos): a próxima consulta vai ao terminal"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+
+# Cache compartilhado pelo processo (robô, dashboard, backtest)
+symbol_cache = SymbolCache()
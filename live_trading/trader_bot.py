@@ -1,12 +1,14 @@
 import time
 from config.config import load_config
-from live_trading.mt5_api import get_latest_candle
+from live_trading.mt5_api import get_latest_candle, get_closed_candles
+from live_trading.bar_gate import BarGate
 from live_trading.mt5_trader import place_market_order, get_balance
-from core.signals import add_indicators
-from core.logic import run_autonomous_decision
+from core.streaming_indicators import StreamingIndicators
+from core.logic import run_autonomous_decisions, models, latency
 from live_trading.risk_guard import RiskGuard
+from core.metrics import StreamingMetrics
+from core.risk_state import RiskStateTracker
 from live_trading.state_manager import save_position_state, load_position_state
-import pandas as pd
 from live_trading.telegram_control import start_telegram_thread, is_paused, is_running
 
 state = load_position_state()
@@ -41,8 +43,18 @@ interval = cfg["general"]["timeframe"]
 capital = cfg["trading"]["initial_capital"]
 min_conf = cfg["trading"]["min_confidence"]
 
-price_buffers = {symbol: [] for symbol in symbols}  # Histórico para cada ativo
-MAX_BUFFER = 5
+# Métricas ao vivo (equity da conta a cada ciclo, retorno % a cada trade fechado)
+try:
+    live_metrics = StreamingMetrics.load("live_metrics.json")
+    print("🔄 Métricas ao vivo carregadas.")
+except FileNotFoundError:
+    live_metrics = StreamingMetrics(timeframe=interval)
+
+# Indicadores incrementais por ativo (O(1) por candle), aquecidos com o histórico do MT5
+indicators = {symbol: StreamingIndicators() for symbol in symbols}
+HISTORY_BARS = 500
+# Cada candle fechado passa uma única vez pelos modelos (candles repetidos são descartados)
+bar_gate = BarGate(interval)
 
 # Estado por ativo
 state = {symbol: {
@@ -55,11 +67,43 @@ state = {symbol: {
     "profit_pct": 0
 } for symbol in symbols}
 
+# Features de risco por ativo, calculadas como no backtest (passos = candles processados)
+risk_states = {symbol: RiskStateTracker(capital) for symbol in symbols}
+bar_index = {symbol: 0 for symbol in symbols}
+
+def warm_up_indicators():
+    """Aquece os indicadores de cada ativo com os últimos candles fechados"""
+    for symbol in symbols:
+        candles = get_closed_candles(symbol, interval, HISTORY_BARS)
+        indicators[symbol].warm_up(candles)
+        if candles:
+            bar_gate.accept(symbol, candles[-1])  # o último candle do histórico não volta a ser processado
+        print(f"📈 [{symbol}] Indicadores aquecidos com {len(candles)} candles")
+
+def catch_up(symbol, candle):
+    """
+    Alimenta os indicadores com os candles perdidos entre o último processado e 'candle'
+    (robô pausado, falha de conexão). Retorna as features do candle atual.
+    """
+    engine = indicators[symbol]
+    last = engine.last["timestamp"] if engine.last else None
+    if last is not None and candle["timestamp"] - last > bar_gate.seconds:
+        missing = (candle["timestamp"] - last) // bar_gate.seconds
+        for past in get_closed_candles(symbol, interval, min(missing, HISTORY_BARS)):
+            if last < past["timestamp"] < candle["timestamp"]:
+                engine.update(past)
+    return engine.update(candle)
+
 def run_trader_bot():
     print("🤖 Robô iniciado em tempo real (MT5 PAPER TRADING)...")
     global state
 
+    # Modelos carregam em segundo plano enquanto o Telegram e o primeiro candle são preparados
+    preload = models.preload()
     start_telegram_thread()  # Inicia o controle do Telegram
+    warm_up_indicators()
+    preload.join()
+    print(f"🧠 {models.summary()}")
 
     while True:
         # Checa se o bot deve ser parado
@@ -73,52 +117,74 @@ def run_trader_bot():
             time.sleep(10)
             continue
 
+        # BLOQUEIOS DE RISCO (uma vez por ciclo, antes de consumir candles)
+        blocked_reason = risk_guard.is_blocked()
+        if blocked_reason:
+            print(f"🚫 ROBÔ BLOQUEADO: {blocked_reason}")
+            return
+
+        if risk_guard.check_cooldown():
+            # Os candles do intervalo ficam para catch_up quando o cooldown acabar
+            print("🕒 Cooldown ativo. Aguardando...")
+            time.sleep(bar_gate.seconds_until_next_close())
+            continue
+
+        # 1) Coleta o último candle fechado e o estado de cada ativo (só candles novos)
+        ready = []
         for symbol in symbols:
-            candle = get_latest_candle(symbol, interval)
-            price_buffers[symbol].append(candle)
-
-            # BLOQUEIOS DE RISCO
-            blocked_reason = risk_guard.is_blocked()
-            if blocked_reason:
-                print(f"🚫 ROBÔ BLOQUEADO: {blocked_reason}")
-                return
-
-            if risk_guard.check_cooldown():
-                print("🕒 Cooldown ativo. Aguardando...")
-                time.sleep(60)
+            candle = get_latest_candle(symbol, interval, closed=True)
+            if not bar_gate.accept(symbol, candle):
                 continue
+            latest = catch_up(symbol, candle)
 
-            if len(price_buffers[symbol]) < MAX_BUFFER:
+            if not indicators[symbol].ready:
                 print(f"⌛ [{symbol}] Aguardando dados suficientes...")
-                time.sleep(1)
                 continue
 
-            buffer_slice = price_buffers[symbol][-MAX_BUFFER:]
-            filtered_buffer = [x for x in buffer_slice if x is not None]
-            df = pd.DataFrame(filtered_buffer)
-            df = add_indicators(df)
-            latest = df.iloc[-1].to_dict()
+            latest = dict(latest)
+            latest["symbol"] = symbol  # histórico do modelo de mercado e limites de lote por ativo
+
+            bar_index[symbol] += 1
+            step = bar_index[symbol]
+            tracker = risk_states[symbol]
+            state[symbol].update(tracker.state(step, state[symbol]["profit_pct"]))
+            ready.append((symbol, latest, step))
 
-            decision = run_autonomous_decision(latest, state[symbol])
+        if not ready:
+            # Nenhum candle novo: sem modelos nem chamadas à corretora até o próximo fechamento
+            time.sleep(bar_gate.seconds_until_next_close())
+            continue
 
+        # 2) Uma chamada de cada modelo para todos os ativos do ciclo
+        decisions = run_autonomous_decisions([latest for _, latest, _ in ready],
+                                             [state[symbol] for symbol, _, _ in ready])
+
+        # 3) Executa as ordens
+        for (symbol, latest, step), decision in zip(ready, decisions):
+            tracker = risk_states[symbol]
             if not state[symbol]["in_position"] and decision["final_decision"] == "buy":
                 usd_balance = get_balance("USD")
                 if decision["confidence"] >= min_conf and usd_balance > 10:
                     qty = decision["position_size"]  # agora já é lotes
-                    order = place_market_order(symbol, "BUY", round(qty, 2))
+                    order = place_market_order(symbol, "BUY", round(qty, 2), decision=decision)
                     if order:
                         state[symbol]["in_position"] = True
                         state[symbol]["entry_price"] = latest["close"]
                         state[symbol]["time_in_trade"] = 0
                         state[symbol]["profit_pct"] = 0.0
+                        tracker.on_trade_opened(step)
                         save_position_state(state)
                         print(f"🟢 [{symbol}] COMPRA executada: {qty:.4f} @ {latest['close']:.5f}")
 
             elif state[symbol]["in_position"] and decision["final_decision"] in ["sell", "partial_exit"]:
                 balance = get_balance(symbol)
                 if balance > 0.0001:
-                    order = place_market_order(symbol, "SELL", round(balance, 6))
+                    balance_before = get_balance("USD")
+                    order = place_market_order(symbol, "SELL", round(balance, 6), decision=decision)
                     if order:
+                        # Resultado realizado em USD (variação do saldo no fechamento), como o pnl do backtest
+                        pnl_usd = get_balance("USD") - balance_before
+                        entry_price = state[symbol]["entry_price"]
                         state[symbol]["in_position"] = False
                         state[symbol]["entry_price"] = 0.0
                         state[symbol]["time_in_trade"] = 0
@@ -126,20 +192,30 @@ def run_trader_bot():
                         save_position_state(state)
                         print(f"🔴 [{symbol}] VENDA executada @ {latest['close']:.5f}")
 
-                        profit_pct = (latest["close"] - state[symbol]["entry_price"]) / state[symbol]["entry_price"]
+                        profit_pct = (latest["close"] - entry_price) / entry_price
                         risk_guard.update_after_trade(profit_pct)
                         risk_guard.save("risk_state.json")
+                        live_metrics.update_trade(pnl_usd)
+                        tracker.on_trade_closed(profit_pct, step)
 
                         if profit_pct < 0:
-                            print(f"📉 [{symbol}] PERDA: {profit_pct*100:.2f}% | DD: {risk_guard.drawdown*100:.2f}%")
+                            print(f"📉 [{symbol}] PERDA: {profit_pct*100:.2f}% ({pnl_usd:.2f} USD) | DD: {risk_guard.drawdown*100:.2f}%")
                         else:
-                            print(f"📈 [{symbol}] LUCRO: {profit_pct*100:.2f}%")
+                            print(f"📈 [{symbol}] LUCRO: {profit_pct*100:.2f}% ({pnl_usd:.2f} USD)")
 
             # Atualização do tempo em posição
             if state[symbol]["in_position"]:
-                state[symbol]["time_in_trade"] += 1
+                state[symbol]["time_in_trade"] = step - tracker.entry_step
                 entry = state[symbol]["entry_price"]
                 state[symbol]["profit_pct"] = (latest["close"] - entry) / entry
                 save_position_state(state)
 
-        time.sleep(60)  # aguarda o próximo candle
+        usd_balance = get_balance("USD")
+        for tracker in risk_states.values():
+            tracker.update_capital(usd_balance)
+        live_metrics.update_equity(usd_balance)
+        live_metrics.save("live_metrics.json")
+        latency.maybe_report()  # linha de p50/p95/p99 por etapa e latency.json (se general.latency_timers)
+        print(bar_gate.summary())
+
+        time.sleep(bar_gate.seconds_until_next_close())  # aguarda o fechamento do próximo candle
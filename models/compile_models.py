@@ -0,0 +1,99 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import argparse
+import time
+import warnings
+import joblib
+import numpy as np
+from config.config import load_config
+from core.compiled_forest import CompiledModel, compiled_path, export_model
+
+cfg = load_config()
+
+# Modelos scikit-learn usados pelo core.logic (o mapa de labels e o LSTM ficam de fora)
+COMPILED_MODELS = ("risk_action", "risk_level", "position_size", "stop_loss", "take_profit", "strategy_exec")
+EXEC_MODELS = ("strategy_exec",)
+_feature_matrices = {}
+
+
+def _feature_matrix(group, data_path, seed):
+    """Entradas reais de um grupo de modelos, geradas como no treino (uma vez por execução)"""
+    if group not in _feature_matrices:
+        np.random.seed(seed)
+        if group == "exec":
+            from models.strategy_execution.exec_dataset import generate_exec_dataset_from_market
+            X = generate_exec_dataset_from_market(data_path)["X"]
+        else:
+            from models.risk_management.risk_dataset import generate_risk_dataset_from_market_data
+            X = generate_risk_dataset_from_market_data(data_path)["X_test"]
+        _feature_matrices[group] = X
+    return _feature_matrices[group]
+
+
+def _check_rows(name, model, n_rows, seed=42):
+    """
+    Linhas de teste com as distribuições do treino: amostra das matrizes de features geradas pelos
+    datasets de risco/execução a partir do parquet (limiares das árvores que as decisões reais atingem).
+    Sem o parquet, linhas aleatórias.
+    """
+    columns = getattr(model, "feature_names_in_", None)
+    data_path = cfg["general"].get("data_path")
+    if data_path and os.path.exists(data_path):
+        X = _feature_matrix("exec" if name in EXEC_MODELS else "risk", data_path, seed)
+        if columns is not None:
+            X = X[list(columns)]
+        X = X.replace([np.inf, -np.inf], np.nan).fillna(0).to_numpy(dtype=np.float64)
+        return X[np.random.default_rng(seed).choice(len(X), min(n_rows, len(X)), replace=False)]
+    print(f"⚠️ {data_path} não encontrado: conferindo {name} com linhas aleatórias.")
+    return np.random.default_rng(seed).normal(size=(n_rows, model.n_features_in_))
+
+
+def _latency_ms(predict, row, repeats=200):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        predict(row)
+    return (time.perf_counter() - started) * 1000 / repeats
+
+
+def compile_model(name, n_check=2000):
+    """Exporta um modelo para .npz e confere se as previsões batem com as do sklearn"""
+    path = cfg["model_paths"][name]
+    if not os.path.exists(path):
+        print(f"⚠️ {name}: {path} não encontrado, ignorado.")
+        return None
+    model = joblib.load(path)
+    out_path = compiled_path(path)
+    size = export_model(model, out_path)
+    compiled = CompiledModel.load(out_path)
+
+    X = _check_rows(name, model, n_check)
+    with warnings.catch_warnings():
+        # Os arrays seguem a ordem de feature_names_in_ (acima); o aviso do sklearn só vale dentro deste bloco
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        expected, got = model.predict(X), compiled.predict(X)
+        single_ok = all(np.array_equal(model.predict(X[i:i + 1]), compiled.predict(X[i:i + 1]))
+                        for i in range(min(50, len(X))))
+        if compiled.kind == "forest_classifier":
+            exact = np.array_equal(expected, got) and np.array_equal(model.predict_proba(X), compiled.predict_proba(X))
+        else:
+            exact = np.allclose(expected, got, rtol=1e-12, atol=1e-12)
+        row = X[:1]
+        sk_ms, np_ms = _latency_ms(model.predict, row), _latency_ms(compiled.predict, row)
+    if not (exact and single_ok):
+        os.remove(out_path)
+        raise ValueError(f"Previsões do modelo compilado '{name}' divergem do sklearn; artefato descartado")
+
+    print(f"✅ {name}: {compiled.kind}, {compiled.n_nodes} nós, {size / 1024:.0f} KB -> {out_path}")
+    print(f"   Latência (1 linha): sklearn {sk_ms:.3f} ms | compilado {np_ms:.3f} ms")
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compila os modelos scikit-learn em arrays NumPy (.npz)")
+    parser.add_argument("--models", nargs="+", default=list(COMPILED_MODELS), choices=COMPILED_MODELS)
+    parser.add_argument("--check-rows", type=int, default=2000, help="Linhas usadas para conferir as previsões")
+    args = parser.parse_args()
+    for model_name in args.models:
+        compile_model(model_name, args.check_rows)
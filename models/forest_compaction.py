@@ -0,0 +1,171 @@
+import os
+import copy
+import pickle
+import tempfile
+import time
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from config.config import load_config
+from core.compiled_forest import CompiledModel, export_model
+
+cfg = load_config()
+
+# Padrões da compactação (sobrescritos pela seção compaction do settings.yaml)
+DEFAULT_COMPACTION = {
+    "enabled": True,
+    "f1_tolerance": 0.005,
+    "n_estimators": [10, 25, 50],
+    "max_depth": [6, 8, 10, 12],
+    "validation_size": 0.2,
+}
+
+
+def compaction_config():
+    return {**DEFAULT_COMPACTION, **(cfg.get("compaction") or {})}
+
+
+def _f1(model, X, y):
+    return f1_score(y, model.predict(X), average="weighted", zero_division=0)
+
+
+def _n_nodes(model):
+    return sum(tree.tree_.node_count for tree in model.estimators_)
+
+
+def _latency_ms(predict, row, repeats=50):
+    predict(row)
+    started = time.perf_counter()
+    for _ in range(repeats):
+        predict(row)
+    return (time.perf_counter() - started) * 1000 / repeats
+
+
+def forest_stats(model, X):
+    """Tamanho e custo de uma floresta: nós, pickle, tempo de carga e latência de uma linha (sklearn e compilada)"""
+    blob = pickle.dumps(model)
+    started = time.perf_counter()
+    pickle.loads(blob)
+    load_ms = (time.perf_counter() - started) * 1000
+    row = X[:1]
+    with tempfile.TemporaryDirectory() as tmp:
+        npz_path = os.path.join(tmp, "model.npz")
+        npz_kb = export_model(model, npz_path) / 1024
+        compiled = CompiledModel.load(npz_path)
+    return {
+        "trees": len(model.estimators_),
+        "max_depth": max(tree.tree_.max_depth for tree in model.estimators_),
+        "nodes": _n_nodes(model),
+        "pickle_kb": len(blob) / 1024,
+        "npz_kb": npz_kb,
+        "load_ms": load_ms,
+        "sklearn_ms": _latency_ms(model.predict, row),
+        "compiled_ms": _latency_ms(compiled.predict, np.asarray(row, dtype=np.float64)),
+    }
+
+
+def _pruned_forests(model, X_val, y_val, sizes):
+    """Subconjuntos da floresta original: as k árvores com melhor F1 individual na validação"""
+    scores = [
+        f1_score(y_val, model.classes_.take(np.argmax(tree.predict_proba(np.asarray(X_val)), axis=1)),
+                 average="weighted", zero_division=0)
+        for tree in model.estimators_
+    ]
+    ranking = np.argsort(scores)[::-1]
+    for k in sizes:
+        if k >= len(model.estimators_):
+            continue
+        pruned = copy.copy(model)
+        pruned.estimators_ = [model.estimators_[i] for i in ranking[:k]]
+        pruned.n_estimators = k
+        yield f"poda {k} árvores", pruned
+
+
+def _distilled_forests(model, X_fit, sizes, depths):
+    """Florestas menores (menos árvores, profundidade limitada) treinadas nas previsões do modelo original"""
+    teacher_labels = model.predict(X_fit)
+    for n_estimators in sizes:
+        for max_depth in depths:
+            if n_estimators >= len(model.estimators_) and max_depth >= max(t.tree_.max_depth for t in model.estimators_):
+                continue
+            student = clone(model).set_params(n_estimators=n_estimators, max_depth=max_depth)
+            student.fit(X_fit, teacher_labels)
+            yield f"destilação {n_estimators} árvores, profundidade {max_depth}", student
+
+
+def compact_forest(model, X_fit, X_val, y_val, tolerance=None, sizes=None, depths=None):
+    """
+    Procura a menor floresta (em número de nós) cujo F1-weighted em (X_val, y_val) fica a no máximo
+    'tolerance' do modelo original. Candidatos: poda das árvores menos precisas e destilação em
+    florestas menores com profundidade limitada, treinadas em X_fit com os rótulos do modelo original.
+    (X_val, y_val) deve ser uma validação separada do treino, nunca o conjunto de teste (validation_split).
+    Retorna (modelo escolhido, relatório); se nenhum candidato respeita a tolerância, o original.
+    """
+    options = compaction_config()
+    tolerance = options["f1_tolerance"] if tolerance is None else tolerance
+    sizes = sorted(sizes or options["n_estimators"])
+    depths = sorted(depths or options["max_depth"])
+
+    base_f1 = _f1(model, X_val, y_val)
+    best, best_name, best_f1 = model, "original", base_f1
+    candidates = [("original", base_f1, _n_nodes(model))]
+    for name, candidate in [*_pruned_forests(model, X_val, y_val, sizes), *_distilled_forests(model, X_fit, sizes, depths)]:
+        score = _f1(candidate, X_val, y_val)
+        nodes = _n_nodes(candidate)
+        candidates.append((name, score, nodes))
+        if score >= base_f1 - tolerance and nodes < _n_nodes(best):
+            best, best_name, best_f1 = candidate, name, score
+
+    report = {
+        "chosen": best_name,
+        "f1_original": base_f1,
+        "f1_compacted": best_f1,
+        "tolerance": tolerance,
+        "candidates": candidates,
+        "before": forest_stats(model, X_val),
+        "after": forest_stats(best, X_val) if best is not model else None,
+    }
+    return best, report
+
+
+def print_compaction_report(label, report):
+    print(f"🗜️ Compactação ({label}): F1 original na validação {report['f1_original']:.4f}, "
+          f"tolerância {report['tolerance']:.4f}")
+    for name, score, nodes in report["candidates"]:
+        print(f"  {name}: F1 {score:.4f} | {nodes} nós")
+    before, after = report["before"], report["after"] or report["before"]
+    print(f"✅ Escolhido: {report['chosen']} (F1 {report['f1_compacted']:.4f})")
+    for key, title in (("trees", "Árvores"), ("max_depth", "Profundidade máx."), ("nodes", "Nós"),
+                       ("pickle_kb", "Pickle (KB)"), ("npz_kb", "Compilado .npz (KB)"), ("load_ms", "Carga (ms)"),
+                       ("sklearn_ms", "Latência sklearn (ms)"), ("compiled_ms", "Latência compilado (ms)")):
+        fmt = "{:.0f}" if key in ("trees", "max_depth", "nodes") else "{:.3f}"
+        print(f"  {title}: {fmt.format(before[key])} -> {fmt.format(after[key])}")
+
+
+def validation_split(X_train, y_train, size=None):
+    """
+    Separa do treino a validação da compactação (estratificada quando todas as classes têm 2+ exemplos).
+    O teste fica reservado ao relatório final: escolher o candidato nele inflaria o F1 reportado.
+    """
+    size = compaction_config()["validation_size"] if size is None else size
+    _, counts = np.unique(np.asarray(y_train), return_counts=True)
+    stratify = y_train if counts.min() >= 2 else None
+    return train_test_split(X_train, y_train, test_size=size, stratify=stratify, random_state=42)
+
+
+def compact_if_enabled(label, model, X_train, y_train):
+    """
+    Etapa pós-treino usada pelos scripts de treino: compacta (se habilitado em compaction.enabled) e reporta.
+    Uma validação é separada do treino; a referência (mesmos hiperparâmetros) e os candidatos treinam
+    só no restante, para o ranking das árvores e a tolerância de F1 serem medidos fora da amostra.
+    Sem candidato dentro da tolerância, volta o modelo original treinado em todo o treino.
+    """
+    if not compaction_config()["enabled"]:
+        return model
+    print(f"🔧 Compactando o modelo {label}...")
+    X_fit, X_val, y_fit, y_val = validation_split(X_train, y_train)
+    reference = clone(model).fit(X_fit, y_fit)
+    compacted, report = compact_forest(reference, X_fit, X_val, y_val)
+    print_compaction_report(label, report)
+    return model if compacted is reference else compacted
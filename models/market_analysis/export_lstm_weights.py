@@ -0,0 +1,88 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+import argparse
+import json
+import joblib
+import numpy as np
+from config.config import load_config
+from models.market_analysis.lstm_model_wrapper import ACTIVATIONS, weights_path
+
+cfg = load_config()
+
+
+def _activation_name(activation):
+    name = getattr(activation, "__name__", str(activation))
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Ativação não suportada na inferência NumPy: {name}")
+    return name
+
+
+def _scaler_arrays(scaler):
+    """MinMaxScaler e StandardScaler viram arrays; outros tipos ficam a cargo do pickle em tempo de execução"""
+    kind = type(scaler).__name__
+    if kind == "MinMaxScaler":
+        return {"scaler_kind": np.array("minmax"), "scaler_scale": scaler.scale_, "scaler_min": scaler.min_}
+    if kind == "StandardScaler":
+        n = scaler.n_features_in_
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n)
+        scale = scaler.scale_ if scaler.with_std and scaler.scale_ is not None else np.ones(n)
+        return {"scaler_kind": np.array("standard"), "scaler_mean": mean, "scaler_scale": scale}
+    print(f"⚠️ Scaler {kind} sem exportação: o wrapper usará o transform do pickle.")
+    return {}
+
+
+def export_lstm_weights(model_path, scaler_path, out_path=None, class_signals=None):
+    """
+    Converte o modelo Keras (.h5) em arrays NumPy (.npz) lidos pelo LSTMModelWrapper, junto com
+    os parâmetros do scaler. Único ponto que importa o TensorFlow.
+    """
+    from tensorflow.keras.models import load_model
+
+    model = load_model(model_path, compile=False)
+    out_path = out_path or weights_path(model_path)
+    arrays, layers = {}, []
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind in ("InputLayer", "Dropout"):
+            continue
+        weights = layer.get_weights()
+        k = len(layers)
+        if kind == "LSTM":
+            kernel, recurrent_kernel = weights[0], weights[1]
+            bias = weights[2] if layer.use_bias else np.zeros(kernel.shape[1])
+            layers.append({"type": "lstm", "units": int(layer.units), "return_sequences": bool(layer.return_sequences),
+                           "activation": _activation_name(layer.activation),
+                           "recurrent_activation": _activation_name(layer.recurrent_activation),
+                           "arrays": ["kernel", "recurrent_kernel", "bias"]})
+            arrays.update({f"layer{k}_kernel": kernel, f"layer{k}_recurrent_kernel": recurrent_kernel,
+                           f"layer{k}_bias": bias})
+        elif kind == "Dense":
+            kernel = weights[0]
+            bias = weights[1] if layer.use_bias else np.zeros(kernel.shape[1])
+            layers.append({"type": "dense", "activation": _activation_name(layer.activation),
+                           "arrays": ["kernel", "bias"]})
+            arrays.update({f"layer{k}_kernel": kernel, f"layer{k}_bias": bias})
+        else:
+            raise ValueError(f"Camada {kind} não suportada pela inferência NumPy")
+
+    if scaler_path and os.path.exists(scaler_path):
+        arrays.update(_scaler_arrays(joblib.load(scaler_path)))
+    meta = {"layers": layers, "class_signals": list(class_signals) if class_signals else None}
+    arrays = {key: np.asarray(value, dtype=np.float64) if key != "scaler_kind" else value
+              for key, value in arrays.items()}
+    np.savez(out_path, meta=np.array(json.dumps(meta)), **arrays)
+    print(f"✅ Pesos do LSTM exportados: {len(layers)} camadas -> {out_path}")
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta o LSTM (.h5) e o scaler para a inferência em NumPy")
+    parser.add_argument("--model", default=cfg["model_paths"]["lstm_market_model"])
+    parser.add_argument("--scaler", default=cfg["model_paths"]["lstm_market_scaler"])
+    parser.add_argument("--out", default=None, help="Padrão: .npz ao lado do .h5")
+    parser.add_argument("--class-signals", nargs="+", type=int, default=None,
+                        help="Sinal de cada classe da saída (padrão: -1 0 1)")
+    args = parser.parse_args()
+    export_lstm_weights(args.model, args.scaler, args.out, args.class_signals)
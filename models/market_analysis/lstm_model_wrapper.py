@@ -0,0 +1,223 @@
+import json
+import os
+import numpy as np
+
+# Features de entrada do LSTM, na ordem de treino (sobrescritas por lstm_wrapper_params.expected_features)
+DEFAULT_FEATURES = [
+    "open", "high", "low", "close", "tick_volume",
+    "ema_20", "ema_50", "macd", "rsi", "stoch_k", "atr",
+    "obv", "volume_sma_20", "volatility_stop", "volatility_score",
+    "spread_pct",
+]
+# Sinal de cada classe da saída softmax (venda, neutro, compra)
+DEFAULT_CLASS_SIGNALS = (-1, 0, 1)
+# Janelas por passada do forward em predict_batch (limita a memória em backtests longos)
+BATCH_CHUNK = 4096
+
+
+def weights_path(model_path):
+    """Pesos exportados em NumPy ao lado do modelo Keras: lstm_market_model.h5 -> lstm_market_model.npz"""
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _hard_sigmoid(x):
+    return np.clip(0.2 * x + 0.5, 0.0, 1.0)
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=-1, keepdims=True))
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+ACTIVATIONS = {
+    "sigmoid": _sigmoid,
+    "hard_sigmoid": _hard_sigmoid,
+    "tanh": np.tanh,
+    "relu": lambda x: np.maximum(x, 0.0),
+    "linear": lambda x: x,
+    "softmax": _softmax,
+}
+
+
+def load_weights(path):
+    """Camadas (lista de dicts com arrays e atributos) e parâmetros do scaler gravados por export_lstm_weights.py"""
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data["meta"]))
+        layers = []
+        for k, layer in enumerate(meta["layers"]):
+            arrays = {name: data[f"layer{k}_{name}"] for name in layer["arrays"]}
+            layers.append({**layer, **arrays})
+        scaler = {key[len("scaler_"):]: data[key] for key in data.files if key.startswith("scaler_")}
+    return meta, layers, scaler
+
+
+def lstm_forward(layers, X):
+    """
+    Forward de uma pilha Keras de LSTM + Dense em NumPy. X: (janelas, timesteps, features).
+    Pesos no layout do Keras: kernel (entrada, 4u), recurrent_kernel (u, 4u), bias (4u),
+    gates na ordem i, f, c, o. Dropout não existe na inferência.
+    """
+    out = np.asarray(X, dtype=np.float64)
+    for layer in layers:
+        if layer["type"] == "lstm":
+            units = layer["units"]
+            act = ACTIVATIONS[layer["activation"]]
+            rec_act = ACTIVATIONS[layer["recurrent_activation"]]
+            kernel, recurrent, bias = layer["kernel"], layer["recurrent_kernel"], layer["bias"]
+            batch, steps, _ = out.shape
+            # Projeção das entradas de todos os passos de uma vez; só a parte recorrente fica no loop
+            projected = out @ kernel + bias
+            h = np.zeros((batch, units))
+            c = np.zeros((batch, units))
+            sequence = np.empty((batch, steps, units)) if layer["return_sequences"] else None
+            for t in range(steps):
+                z = projected[:, t] + h @ recurrent
+                i = rec_act(z[:, :units])
+                f = rec_act(z[:, units:2 * units])
+                g = act(z[:, 2 * units:3 * units])
+                o = rec_act(z[:, 3 * units:])
+                c = f * c + i * g
+                h = o * act(c)
+                if sequence is not None:
+                    sequence[:, t] = h
+            out = sequence if sequence is not None else h
+        elif layer["type"] == "dense":
+            out = ACTIVATIONS[layer["activation"]](out @ layer["kernel"] + layer["bias"])
+        else:
+            raise ValueError(f"Camada não suportada: {layer['type']}")
+    return out
+
+
+class LSTMModelWrapper:
+    """
+    Modelo de mercado LSTM com inferência em NumPy (sem TensorFlow no caminho quente).
+    Usa os pesos exportados do .h5 (models/market_analysis/export_lstm_weights.py) e a transformação
+    do lstm_scaler.pkl. Mantém por símbolo um buffer circular com as últimas 'timesteps' linhas já
+    normalizadas; antes de completar a janela, predict retorna (0, 0.0).
+    Retorno: (sinal, confiança) com sinal em {-1, 0, 1} e confiança = probabilidade da classe escolhida.
+    """
+
+    def __init__(self, model_path, scaler_path, timesteps=20, expected_features=None, class_signals=None):
+        self.timesteps = int(timesteps)
+        self.features = list(expected_features or DEFAULT_FEATURES)
+        npz_path = model_path if model_path.endswith(".npz") else weights_path(model_path)
+        if not os.path.exists(npz_path) or (os.path.exists(model_path)
+                                            and os.path.getmtime(model_path) > os.path.getmtime(npz_path)):
+            # Exporta uma vez (exige TensorFlow); as próximas cargas leem só o .npz
+            from models.market_analysis.export_lstm_weights import export_lstm_weights
+            print(f"🔧 Exportando pesos do LSTM para {npz_path}...")
+            export_lstm_weights(model_path, scaler_path, npz_path)
+        meta, self.layers, scaler = load_weights(npz_path)
+        self.class_signals = np.asarray(class_signals or meta.get("class_signals") or DEFAULT_CLASS_SIGNALS)
+
+        first = self.layers[0]
+        if first["type"] == "lstm" and first["kernel"].shape[0] != len(self.features):
+            raise ValueError(f"O LSTM espera {first['kernel'].shape[0]} features, "
+                             f"expected_features tem {len(self.features)}")
+        self._scaler_kind = str(scaler["kind"]) if scaler else None
+        self._scaler = scaler
+        if not scaler and scaler_path and os.path.exists(scaler_path):
+            # Scaler de tipo sem forma afim conhecida: usa o transform do pickle (exige o sklearn)
+            import joblib
+            self._scaler_kind, self._scaler = "sklearn", joblib.load(scaler_path)
+
+        self._buffers = {}  # símbolo -> array (timesteps, features), circular
+        self._counts = {}   # símbolo -> nº de linhas recebidas
+
+    # --- entrada ---
+
+    def _scale(self, X):
+        """Aplica a normalização do scaler a uma matriz (linhas, features)"""
+        X = np.nan_to_num(np.asarray(X, dtype=np.float64), nan=0.0, posinf=0.0, neginf=0.0)
+        if self._scaler_kind == "minmax":
+            return X * self._scaler["scale"] + self._scaler["min"]
+        if self._scaler_kind == "standard":
+            return (X - self._scaler["mean"]) / self._scaler["scale"]
+        if self._scaler_kind == "sklearn":
+            return self._scaler.transform(X)
+        return X
+
+    def _row(self, market):
+        return [market.get(name, 0.0) for name in self.features]
+
+    def _push(self, symbol, scaled_row, out):
+        """Adiciona uma linha ao buffer do símbolo; copia a janela (ordem cronológica) em 'out' se estiver completa"""
+        buffer = self._buffers.get(symbol)
+        if buffer is None:
+            buffer = self._buffers[symbol] = np.zeros((self.timesteps, len(self.features)))
+            self._counts[symbol] = 0
+        count = self._counts[symbol]
+        slot = count % self.timesteps
+        buffer[slot] = scaled_row
+        self._counts[symbol] = count + 1
+        if count + 1 < self.timesteps:
+            return False
+        start = (slot + 1) % self.timesteps
+        out[:self.timesteps - start] = buffer[start:]
+        out[self.timesteps - start:] = buffer[:start]
+        return True
+
+    # --- saída ---
+
+    def _decode(self, output):
+        """(sinais, confianças) a partir da saída da rede: softmax por classe ou sigmoide única"""
+        if output.shape[1] == 1:
+            p = output[:, 0]
+            return np.where(p >= 0.5, 1, -1), np.maximum(p, 1.0 - p)
+        best = np.argmax(output, axis=1)
+        return self.class_signals[best], output[np.arange(len(output)), best]
+
+    def _run(self, scaled, symbols):
+        """Empurra as linhas em ordem (como chamadas sucessivas de predict) e roda um forward por bloco de janelas"""
+        n = len(scaled)
+        signals = np.zeros(n, dtype=np.int64)
+        confidences = np.zeros(n, dtype=np.float64)
+        for begin in range(0, n, BATCH_CHUNK):
+            end = min(begin + BATCH_CHUNK, n)
+            windows = np.empty((end - begin, self.timesteps, len(self.features)))
+            ready = np.zeros(end - begin, dtype=bool)
+            for k in range(begin, end):
+                ready[k - begin] = self._push(symbols[k], scaled[k], windows[k - begin])
+            if ready.any():
+                chunk_signals, chunk_confidences = self._decode(lstm_forward(self.layers, windows[ready]))
+                idx = np.flatnonzero(ready) + begin
+                signals[idx] = chunk_signals
+                confidences[idx] = chunk_confidences
+        return signals, confidences
+
+    def predict(self, market, symbol="DEFAULT_LSTM_SYMBOL"):
+        signals, confidences = self._run(self._scale([self._row(market)]), [symbol])
+        return int(signals[0]), float(confidences[0])
+
+    def predict_many(self, markets, symbols):
+        """Um candle de cada ativo (ex.: tick do robô): um único forward para todos os símbolos"""
+        signals, confidences = self._run(self._scale([self._row(m) for m in markets]), list(symbols))
+        return signals, confidences
+
+    def predict_batch(self, frame, default_symbol="DEFAULT_LSTM_SYMBOL"):
+        """Todas as linhas de um DataFrame em ordem, com o mesmo resultado (e histórico) de predict linha a linha"""
+        X = np.column_stack([frame[name].to_numpy(dtype=np.float64) if name in frame else np.zeros(len(frame))
+                             for name in self.features]) if len(frame) else np.zeros((0, len(self.features)))
+        symbols = frame["symbol"].to_numpy() if "symbol" in frame else np.full(len(frame), default_symbol, dtype=object)
+        return self._run(self._scale(X), symbols)
+
+    # --- estado (checkpoints do backtest) ---
+
+    def get_state(self):
+        return {symbol: (buffer.copy(), self._counts[symbol]) for symbol, buffer in self._buffers.items()}
+
+    def set_state(self, state):
+        self._buffers = {symbol: np.array(buffer, dtype=np.float64) for symbol, (buffer, _) in state.items()}
+        self._counts = {symbol: int(count) for symbol, (_, count) in state.items()}
+
+    def reset(self, symbol=None):
+        """Descarta o histórico de um símbolo (ou de todos)"""
+        for store in (self._buffers, self._counts):
+            if symbol is None:
+                store.clear()
+            else:
+                store.pop(symbol, None)
@@ -1,8 +1,13 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.model_selection import GridSearchCV, StratifiedKFold
 from sklearn.metrics import classification_report, confusion_matrix
 from market_dataset import load_market_dataset
+from models.forest_compaction import compact_if_enabled
 
 
 def train_market_model():
@@ -39,8 +44,7 @@ def train_market_model():
     model = grid_search.best_estimator_
     print(f"✅ Melhores parâmetros encontrados: {grid_search.best_params_}")
     print(f"📈 Melhor score F1-weighted: {grid_search.best_score_:.4f}")
-
-    print("🔧 Treinando modelo final com os melhores parâmetros...")
+    model = compact_if_enabled("Mercado", model, X_train, y_train)
 
     # Avalia geral
     y_pred = model.predict(X_test)
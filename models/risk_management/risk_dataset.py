@@ -1,8 +1,16 @@
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+
+# Features adaptadas para MT5/Forex, na ordem de treino (core.feature_schema monta as entradas nesta ordem)
+RISK_FEATURES = [
+    "capital", "in_position", "drawdown", "atr", "signal", "confidence",
+    "recent_losses", "volatility_score", "rolling_loss_ratio", "spread_pct"
+]
 
 def generate_risk_dataset_from_market_data(parquet_path="data/processed/market_features_m15.parquet", symbols=None):
+    # Importado aqui: ler RISK_FEATURES deste módulo não carrega o sklearn.model_selection
+    from sklearn.model_selection import train_test_split
+
     df = pd.read_parquet(parquet_path).reset_index(drop=True)
     
     # Filtra por símbolos específicos se fornecido
@@ -74,12 +82,7 @@ def generate_risk_dataset_from_market_data(parquet_path="data/processed/market_f
     df["stop_loss_pct"] = df["risk_level_code"].apply(lambda x: np.round(np.random.uniform(*sl_map[x]), 4))
     df["take_profit_pct"] = df["risk_level_code"].apply(lambda x: np.round(np.random.uniform(*tp_map[x]), 4))
 
-    # Features adaptadas para MT5/Forex
-    features = [
-        "capital", "in_position", "drawdown", "atr", "signal", "confidence",
-        "recent_losses", "volatility_score", "rolling_loss_ratio", "spread_pct"
-    ]
-    
+    features = RISK_FEATURES
     X = df[features]
     y_action = df["action_code"]
     y_risk = df["risk_level_code"]
@@ -1,9 +1,14 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.linear_model import LinearRegression
 from sklearn.model_selection import GridSearchCV, StratifiedKFold, KFold
 from sklearn.metrics import classification_report, mean_squared_error, mean_absolute_error
 from risk_dataset import generate_risk_dataset_from_market_data
+from models.forest_compaction import compact_if_enabled
 import numpy as np
 
 def train_and_save_risk_models():
@@ -41,6 +46,7 @@ def train_and_save_risk_models():
     action_model = grid_search_action.best_estimator_
     print(f"✅ Melhores parâmetros (Ação): {grid_search_action.best_params_}")
     print(f"📈 Melhor score F1-weighted (Ação): {grid_search_action.best_score_:.4f}")
+    action_model = compact_if_enabled("Ação", action_model, X_train, data["y_action_train"])
     y_pred_action = action_model.predict(X_test)
     print("📊 Modelo de Ação:")
     print(classification_report(data["y_action_test"], y_pred_action))
@@ -60,6 +66,7 @@ def train_and_save_risk_models():
     risk_model = grid_search_risk.best_estimator_
     print(f"✅ Melhores parâmetros (Nível de Risco): {grid_search_risk.best_params_}")
     print(f"📈 Melhor score F1-weighted (Nível de Risco): {grid_search_risk.best_score_:.4f}")
+    risk_model = compact_if_enabled("Nível de Risco", risk_model, X_train, data["y_risk_train"])
     y_pred_risk = risk_model.predict(X_test)
     print("📊 Modelo de Nível de Risco:")
     print(classification_report(data["y_risk_test"], y_pred_risk))
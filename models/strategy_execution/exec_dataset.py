@@ -1,6 +1,13 @@
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
+
+# Features adaptadas para MT5, na ordem de treino (core.feature_schema monta as entradas nesta ordem)
+EXEC_FEATURES = [
+    "signal", "confidence", "action_code", "risk_level_code",
+    "position_size", "stop_loss_pct", "take_profit_pct",
+    "capital", "in_position", "time_in_trade", "profit_pct",
+    "trend_type", "time_since_last_trade", "spread_pct"
+]
 
 
 def generate_exec_dataset_from_market(parquet_path="data/processed/market_features_m15.parquet", symbols=None):
@@ -79,15 +86,7 @@ def generate_exec_dataset_from_market(parquet_path="data/processed/market_featur
     
     label_map = dict(enumerate(df["execution_decision"].astype("category").cat.categories))
 
-    # Features adaptadas para MT5
-    features = [
-        "signal", "confidence", "action_code", "risk_level_code",
-        "position_size", "stop_loss_pct", "take_profit_pct",
-        "capital", "in_position", "time_in_trade", "profit_pct",
-        "trend_type", "time_since_last_trade", "spread_pct"
-    ]
-    
-
+    features = EXEC_FEATURES
     X = df[features]
     y = df["decision_encoded"]
     
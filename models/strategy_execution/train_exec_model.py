@@ -1,7 +1,12 @@
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report
 from exec_dataset import generate_exec_dataset_from_market
+from models.forest_compaction import compact_if_enabled
 from sklearn.model_selection import train_test_split, GridSearchCV, StratifiedKFold
 import joblib
 
@@ -40,6 +45,7 @@ def train_and_save_exec_model():
     exec_model = grid_search_exec.best_estimator_
     print(f"✅ Melhores parâmetros (Execução): {grid_search_exec.best_params_}")
     print(f"📈 Melhor score F1-weighted (Execução): {grid_search_exec.best_score_:.4f}")
+    exec_model = compact_if_enabled("Execução", exec_model, X_train, y_train)
 
     # 💾 Salva o modelo
     joblib.dump(exec_model, "models/strategy_execution/model/exec_model.pkl")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Os testes importam os pacotes do projeto a partir da raiz (como os scripts com sys.path.append)
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
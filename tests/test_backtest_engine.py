@@ -0,0 +1,169 @@
+import io
+import os
+import contextlib
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("tqdm")
+pytest.importorskip("matplotlib")
+import joblib
+from sklearn.ensemble import RandomForestClassifier
+import core.logic as logic
+import backtest.run_backtest as run_backtest
+import backtest.batch_engine as batch_engine
+from core.compiled_forest import CompiledModel
+from models.strategy_execution.exec_dataset import EXEC_FEATURES
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+PARQUET = os.path.join(ROOT, "data", "processed", "market_features_m15.parquet")
+RISK_MODELS = ["risk_action", "risk_level", "position_size", "stop_loss", "take_profit"]
+N_BARS = 1200
+START_INDEX = 50
+
+
+class StubMarketModel:
+    """
+    Modelo de mercado determinístico com histórico por símbolo (como o LSTM): sinal pelo RSI em relação
+    à média dos últimos candles. Expõe get_state/set_state para os checkpoints.
+    """
+
+    timesteps = 20
+
+    def __init__(self):
+        self.hist = {}
+
+    def predict(self, market, symbol="DEFAULT_LSTM_SYMBOL"):
+        history = self.hist.setdefault(symbol, [])
+        history.append(float(market["rsi"]))
+        if len(history) < self.timesteps:
+            return 0, 0.0
+        mean = np.mean(history[-self.timesteps:])
+        signal = 1 if market["rsi"] > mean + 3 else (-1 if market["rsi"] < mean - 3 else 0)
+        return signal, float(min(1.0, abs(market["rsi"] - mean) / 20))
+
+    def get_state(self):
+        return {symbol: list(history) for symbol, history in self.hist.items()}
+
+    def set_state(self, state):
+        self.hist = {symbol: list(history) for symbol, history in state.items()}
+
+
+def _exec_model():
+    """Modelo de execução sintético: compra com sinal forte, vende com sinal contrário ou trade longo"""
+    rng = np.random.default_rng(0)
+    n = 3000
+    X = pd.DataFrame({name: rng.normal(size=n) for name in EXEC_FEATURES})
+    X["in_position"] = rng.integers(0, 2, n)
+    X["signal"] = rng.integers(-1, 2, n)
+    X["confidence"] = rng.uniform(0, 1, n)
+    X["time_in_trade"] = rng.integers(0, 60, n)
+    flat = np.where((X.signal == 1) & (X.confidence > 0.5), 0, np.where((X.signal == -1) & (X.confidence > 0.5), 5, 3))
+    holding = np.where((X.signal == -1) | (X.time_in_trade > 40), 5, np.where(X.confidence > 0.8, 2, 1))
+    y = np.where(X.in_position == 0, flat, holding)
+    return RandomForestClassifier(n_estimators=30, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def compiled_models():
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # pickles de outra versão do sklearn
+        risk = {name: CompiledModel.from_model(joblib.load(os.path.join(
+            ROOT, "models", "risk_management", "model", f"{name}_model.pkl"))) for name in RISK_MODELS}
+    risk["strategy_exec"] = CompiledModel.from_model(_exec_model())
+    risk["exec_labels"] = joblib.load(os.path.join(ROOT, "models", "strategy_execution", "model", "exec_label_map.pkl"))
+    return risk
+
+
+@pytest.fixture
+def stub_models(monkeypatch, compiled_models, tmp_path):
+    """
+    Registra no registry os modelos de risco do repositório (compilados), um modelo de execução sintético
+    e o modelo de mercado acima; limites de lote fixos (sem MT5), sem snapshots nem checkpoints no repositório.
+    """
+    loaders = {name: logic.models._loaders[name] for name in ["market"] + list(compiled_models)}
+    market = StubMarketModel()
+    logic.models.register("market", lambda: market)
+    for name, model in compiled_models.items():
+        logic.models.register(name, lambda model=model: model)
+    monkeypatch.setattr(logic, "get_lot_limits", lambda symbol: (0.01, 100.0, 0.01))
+    monkeypatch.setattr(logic, "_decision_memo", {})
+    monkeypatch.setattr(logic.decision_store, "snapshots", False)
+    monkeypatch.setattr(run_backtest, "checkpoint_path",
+                        lambda symbol, batched: str(tmp_path / f"{symbol}_{'batch' if batched else 'scalar'}.pkl"))
+    yield market
+    for name, loader in loaders.items():
+        logic.models.register(name, loader)
+
+
+@pytest.fixture(scope="module")
+def data():
+    frame = pd.read_parquet(PARQUET)
+    return frame[frame["symbol"] == "EURUSD"].iloc[:N_BARS].reset_index(drop=True)
+
+
+def _simulate(market, data, batched, **kwargs):
+    market.hist = {}
+    logic._decision_memo.clear()
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_backtest.simulate(data, "EURUSD", START_INDEX, batched, progress=False, **kwargs)
+
+
+def _assert_same_run(result, expected):
+    sim, decisions = result
+    expected_sim, expected_decisions = expected
+    np.testing.assert_array_equal(sim.equity.array, expected_sim.equity.array)
+    np.testing.assert_array_equal(sim.trade_log.array, expected_sim.trade_log.array)
+    assert dict(decisions) == dict(expected_decisions)
+    # O modo em lote combina a equity em blocos (Welford/Chan): métricas iguais até o arredondamento
+    assert sim.metrics.snapshot() == pytest.approx(expected_sim.metrics.snapshot(), rel=1e-9)
+
+
+@pytest.fixture
+def scalar_run(stub_models, data):
+    return _simulate(stub_models, data, batched=False)
+
+
+def test_batched_matches_step_by_step(stub_models, data, scalar_run):
+    """O modo em lote reproduz exatamente o loop passo a passo: equity, trades, decisões e métricas"""
+    sim, _ = scalar_run
+    assert len(sim.trade_log) > 0
+    _assert_same_run(_simulate(stub_models, data, batched=True), scalar_run)
+
+
+class Interrupted(Exception):
+    pass
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_resume_from_checkpoint_matches_continuous_run(monkeypatch, stub_models, data, scalar_run, batched):
+    """Interrompido no meio e retomado do checkpoint, o backtest termina igual a uma execução contínua"""
+    expected = scalar_run if not batched else _simulate(stub_models, data, batched=True)
+    module, name, limit = (batch_engine, "run_decision_batch", 6) if batched \
+        else (run_backtest, "run_autonomous_decision", N_BARS // 2)
+    original = getattr(module, name)
+    calls = [0]
+
+    def interrupt_after_limit(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] > limit:
+            raise Interrupted()
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(module, name, interrupt_after_limit)
+    with pytest.raises(Interrupted):
+        _simulate(stub_models, data, batched, checkpoint_interval=0.0)
+    monkeypatch.setattr(module, name, original)
+    path = run_backtest.checkpoint_path("EURUSD", batched)
+    assert os.path.exists(path)
+
+    # O histórico do modelo de mercado vem do checkpoint (get_state/set_state), não da execução interrompida
+    stub_models.hist = {}
+    logic._decision_memo.clear()
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        resumed = run_backtest.simulate(data, "EURUSD", START_INDEX, batched, progress=False, resume=True)
+    assert "Retomando do checkpoint" in out.getvalue()
+    _assert_same_run(resumed, expected)
+    assert not os.path.exists(path)
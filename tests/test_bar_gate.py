@@ -0,0 +1,29 @@
+import pytest
+from live_trading.bar_gate import BarGate, BAR_CLOSE_DELAY, TIMEFRAME_SECONDS
+
+
+def test_each_closed_candle_is_accepted_once_per_symbol():
+    gate = BarGate("M15")
+    assert gate.accept("EURUSD", {"timestamp": 900})
+    assert not gate.accept("EURUSD", {"timestamp": 900})   # mesmo candle consultado de novo
+    assert not gate.accept("EURUSD", {"timestamp": 0})     # candle mais antigo
+    assert gate.accept("GBPUSD", {"timestamp": 900})       # cada símbolo tem o seu último candle
+    assert gate.accept("EURUSD", {"timestamp": 2700})      # candles pulados não impedem o próximo
+    assert not gate.accept("EURUSD", None)
+    assert (gate.accepted, gate.duplicates) == (3, 2)
+    assert gate.summary() == "🕯️ Candles novos: 3 | repetidos ignorados: 2 (40%)"
+
+
+@pytest.mark.parametrize("timeframe", ["M1", "M5", "M15", "H1"])
+def test_seconds_until_next_close(timeframe):
+    gate = BarGate(timeframe)
+    seconds = TIMEFRAME_SECONDS[timeframe]
+    start = 1_700_000_000 - 1_700_000_000 % seconds
+    assert gate.seconds_until_next_close(now=start) == seconds + BAR_CLOSE_DELAY
+    assert gate.seconds_until_next_close(now=start + seconds - 1) == 1 + BAR_CLOSE_DELAY
+    assert gate.seconds_until_next_close(now=start + 0.5) == pytest.approx(seconds - 0.5 + BAR_CLOSE_DELAY)
+
+
+def test_unknown_timeframe_falls_back_to_m15():
+    assert BarGate("W1").seconds == TIMEFRAME_SECONDS["M15"]
+    assert BarGate().summary() == "🕯️ Candles novos: 0 | repetidos ignorados: 0 (0%)"
@@ -0,0 +1,90 @@
+import os
+import warnings
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+import joblib
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.linear_model import LinearRegression
+from core.compiled_forest import CompiledModel, export_model, load_model, compiled_path
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+RISK_MODELS = ["risk_action", "risk_level", "position_size", "stop_loss", "take_profit"]
+
+
+def _data(n=600, n_features=8, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, n_features))
+    # Valores repetidos e em cima dos thresholds (comparação em float32 como no sklearn)
+    X[:, 0] = np.round(X[:, 0], 1)
+    return X, rng
+
+
+def _assert_same_predictions(model, X):
+    compiled = CompiledModel.from_model(model)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(X))
+    if hasattr(model, "predict_proba"):
+        np.testing.assert_array_equal(compiled.predict_proba(X), model.predict_proba(X))
+    # Uma linha por vez (caminho das decisões ao vivo)
+    for row in X[:20]:
+        np.testing.assert_array_equal(compiled.predict(row.reshape(1, -1)), model.predict(row.reshape(1, -1)))
+
+
+def test_forest_classifier():
+    X, rng = _data()
+    y = (X[:, 0] + rng.normal(scale=0.5, size=len(X)) > 0).astype(int) + (X[:, 1] > 1)
+    model = RandomForestClassifier(n_estimators=30, max_depth=12, random_state=0).fit(X, y)
+    _assert_same_predictions(model, X)
+
+
+def test_forest_regressor_and_linear():
+    X, rng = _data(seed=1)
+    y = X[:, 0] * 2 - X[:, 3] + rng.normal(scale=0.1, size=len(X))
+    _assert_same_predictions(RandomForestRegressor(n_estimators=20, random_state=0).fit(X, y), X)
+    linear = LinearRegression().fit(X, y)
+    np.testing.assert_allclose(CompiledModel.from_model(linear).predict(X), linear.predict(X), rtol=1e-12)
+
+
+@pytest.mark.parametrize("name", RISK_MODELS)
+def test_repository_risk_models(name):
+    """Os modelos de risco do repositório (florestas e regressões lineares) compilados dão as mesmas previsões"""
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")  # pickles de outra versão do sklearn
+        model = joblib.load(os.path.join(ROOT, "models", "risk_management", "model", f"{name}_model.pkl"))
+    X, _ = _data(n=300, n_features=model.n_features_in_, seed=2)
+    X[:, 0] = np.abs(X[:, 0]) * 10000  # capital
+    with warnings.catch_warnings():
+        warnings.filterwarnings("ignore", message="X does not have valid feature names")
+        if hasattr(model, "estimators_"):
+            _assert_same_predictions(model, X)
+        else:
+            np.testing.assert_allclose(CompiledModel.from_model(model).predict(X), model.predict(X), rtol=1e-12)
+
+
+def test_export_and_load(tmp_path):
+    X, rng = _data(seed=3)
+    y = rng.integers(0, 3, len(X))
+    model = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    pkl_path = str(tmp_path / "model.pkl")
+    joblib.dump(model, pkl_path)
+    assert isinstance(load_model(pkl_path), RandomForestClassifier)  # ainda sem versão compilada
+
+    assert export_model(model, compiled_path(pkl_path)) > 0
+    compiled = load_model(pkl_path)
+    assert isinstance(compiled, CompiledModel)
+    np.testing.assert_array_equal(compiled.predict_proba(X), model.predict_proba(X))
+    assert isinstance(load_model(pkl_path, prefer_compiled=False), RandomForestClassifier)
+
+    # Pickle mais novo que o .npz (modelo retreinado): o compilado está desatualizado
+    os.utime(pkl_path, (os.path.getmtime(compiled_path(pkl_path)) + 10,) * 2)
+    assert isinstance(load_model(pkl_path), RandomForestClassifier)
+
+
+def test_wrong_number_of_features():
+    X, rng = _data(n=100, seed=4)
+    compiled = CompiledModel.from_model(RandomForestRegressor(n_estimators=3, random_state=0).fit(X, X[:, 0]))
+    with pytest.raises(ValueError):
+        compiled.predict(X[:, :5])
+    with pytest.raises(AttributeError):
+        compiled.predict_proba(X)
@@ -0,0 +1,67 @@
+import threading
+import warnings
+import numpy as np
+import pandas as pd
+import pytest
+from core.feature_schema import FeatureSchema
+
+COLUMNS = ["capital", "drawdown", "spread_pct"]
+
+
+def test_row_and_matrix_follow_schema_order():
+    schema = FeatureSchema("test", COLUMNS)
+    row = schema.row({"spread_pct": 0.1, "capital": 1000.0, "drawdown": np.inf, "extra": 5})
+    np.testing.assert_array_equal(row, [[1000.0, 0.0, 0.1]])
+
+    matrix = schema.matrix({"capital": np.array([1.0, 2.0]), "drawdown": 0.5, "spread_pct": np.array([np.nan, 3.0])}, 2)
+    np.testing.assert_array_equal(matrix, [[1.0, 0.5, 0.0], [2.0, 0.5, 3.0]])
+    with pytest.raises(KeyError):
+        schema.row({"capital": 1.0})
+
+
+def test_buffers_are_per_thread():
+    """Cada thread monta as entradas no seu próprio buffer: uma decisão não sobrescreve a outra"""
+    schema = FeatureSchema("test", COLUMNS)
+    barrier = threading.Barrier(4)
+    results, errors = {}, []
+
+    def worker(k):
+        try:
+            rows = []
+            for i in range(200):
+                row = schema.row({"capital": k, "drawdown": i, "spread_pct": -k})
+                if i == 0:
+                    barrier.wait()
+                rows.append(row.copy())
+                assert row[0, 0] == k and row[0, 1] == i
+            results[k] = (id(schema.row({"capital": k, "drawdown": 0, "spread_pct": 0})), rows)
+        except Exception as e:  # falhas dentro da thread não chegam ao pytest sozinhas
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(k,)) for k in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+    assert len({buffer_id for buffer_id, _ in results.values()}) == 4
+
+
+def test_validate_and_predict_leave_the_model_untouched():
+    sklearn = pytest.importorskip("sklearn.linear_model")
+    schema = FeatureSchema("test", COLUMNS)
+    frame = pd.DataFrame(np.random.default_rng(0).normal(size=(50, 3)), columns=COLUMNS)
+    model = sklearn.LinearRegression().fit(frame, frame["capital"] * 2)
+    assert schema.validate(model) is model
+    assert list(model.feature_names_in_) == COLUMNS
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        prediction = schema.predict(model, schema.row(frame.iloc[0].to_dict()))
+    assert prediction[0] == pytest.approx(model.predict(frame.iloc[:1])[0])
+    # Fora do schema o sklearn continua avisando sobre arrays sem nomes de colunas
+    with pytest.warns(UserWarning, match="valid feature names"):
+        model.predict(frame.to_numpy()[:1])
+
+    with pytest.raises(ValueError):
+        FeatureSchema("other", list(reversed(COLUMNS))).validate(model)
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+from core.metrics import StreamingMetrics
+from backtest.run_backtest import calculate_metrics
+
+KEYS = ["max_drawdown", "sharpe", "win_rate", "avg_win", "avg_loss", "profit_factor", "recovery_factor"]
+
+
+def _equity_and_trades(seed=0, n=2000, n_trades=60):
+    rng = np.random.default_rng(seed)
+    equity = 10000 * np.cumprod(1 + rng.normal(0.0002, 0.004, n))
+    pnl = rng.normal(5, 40, n_trades)
+    pnl[::7] = 0.0  # trades no zero a zero não contam como ganho nem perda
+    return equity, pnl
+
+
+def _assert_same(snapshot, expected):
+    for key in KEYS:
+        assert snapshot[key] == pytest.approx(expected[key], rel=1e-9, abs=1e-12), key
+
+
+def test_streaming_matches_full_history():
+    """Atualizando candle a candle e trade a trade, o snapshot é o mesmo de calculate_metrics"""
+    equity, pnl = _equity_and_trades()
+    metrics = StreamingMetrics(timeframe="M15")
+    for value in equity:
+        metrics.update_equity(value)
+    for value in pnl:
+        metrics.update_trade(value)
+    expected = calculate_metrics(equity, [{"pnl": p} for p in pnl], timeframe="M15")
+    _assert_same(metrics.snapshot(), expected)
+    assert metrics.snapshot()["n_bars"] == len(equity)
+    assert metrics.snapshot()["n_trades"] == len(pnl)
+
+
+def test_equity_blocks_match_candle_by_candle():
+    """update_equity_block em blocos de tamanhos variados equivale a update_equity um a um"""
+    equity, pnl = _equity_and_trades(seed=1)
+    single, blocks = StreamingMetrics(timeframe="H1"), StreamingMetrics(timeframe="H1")
+    for value in equity:
+        single.update_equity(value)
+    bounds = [0, 1, 2, 50, 51, 700, 1500, len(equity)]
+    for begin, end in zip(bounds[:-1], bounds[1:]):
+        blocks.update_equity_block(equity[begin:end])
+    blocks.update_equity_block([])
+    for value in pnl:
+        single.update_trade(value)
+        blocks.update_trade(value)
+    _assert_same(blocks.snapshot(), single.snapshot())
+    _assert_same(blocks.snapshot(), calculate_metrics(equity, [{"pnl": p} for p in pnl], timeframe="H1"))
+
+
+def test_without_trades_and_without_losses():
+    equity, _ = _equity_and_trades(seed=2, n=300)
+    metrics = StreamingMetrics()
+    metrics.update_equity_block(equity)
+    _assert_same(metrics.snapshot(), calculate_metrics(equity, []))
+
+    for value in (10.0, 25.0):
+        metrics.update_trade(value)
+    snapshot = metrics.snapshot()
+    assert snapshot["profit_factor"] == np.inf
+    assert snapshot["avg_loss"] == 0
+    _assert_same(snapshot, calculate_metrics(equity, [{"pnl": 10.0}, {"pnl": 25.0}]))
+
+
+def test_save_and_load_keep_the_state(tmp_path):
+    equity, pnl = _equity_and_trades(seed=3, n=500, n_trades=20)
+    metrics = StreamingMetrics(timeframe="M5")
+    metrics.update_equity_block(equity[:250])
+    for value in pnl:
+        metrics.update_trade(value)
+    path = str(tmp_path / "live_metrics.json")
+    metrics.save(path)
+
+    restored = StreamingMetrics.load(path)
+    assert restored.timeframe == "M5"
+    for target in (metrics, restored):
+        target.update_equity_block(equity[250:])
+    assert restored.snapshot() == metrics.snapshot()
+
+    with pytest.raises(FileNotFoundError):
+        StreamingMetrics.load(str(tmp_path / "missing.json"))
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from core.risk_state import RiskStateTracker, ROLLING_WINDOW, RECENT_WINDOW
+
+
+def _expected(results, capital, peak):
+    """Features de risco recalculadas do zero a partir da lista completa de resultados"""
+    losses = [1 if pnl < 0 else 0 for pnl in results]
+    window = losses[-ROLLING_WINDOW:]
+    return {
+        "recent_losses": sum(losses[-RECENT_WINDOW:]),
+        "rolling_loss_ratio": sum(window) / len(window) if window else 0,
+        "drawdown": (peak - capital) / peak,
+    }
+
+
+def test_incremental_state_matches_full_history():
+    """O buffer circular dá os mesmos contadores que recontar todos os trades a cada fechamento"""
+    rng = np.random.default_rng(0)
+    tracker = RiskStateTracker(10000, start_step=50)
+    capital = peak = 10000.0
+    results = []
+    step = 50
+    for _ in range(40):
+        step += int(rng.integers(1, 5))
+        tracker.on_trade_opened(step)
+        entry = step
+        step += int(rng.integers(1, 20))
+        state = tracker.state(step)
+        assert state["in_position"] == 1
+        assert state["time_in_trade"] == step - entry
+        assert state["time_since_last_trade"] == step - entry
+
+        pnl = float(rng.choice([-1, 1, 0])) * float(rng.uniform(5, 50))
+        capital += pnl
+        peak = max(peak, capital)
+        results.append(pnl)
+        tracker.on_trade_closed(pnl, step, capital=capital)
+
+        state = tracker.state(step + 3, profit_pct=0.01)
+        expected = _expected(results, capital, peak)
+        assert state["recent_losses"] == expected["recent_losses"]
+        assert state["rolling_loss_ratio"] == pytest.approx(expected["rolling_loss_ratio"])
+        assert state["drawdown"] == pytest.approx(expected["drawdown"])
+        assert state["capital"] == capital
+        assert state["in_position"] == 0
+        assert state["time_in_trade"] == 0
+        assert state["time_since_last_trade"] == 3
+        assert state["profit_pct"] == 0.01
+
+
+def test_initial_state_and_array_of_steps():
+    tracker = RiskStateTracker(5000, start_step=10)
+    state = tracker.state(10)
+    assert state == {"capital": 5000, "in_position": 0, "drawdown": 0.0, "time_in_trade": 0, "recent_losses": 0,
+                     "profit_pct": 0.0, "rolling_loss_ratio": 0, "time_since_last_trade": 0}
+
+    # Vários candles de uma vez (modo em lote): só os campos que dependem do passo viram arrays
+    tracker.on_trade_opened(12)
+    steps = np.arange(12, 17)
+    state = tracker.state(steps)
+    np.testing.assert_array_equal(state["time_in_trade"], steps - 12)
+    np.testing.assert_array_equal(state["time_since_last_trade"], steps - 12)
+    assert state["in_position"] == 1
+
+
+def test_update_capital_tracks_peak():
+    tracker = RiskStateTracker(1000)
+    tracker.update_capital(1200)
+    tracker.update_capital(900)
+    assert tracker.peak_capital == 1200
+    assert tracker.drawdown == pytest.approx(0.25)
+
+
+def test_recent_window_larger_than_window_is_rejected():
+    with pytest.raises(ValueError):
+        RiskStateTracker(1000, window=2, recent_window=3)
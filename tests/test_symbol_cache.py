@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+import pytest
+
+pytest.importorskip("MetaTrader5")
+from live_trading import symbol_cache as cache_module
+from live_trading.symbol_cache import SymbolCache, DEFAULT_LOT_LIMITS
+
+
+class FakeTerminal:
+    """mt5.symbol_info com contagem de consultas"""
+
+    def __init__(self, known=("EURUSD",)):
+        self.known = set(known)
+        self.calls = []
+
+    def __call__(self, symbol):
+        self.calls.append(symbol)
+        if symbol not in self.known:
+            return None
+        return SimpleNamespace(volume_min=0.01, volume_max=50.0, volume_step=0.01, point=0.00001, digits=5,
+                               filling_mode=2)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    return now
+
+
+def test_terminal_is_queried_once_per_ttl(clock):
+    terminal = FakeTerminal()
+    cache = SymbolCache(ttl=300, fetch=terminal)
+    assert cache.lot_limits("EURUSD") == (0.01, 50.0, 0.01)
+    clock[0] += 299
+    assert cache.get("EURUSD").digits == 5
+    assert terminal.calls == ["EURUSD"]
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    clock[0] += 1  # TTL vencido: nova consulta ao terminal
+    cache.get("EURUSD")
+    assert terminal.calls == ["EURUSD", "EURUSD"]
+
+
+def test_unknown_symbol_is_not_cached(clock):
+    terminal = FakeTerminal()
+    cache = SymbolCache(ttl=300, fetch=terminal)
+    assert cache.get("XYZ") is None
+    assert cache.lot_limits("XYZ") == DEFAULT_LOT_LIMITS
+    assert terminal.calls == ["XYZ", "XYZ"]
+
+    terminal.known.add("XYZ")  # símbolo habilitado no terminal depois
+    assert cache.get("XYZ").symbol == "XYZ"
+
+
+def test_invalidate(clock):
+    terminal = FakeTerminal(known=("EURUSD", "GBPUSD"))
+    cache = SymbolCache(ttl=300, fetch=terminal)
+    cache.get("EURUSD")
+    cache.get("GBPUSD")
+    cache.invalidate("EURUSD")
+    cache.get("EURUSD")
+    cache.get("GBPUSD")
+    assert terminal.calls == ["EURUSD", "GBPUSD", "EURUSD"]
+
+    cache.invalidate()
+    cache.get("EURUSD")
+    cache.get("GBPUSD")
+    assert terminal.calls[3:] == ["EURUSD", "GBPUSD"]